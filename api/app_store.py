@@ -0,0 +1,515 @@
+"""Application records for the status and admin dashboards.
+
+``SQLiteStore`` persists applications across restarts and shares them
+between uvicorn workers; ``InMemoryStore`` keeps the original per-process
+dict. Both expose ``get`` / ``get_all`` / ``update``, plus ``list`` for
+paginated, filtered admin views and an append-only work log per application.
+"""
+import base64
+import binascii
+import bisect
+import copy
+import itertools
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import fast_json
+
+DEFAULT_PATH = os.path.join(tempfile.gettempdir(), "northstar_applications.db")
+
+SEED_APPLICATIONS = [
+    {
+        "id": 'MN-2024-555',
+        "firstName": 'John',
+        "lastName": 'Doe',
+        "submittedAt": "2024-12-22T10:00:00Z",
+        "status": 'Pending Review',
+        "step": 1,
+        "progress": 33,
+        "estimatedCompletion": '5-7 business days',
+        "week": 'Dec 15 - Dec 21',
+        "notifications": [
+            { "id": 1, "message": 'Application Received', "date": 'Dec 22, 2:30 PM', "type": 'success' },
+            { "id": 2, "message": 'Handbook Available', "date": 'Dec 22, 2:31 PM', "type": 'info' }
+        ],
+        "workLog": []
+    },
+]
+
+APPLICATION_FIELDS = (
+    "id", "firstName", "lastName", "submittedAt", "status", "step", "progress",
+    "estimatedCompletion", "week", "notifications", "workLog", "workLogTotal", "workLogCursor",
+)
+WORK_LOG_FIELDS = ("workLog", "workLogTotal", "workLogCursor")
+MAX_PAGE_SIZE = 200
+# Newest work-log entries embedded as "workLog" in application documents, with
+# "workLogTotal" and the "workLogCursor" that work_log() continues from
+RECENT_WORK_LOG = 20
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS applications (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL DEFAULT '',
+    step INTEGER NOT NULL DEFAULT 0,
+    submitted_at TEXT NOT NULL DEFAULT '',
+    document TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,
+    -- Rows in work_log for this application, kept by append_work_log
+    work_log_count INTEGER NOT NULL DEFAULT 0
+);
+-- Each filter column leads an index that also covers the listing order,
+-- so a filtered page is an index range scan with no sort
+DROP INDEX IF EXISTS applications_status;
+DROP INDEX IF EXISTS applications_step;
+CREATE INDEX IF NOT EXISTS applications_status_submitted ON applications(status, submitted_at, id);
+CREATE INDEX IF NOT EXISTS applications_step_submitted ON applications(step, submitted_at, id);
+CREATE INDEX IF NOT EXISTS applications_submitted ON applications(submitted_at, id);
+
+-- AUTOINCREMENT: sequence numbers are never reused, so entry ids stay unique
+-- and increasing across workers and restarts
+CREATE TABLE IF NOT EXISTS work_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    app_id TEXT NOT NULL,
+    entry TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS work_log_app ON work_log(app_id, seq);
+"""
+
+# Fixed statement texts, so each connection's statement cache reuses the
+# prepared statements instead of re-parsing them per call
+_SELECT_ONE = "SELECT document, work_log_count FROM applications WHERE id = ?"
+_SELECT_VERSIONED = "SELECT document, version FROM applications WHERE id = ?"
+_SELECT_ALL = "SELECT document, work_log_count FROM applications ORDER BY rowid"
+_INSERT = """
+INSERT OR IGNORE INTO applications (id, status, step, submitted_at, document, updated_at)
+VALUES (:id, :status, :step, :submitted_at, :document, :updated_at)
+"""
+_INSERT_LOG = "INSERT INTO work_log (app_id, entry, created_at) VALUES (?, ?, ?)"
+_SELECT_LOG = "SELECT seq, entry FROM work_log WHERE app_id = ? AND seq < ? ORDER BY seq DESC LIMIT ?"
+# A backwards range scan of work_log_app that stops after LIMIT rows
+_SELECT_RECENT_LOG = "SELECT seq, entry FROM work_log WHERE app_id = ? ORDER BY seq DESC LIMIT ?"
+_COUNT_LOG = "UPDATE applications SET work_log_count = work_log_count + ? WHERE id = ?"
+_RECOUNT_LOGS = "UPDATE applications SET work_log_count = (SELECT count(*) FROM work_log WHERE app_id = applications.id)"
+_UPDATE = """
+UPDATE applications SET status = :status, step = :step, submitted_at = :submitted_at,
+                        document = :document, updated_at = :updated_at, version = version + 1
+WHERE id = :id
+"""
+# Compare-and-swap: only applies if nobody wrote the row since it was read
+_UPDATE_IF_VERSION = _UPDATE + "  AND version = :version\n"
+
+# Attempts before modify() gives up on a row that keeps changing underneath it
+MAX_CAS_ATTEMPTS = 50
+# Full-jitter exponential backoff between attempts (seconds), capped so a hot row's writers don't stall
+CAS_BACKOFF_BASE = 0.0005
+CAS_BACKOFF_MAX = 0.02
+
+Transition = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+
+class UpdateConflict(RuntimeError):
+    """An optimistic update kept losing the race for one application."""
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class ListQuery:
+    """Filters and position for one page of the admin listing, newest submission first."""
+
+    def __init__(
+        self,
+        status: Optional[str] = None,
+        step: Optional[int] = None,
+        submitted_from: Optional[str] = None,
+        submitted_to: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        fields: Optional[Iterable[str]] = None,
+    ):
+        self.status = status
+        self.step = step
+        # ISO-8601 timestamps, compared as strings; the upper bound is exclusive
+        self.submitted_from = submitted_from
+        self.submitted_to = submitted_to
+        self.after = decode_cursor(cursor) if cursor else None
+        self.limit = max(1, min(limit, MAX_PAGE_SIZE))
+        self.fields = list(fields) if fields else None
+        if self.fields:
+            unknown = [field for field in self.fields if field not in APPLICATION_FIELDS]
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    def matches(self, app: Dict[str, Any]) -> bool:
+        submitted = app.get("submittedAt", "")
+        return (
+            (self.status is None or app.get("status") == self.status)
+            and (self.step is None or app.get("step") == self.step)
+            and (self.submitted_from is None or submitted >= self.submitted_from)
+            and (self.submitted_to is None or submitted < self.submitted_to)
+            and (self.after is None or (submitted, app["id"]) < self.after)
+        )
+
+    def project(self, app: Dict[str, Any]) -> Dict[str, Any]:
+        if not self.fields:
+            return app
+        return {field: app[field] for field in self.fields if field in app}
+
+    def page(self, apps: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Shape ``limit + 1`` fetched rows into a page with the next cursor."""
+        has_more = len(apps) > self.limit
+        apps = apps[:self.limit]
+        last = apps[-1] if apps else None
+        return {
+            "data": [self.project(app) for app in apps],
+            "cursor": encode_cursor(last.get("submittedAt", ""), last["id"]) if has_more else None,
+            "has_more": has_more,
+        }
+
+
+def _log_entry(seq: int, entry: str) -> Dict[str, Any]:
+    # Entries migrated from embedded logs keep their original ids
+    entry = fast_json.loads(entry)
+    entry.setdefault("id", f"log-{seq}")
+    return entry
+
+
+def log_page(rows: List[Tuple[int, Dict[str, Any]]], limit: int) -> Dict[str, Any]:
+    """Shape ``limit + 1`` work-log rows, newest first, into a page; the cursor is a sequence number."""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "data": [entry for _, entry in rows],
+        "cursor": str(rows[-1][0]) if has_more else None,
+        "has_more": has_more,
+    }
+
+
+def embed_work_log(app: Dict[str, Any], rows: List[Tuple[int, Dict[str, Any]]], total: int) -> Dict[str, Any]:
+    """Set ``app``'s embedded work log from its newest ``rows`` (newest first) out of ``total`` entries."""
+    app["workLog"] = [entry for _, entry in rows]
+    app["workLogTotal"] = total
+    # Where /api/v1/work-log picks up when the embedded entries aren't the whole history
+    app["workLogCursor"] = str(rows[-1][0]) if total > len(rows) else None
+    return app
+
+
+def decode_log_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 1 << 62
+    try:
+        seq = int(cursor)
+    except ValueError:
+        raise InvalidCursor("Malformed cursor")
+    if seq <= 0:
+        raise InvalidCursor("Malformed cursor")
+    return seq
+
+
+def encode_cursor(submitted_at: str, app_id: str) -> str:
+    raw = fast_json.dumps([submitted_at, app_id])
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        submitted_at, app_id = fast_json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError, TypeError):
+        raise InvalidCursor("Malformed cursor")
+    if not isinstance(submitted_at, str) or not isinstance(app_id, str):
+        raise InvalidCursor("Malformed cursor")
+    return submitted_at, app_id
+
+
+def _row(app: Dict[str, Any], now: float) -> Dict[str, Any]:
+    return {
+        "id": app["id"],
+        "status": app.get("status", ""),
+        "step": app.get("step", 0),
+        "submitted_at": app.get("submittedAt", ""),
+        "document": fast_json.dumps(app).decode("utf-8"),
+        "updated_at": now,
+    }
+
+
+class InMemoryStore:
+    def __init__(self):
+        self.applications = {}
+        # app id -> [(seq, entry)], oldest first; appends are O(1)
+        self.work_logs: Dict[str, List[Tuple[int, Dict[str, Any]]]] = {}
+        self._log_seq = itertools.count(1)
+        # One lock per application, so unrelated applications never wait on each other
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        # Seed
+        self.seed()
+
+    def seed(self):
+        for app in SEED_APPLICATIONS:
+            self.applications[app["id"]] = copy.deepcopy(app)
+
+    def _with_recent_log(self, app: Dict[str, Any]) -> Dict[str, Any]:
+        entries = self.work_logs.get(app["id"], [])
+        return embed_work_log(dict(app), list(reversed(entries[-RECENT_WORK_LOG:])), len(entries))
+
+    def get(self, app_id: str):
+        app = self.applications.get(app_id)
+        return self._with_recent_log(app) if app is not None else None
+
+    def get_all(self):
+        return [self._with_recent_log(app) for app in self.applications.values()]
+
+    def _lock(self, app_id: str) -> threading.Lock:
+        lock = self._locks.get(app_id)
+        if lock is None:
+            with self._locks_guard:
+                lock = self._locks.setdefault(app_id, threading.Lock())
+        return lock
+
+    def append_work_log(self, app_id: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+        # Held across numbering and appending so each history stays in seq order
+        with self._lock(app_id):
+            seq = next(self._log_seq)
+            entry = dict(entry, id=f"log-{seq}")
+            self.work_logs.setdefault(app_id, []).append((seq, entry))
+        return entry
+
+    def work_log(self, app_id: str, cursor: Optional[str] = None, limit: int = RECENT_WORK_LOG) -> Dict[str, Any]:
+        before = decode_log_cursor(cursor)
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        entries = self.work_logs.get(app_id, [])
+        # Entries are in seq order, so the page start is a binary search away
+        end = bisect.bisect_left(entries, (before,))
+        start = max(0, end - limit - 1)
+        return log_page(list(reversed(entries[start:end])), limit)
+
+    def update(self, app_id: str, updates: Dict):
+        return self.modify(app_id, lambda app: updates)
+
+    def modify(self, app_id: str, transition: Transition) -> Optional[Dict[str, Any]]:
+        """Apply ``transition(app) -> updates`` atomically with respect to other writers of this application.
+
+        ``transition`` gets a shallow copy; copy nested lists before changing them.
+        """
+        with self._lock(app_id):
+            app = self.applications.get(app_id)
+            if app is None:
+                return None
+            app.update(transition(dict(app)))
+            return app
+
+    def list(self, query: ListQuery) -> Dict[str, Any]:
+        apps = sorted(
+            (app for app in self.applications.values() if query.matches(app)),
+            key=lambda app: (app.get("submittedAt", ""), app["id"]),
+            reverse=True,
+        )
+        return query.page([self._with_recent_log(app) for app in apps[:query.limit + 1]])
+
+
+class SQLiteStore:
+    """Applications in a WAL-mode SQLite database, one JSON document per row.
+
+    ``status``, ``step`` and ``submittedAt`` are mirrored into indexed columns
+    for the admin queries. Each thread gets its own connection. Updates are
+    optimistic: ``modify`` reads a row and its ``version`` without locking and
+    writes back only if the version is unchanged (compare-and-swap), re-running
+    the transition after a jittered, exponentially growing pause when another
+    writer got there first. ``conflicts`` counts those retries. Work-log
+    appends insert a row and bump the application's ``work_log_count`` in one
+    transaction; they leave ``version`` alone, so they never conflict.
+
+    Nothing touches the file until the first query: the schema, the demo
+    applications (``seed``) and the work-log migration are done by the first
+    connection, so creating the store at import costs a cold start nothing.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, seed: bool = True):
+        self.path = path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._seed = seed
+        self.conflicts = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Transactions are managed explicitly below
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, cached_statements=64)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(_SCHEMA)
+                    columns = {row[1] for row in conn.execute("PRAGMA table_info(applications)")}
+                    if "version" not in columns:
+                        # Databases created before optimistic versioning
+                        conn.execute("ALTER TABLE applications ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+                    if "work_log_count" not in columns:
+                        # Databases created before the count was kept: count once, then keep it up to date
+                        conn.execute("ALTER TABLE applications ADD COLUMN work_log_count INTEGER NOT NULL DEFAULT 0")
+                        conn.execute(_RECOUNT_LOGS)
+                    self._seed_and_migrate(conn)
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def seed(self):
+        """Insert the demo applications unless they already exist (restarts keep their state)."""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(_INSERT, [_row(app, now) for app in SEED_APPLICATIONS])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _seed_and_migrate(self, conn: sqlite3.Connection):
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self._seed:
+                conn.executemany(_INSERT, [_row(app, now) for app in SEED_APPLICATIONS])
+            self._migrate_work_logs(conn, now)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _migrate_work_logs(self, conn: sqlite3.Connection, now: float):
+        """Move work logs still embedded in documents into the work_log table."""
+        for document, _ in conn.execute(_SELECT_ALL).fetchall():
+            app = fast_json.loads(document)
+            entries = app.get("workLog") or []
+            if not entries:
+                continue
+            # Embedded logs are newest first
+            for entry in reversed(entries):
+                conn.execute(_INSERT_LOG, (app["id"], fast_json.dumps(entry).decode("utf-8"), now))
+            conn.execute(_COUNT_LOG, (len(entries), app["id"]))
+            app["workLog"] = []
+            conn.execute(_UPDATE, _row(app, now))
+
+    def _with_recent_logs(self, rows: Iterable[Tuple[str, int]]) -> List[Dict[str, Any]]:
+        """Decode ``(document, work_log_count)`` rows and embed each one's newest log entries."""
+        conn = self._conn()
+        apps = []
+        for document, total in rows:
+            app = fast_json.loads(document)
+            # Reads at most RECENT_WORK_LOG index entries, however long the history
+            recent = conn.execute(_SELECT_RECENT_LOG, (app["id"], RECENT_WORK_LOG)).fetchall() if total else []
+            apps.append(embed_work_log(app, [(seq, _log_entry(seq, entry)) for seq, entry in recent], total))
+        return apps
+
+    def insert(self, app: Dict[str, Any]) -> bool:
+        """Add a new application; returns False if the id already exists."""
+        conn = self._conn()
+        return conn.execute(_INSERT, _row(app, time.time())).rowcount == 1
+
+    def get(self, app_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(_SELECT_ONE, (app_id,)).fetchone()
+        return self._with_recent_logs([row])[0] if row else None
+
+    def get_all(self) -> List[Dict[str, Any]]:
+        return self._with_recent_logs(self._conn().execute(_SELECT_ALL).fetchall())
+
+    def append_work_log(self, app_id: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Add an entry without touching the application document; O(1) in the history length."""
+        # The id is derived from seq on read; the count moves with the row so reads never count the log
+        payload = fast_json.dumps({key: value for key, value in entry.items() if key != "id"}).decode("utf-8")
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            seq = conn.execute(_INSERT_LOG, (app_id, payload, time.time())).lastrowid
+            conn.execute(_COUNT_LOG, (1, app_id))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return dict(entry, id=f"log-{seq}")
+
+    def work_log(self, app_id: str, cursor: Optional[str] = None, limit: int = RECENT_WORK_LOG) -> Dict[str, Any]:
+        """One page of an application's work log, newest first."""
+        before = decode_log_cursor(cursor)
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        rows = self._conn().execute(_SELECT_LOG, (app_id, before, limit + 1))
+        return log_page([(seq, _log_entry(seq, entry)) for seq, entry in rows], limit)
+
+    def list(self, query: ListQuery) -> Dict[str, Any]:
+        """One page of applications, newest submission first, via the column indexes."""
+        clauses = []
+        params: List[Any] = []
+        if query.status is not None:
+            clauses.append("status = ?")
+            params.append(query.status)
+        if query.step is not None:
+            clauses.append("step = ?")
+            params.append(query.step)
+        if query.submitted_from is not None:
+            clauses.append("submitted_at >= ?")
+            params.append(query.submitted_from)
+        if query.submitted_to is not None:
+            clauses.append("submitted_at < ?")
+            params.append(query.submitted_to)
+        if query.after is not None:
+            # Keyset: continue strictly after the last row of the previous page
+            clauses.append("(submitted_at, id) < (?, ?)")
+            params.extend(query.after)
+        sql = "SELECT document, work_log_count FROM applications"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY submitted_at DESC, id DESC LIMIT ?"
+        params.append(query.limit + 1)
+        rows = self._conn().execute(sql, params).fetchall()
+        if query.fields is None or any(field in query.fields for field in WORK_LOG_FIELDS):
+            return query.page(self._with_recent_logs(rows))
+        return query.page([fast_json.loads(document) for document, _ in rows])
+
+    def update(self, app_id: str, updates: Dict) -> Optional[Dict[str, Any]]:
+        return self.modify(app_id, lambda app: updates)
+
+    def modify(self, app_id: str, transition: Transition) -> Optional[Dict[str, Any]]:
+        """Apply ``transition(app) -> updates`` with optimistic concurrency control.
+
+        The row is read without locking and written back only if its version
+        is unchanged; otherwise the transition is re-run on the fresh row.
+        Writers to different applications never wait on each other beyond
+        SQLite's brief per-commit write lock.
+        """
+        conn = self._conn()
+        for attempt in range(MAX_CAS_ATTEMPTS):
+            row = conn.execute(_SELECT_VERSIONED, (app_id,)).fetchone()
+            if row is None:
+                return None
+            document, version = row
+            app = fast_json.loads(document)
+            app.update(transition(fast_json.loads(document)))
+            params = _row(app, time.time())
+            params["version"] = version
+            if conn.execute(_UPDATE_IF_VERSION, params).rowcount == 1:
+                return app
+            self.conflicts += 1
+            # Let the winning writer finish before re-reading; backing off further each time
+            # spreads out writers that keep colliding on a hot row
+            time.sleep(random.uniform(0, min(CAS_BACKOFF_MAX, CAS_BACKOFF_BASE * 2 ** attempt)))
+        raise UpdateConflict(f"Application {app_id} changed {MAX_CAS_ATTEMPTS} times during update")
+
+
+def create_store():
+    """The store selected by ``APP_STORE`` (``sqlite``, the default, or ``memory``)."""
+    kind = os.environ.get("APP_STORE", "sqlite").lower()
+    if kind == "memory":
+        return InMemoryStore()
+    return SQLiteStore(os.environ.get("APP_STORE_PATH", DEFAULT_PATH))
@@ -0,0 +1,154 @@
+"""Persistent SQLite cache of recruiter contacts found per company."""
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import fast_json
+
+DEFAULT_PATH = os.path.join(tempfile.gettempdir(), "northstar_contacts.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS contacts (
+    company_key TEXT NOT NULL,
+    title_key TEXT NOT NULL,
+    contacts TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (company_key, title_key)
+);
+CREATE INDEX IF NOT EXISTS contacts_expires_at ON contacts(expires_at);
+"""
+
+_UPSERT = """
+INSERT INTO contacts (company_key, title_key, contacts, fetched_at, expires_at)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(company_key, title_key) DO UPDATE SET
+    contacts = excluded.contacts,
+    fetched_at = excluded.fetched_at,
+    expires_at = excluded.expires_at
+"""
+
+# Legal-form words that don't distinguish one employer from another
+_COMPANY_SUFFIXES = {
+    "inc", "incorporated", "corp", "corporation", "co", "company", "llc", "ltd", "limited",
+    "plc", "lp", "llp", "gmbh", "ag", "sa",
+}
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Expired rows are deleted every this many writes
+_PRUNE_EVERY = 200
+
+ContactKey = Tuple[str, str]
+
+
+def normalize_company(company: str) -> str:
+    """Canonical company key: "The Target Corp." and "Target Corporation" both give "target"."""
+    words = _WORD_RE.findall(company.lower().replace("&", " and "))
+    if len(words) > 1 and words[0] == "the":
+        words = words[1:]
+    while len(words) > 1 and words[-1] in _COMPANY_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+def contact_key(company: str, job_title: str = "") -> ContactKey:
+    return normalize_company(company), " ".join(job_title.lower().split())
+
+
+class ContactCache:
+    """Contacts per (company, job title) that outlive restarts.
+
+    Found contacts are kept for ``ttl`` seconds. Searches that found nobody
+    are cached too, for the shorter ``negative_ttl``, so a company without
+    public recruiter profiles isn't searched again on every lookup. Each
+    thread gets its own connection to the WAL-mode database.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, ttl: float = 86400, negative_ttl: float = 6 * 3600):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._writes = 0
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(_SCHEMA)
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys: Iterable[ContactKey], now: Optional[float] = None) -> Dict[ContactKey, List[Dict[str, Any]]]:
+        """Unexpired entries for ``keys``; keys with no live entry are left out."""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        now = time.time() if now is None else now
+        found: Dict[ContactKey, List[Dict[str, Any]]] = {}
+        conn = self._conn()
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(keys), 400):
+            chunk = keys[start:start + 400]
+            clause = " OR ".join("(company_key = ? AND title_key = ?)" for _ in chunk)
+            params: List[Any] = [part for key in chunk for part in key]
+            rows = conn.execute(
+                f"SELECT company_key, title_key, contacts FROM contacts WHERE expires_at > ? AND ({clause})",
+                [now] + params,
+            )
+            for company_key, title_key, contacts in rows:
+                found[(company_key, title_key)] = fast_json.loads(contacts)
+
+        for key in keys:
+            contacts = found.get(key)
+            if contacts is None:
+                self.misses += 1
+            elif contacts:
+                self.hits += 1
+            else:
+                self.negative_hits += 1
+        return found
+
+    def get(self, key: ContactKey, now: Optional[float] = None) -> Optional[List[Dict[str, Any]]]:
+        return self.get_many([key], now).get(key)
+
+    def put(self, key: ContactKey, contacts: List[Dict[str, Any]], now: Optional[float] = None):
+        now = time.time() if now is None else now
+        ttl = self.ttl if contacts else self.negative_ttl
+        conn = self._conn()
+        with conn:
+            conn.execute(_UPSERT, (key[0], key[1], fast_json.dumps(contacts).decode("utf-8"), now, now + ttl))
+        self._writes += 1
+        if self._writes % _PRUNE_EVERY == 0:
+            self.prune(now)
+
+    def prune(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        conn = self._conn()
+        with conn:
+            return conn.execute("DELETE FROM contacts WHERE expires_at <= ?", (now,)).rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "hits": self.hits,
+            "negativeHits": self.negative_hits,
+            "misses": self.misses,
+            "ttl": self.ttl,
+            "negativeTtl": self.negative_ttl,
+            "hitRatio": round((self.hits + self.negative_hits) / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,47 @@
+"""Fast JSON encoding for hot API responses.
+
+Uses orjson when it is installed (it serializes dataclasses such as
+``JobRecord`` natively) and falls back to the standard library otherwise.
+"""
+import dataclasses
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the deployment image
+    orjson = None
+
+
+def _to_jsonable(obj: Any) -> Any:
+    if dataclasses.is_dataclass(obj):
+        return {field.name: getattr(obj, field.name) for field in dataclasses.fields(obj)}
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=_to_jsonable)
+    return json.dumps(obj, default=_to_jsonable, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def loads(data: Any) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that encodes with orjson when available.
+
+    Return an instance directly from an endpoint; returning a plain dict with
+    ``response_class=FastJSONResponse`` would still go through FastAPI's
+    generic ``jsonable_encoder`` first.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,67 @@
+"""Firestore client, created on first use.
+
+Importing ``firebase_admin`` pulls in google-cloud-firestore, gRPC and
+google-auth, and looking up default credentials outside GCP probes the
+metadata server for seconds. Only ``/api/v1/apply`` needs Firestore, so
+the import and the client both wait for the first ``get_db()`` call
+instead of every cold start paying for them.
+"""
+import datetime
+import os
+import threading
+from typing import Any
+
+from write_behind import FakeFirestore
+
+_UNSET = object()
+_db: Any = _UNSET
+_lock = threading.Lock()
+
+
+def _connect():
+    if os.environ.get("FIRESTORE_FAKE", "").lower() in ("1", "true", "yes"):
+        # In-process stand-in for local runs and load tests; nothing is persisted
+        return FakeFirestore()
+    try:
+        import firebase_admin
+        from firebase_admin import firestore
+
+        if not firebase_admin._apps:
+            # Attempts to load default credentials (works on Vercel if env vars are set)
+            firebase_admin.initialize_app()
+        return firestore.client()
+    except Exception as e:
+        print(f"WARNING: Firebase Admin failed to initialize. Database features will be disabled.")
+        print(f"Reason: {e}")
+        print("Ensure GOOGLE_APPLICATION_CREDENTIALS is set or you are in a GCP environment.")
+        return None
+
+
+def get_db():
+    """Return the Firestore client, or None if Firebase isn't available (checked once per process)."""
+    global _db
+    if _db is _UNSET:
+        with _lock:
+            if _db is _UNSET:
+                _db = _connect()
+    return _db
+
+
+def set_db(client):
+    """Use ``client`` (e.g. a ``FakeFirestore``) instead of initializing Firebase; None disables Firestore."""
+    global _db
+    with _lock:
+        _db = client
+
+
+def is_loaded() -> bool:
+    return _db is not _UNSET
+
+
+def server_timestamp(db) -> Any:
+    """The value to store as a document's creation time when writing directly through ``db``."""
+    if isinstance(db, FakeFirestore):
+        return datetime.datetime.now(datetime.timezone.utc)
+    from firebase_admin import firestore
+
+    return firestore.SERVER_TIMESTAMP
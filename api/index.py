@@ -1,16 +1,47 @@
-import io
-import json
+import asyncio
+import hashlib
 import os
+import sys
+import threading
 import time
-from typing import Any, Dict, List, Optional
+from dataclasses import dataclass
+from operator import attrgetter
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-import firebase_admin
-import requests
-from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi import FastAPI, File, HTTPException, Query, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from firebase_admin import firestore
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from pypdf import PdfReader
+
+# Sibling modules are imported by name whether we run under uvicorn, Docker or Vercel
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app_store import InvalidCursor as InvalidApplicationCursor, ListQuery, MAX_PAGE_SIZE as APPLICATION_MAX_PAGE_SIZE, create_store
+from contact_cache import DEFAULT_PATH as CONTACT_CACHE_DEFAULT_PATH, ContactCache, ContactKey, contact_key
+from fast_json import FastJSONResponse
+from fast_json import dumps as fast_dumps
+from firestore_db import get_db, server_timestamp
+from job_index import DEFAULT_MAX_AGE as JOB_INDEX_DEFAULT_MAX_AGE, DEFAULT_PATH as JOB_INDEX_DEFAULT_PATH, JobIndex
+from job_normalizer import JobRecord, normalize_jobs
+import metrics
+from llm import LLMError, LLMProvider, complete_json, extract_json, get_provider, stream_completion
+from resume_cache import DEFAULT_DIR as RESUME_CACHE_DEFAULT_DIR, ResumeCache, is_valid_hash
+from resume_parser import ResumeTooLarge, discard, extract_text, shutdown_executor, spool_upload
+from serp_budget import current_user, get_budget
+from search_cursor import InvalidCursor, SearchResultSet, decode_cursor, page_response
+from search_filters import SearchFilters
+from singleflight import SingleFlight
+from suggest_cache import SuggestionCache
+from title_index import AlternativesMatcher, TitleIndex
+from ttl_cache import FRESH, MISS, STALE, TTLCache
+from upstream import (
+    SERPAPI_MAX_PAGES, SERPAPI_PAGE_SIZE, SERPAPI_URL, close_client, fetch_serpapi_page, get_client, iter_job_pages,
+)
+from write_behind import DEFAULT_PATH as OUTBOX_DEFAULT_PATH, QueueFull, WriteBehindQueue
 
 app = FastAPI(docs_url="/api/v1/docs", openapi_url="/api/v1/openapi.json")
 # Allow CORS for development logic
@@ -22,27 +53,170 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.get("/api/v1/search")
-def search_jobs(
-    query: str = "", 
-    location: str = "Minnesota", 
-    date_filter: str = "week",  # today, 3days, week, month
-    work_type: str = "any",  # remote, hybrid, onsite, any
-    radius: str = "50",  # miles from location
-    exp_level: str = "any" # entry, mid, senior, any
-):
-    # SerpApi Google Jobs API
-    serpapi_key = os.environ.get("SERPAPI_KEY")
-    
-    if not serpapi_key:
-        return {"error": "SERPAPI_KEY not configured on server"}
+# Outermost, so the timings include the other middleware
+app.add_middleware(metrics.MetricsMiddleware)
 
-    url = "https://serpapi.com/search"
-    
-    # Safe query params
-    q = query.strip() if query.strip() else "Software"
-    loc = location.strip() if location.strip() else "Minnesota"
+@app.exception_handler(RequestValidationError)
+async def reject_bad_query_params(request: Request, exc: RequestValidationError):
+    """Out-of-range query parameters (e.g. limit=0) are a 400, like a malformed cursor; bodies keep FastAPI's 422"""
+    if all(error["loc"][:1] == ("query",) for error in exc.errors()):
+        return FastJSONResponse(status_code=400, content={"detail": jsonable_encoder(exc.errors())})
+    return await request_validation_exception_handler(request, exc)
+
+@app.get("/api/v1/metrics", include_in_schema=False)
+def get_metrics():
+    """Prometheus text exposition of request, upstream, fallback and cache metrics"""
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.on_event("shutdown")
+async def shutdown_shared_resources():
+    await close_client()
+    shutdown_executor()
+    if application_outbox is not None:
+        # Drain what we can; anything left stays in the outbox for the next start
+        await run_in_threadpool(application_outbox.stop)
+
+# --- Job Search ---
+search_cache = TTLCache(
+    ttl=float(os.environ.get("SEARCH_CACHE_TTL", "900")),
+    stale_ttl=float(os.environ.get("SEARCH_CACHE_STALE_TTL", "3600")),
+    max_entries=int(os.environ.get("SEARCH_CACHE_MAX_ENTRIES", "256")),
+    max_bytes=int(os.environ.get("SEARCH_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+)
+metrics.register_cache("search", lambda: (search_cache.hits + search_cache.stale_hits, search_cache.misses))
+# Identical concurrent searches share one set of SerpApi page requests
+search_flight = SingleFlight("search")
+# Server-held result sets behind /api/v1/search?limit=...&cursor=... pagination
+search_result_sets = TTLCache(
+    ttl=float(os.environ.get("SEARCH_CURSOR_TTL", "1800")),
+    max_entries=int(os.environ.get("SEARCH_CURSOR_MAX_SETS", "1024")),
+)
+SEARCH_PAGE_SIZE = 10
+SEARCH_MAX_PAGE_SIZE = 50
+# Every job we normalize is kept in a local full-text index for source=local/hybrid
+job_index = JobIndex(
+    os.environ.get("JOB_INDEX_PATH", JOB_INDEX_DEFAULT_PATH),
+    max_age=float(os.environ.get("JOB_INDEX_MAX_AGE", str(JOB_INDEX_DEFAULT_MAX_AGE))),
+)
+_background_tasks = set()
+
+def _spawn(coro):
+    task = asyncio.ensure_future(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+def _normalize_key_part(value: str) -> str:
+    return " ".join(value.lower().split())
+
+def search_cache_key(q: str, loc: str, chips: str, lrad: str, work_type_query: str):
+    """Cache key for a search; equivalent queries that differ only in case/spacing share an entry"""
+    return (
+        _normalize_key_part(q),
+        _normalize_key_part(loc),
+        ",".join(sorted(c for c in chips.split(",") if c)),
+        lrad.strip(),
+        work_type_query.strip(),
+    )
+
+def _is_cacheable_search(result: Dict[str, Any]) -> bool:
+    # A failed first page also comes back as an empty result, so don't pin those
+    return "error" not in result and bool(result.get("data"))
+
+async def _index_jobs(jobs: List[JobRecord], loc: str):
+    try:
+        await run_in_threadpool(job_index.upsert, jobs, loc)
+    except Exception as e:
+        print(f"Job index upsert failed: {e}")
+
+async def _search_local(q: str, loc: str) -> Dict[str, Any]:
+    try:
+        jobs = await run_in_threadpool(job_index.search, q, loc)
+    except Exception as e:
+        print(f"Local job index search failed: {e}")
+        return {"data": [], "error": str(e), "source": "local"}
+    return {"data": jobs, "total": len(jobs), "pages_fetched": 0, "source": "local"}
+
+# Posting age (hours) each date chip asks for; jobs inside it count toward the fresh target
+DATE_CHIP_WINDOW_HOURS = {
+    "date_posted:today": 24,
+    "date_posted:3days": 72,
+    "date_posted:week": 168,
+    "date_posted:month": 720,
+}
+
+def _freshness_window(base_params: Dict[str, Any]) -> Optional[int]:
+    """The posting age (hours) the date chip in ``base_params`` asks for, if any"""
+    for chip in base_params.get("chips", "").split(","):
+        if chip in DATE_CHIP_WINDOW_HOURS:
+            return DATE_CHIP_WINDOW_HOURS[chip]
+    return None
+
+async def _iter_search_pages(
+    base_params: Dict[str, Any], loc: str, fresh_window: Optional[int] = None
+) -> AsyncIterator[Tuple[List[JobRecord], bool]]:
+    """Yield each SerpApi page as its new (deduplicated) normalized jobs and whether the page was full
+
+    Jobs count toward the fresh target if they are inside ``fresh_window``
+    hours: the user's date filter, which is narrower than the superset's
+    chip when filters are applied locally. Defaults to the chip's window.
+    """
+    seen_ids = set()
+    budget = get_budget()
+    window = _freshness_window(base_params) if fresh_window is None else fresh_window
+    fresh = 0
+
+    # Each page costs a credit, so the next one is only requested if this one
+    # was full and the search still lacks fresh jobs; a failed or empty page
+    # ends the search with the results from the pages before it
+    for page in range(SERPAPI_MAX_PAGES):
+        remaining = SERPAPI_MAX_PAGES - page
+        if page > 0 and remaining > 1 and fresh + (remaining - 1) * SERPAPI_PAGE_SIZE < budget.fresh_target:
+            # Even full pages can't reach the fresh target before the last one, so only a
+            # short page stops the search early: request the rest at once
+            async for jobs_list in iter_job_pages(base_params, first_page=page):
+                yield normalize_jobs(jobs_list, loc, seen_ids), len(jobs_list) >= SERPAPI_PAGE_SIZE
+            return
+        jobs_list = await fetch_serpapi_page(base_params, page)
+        if not jobs_list:
+            return
+        jobs = normalize_jobs(jobs_list, loc, seen_ids)
+        page_full = len(jobs_list) >= SERPAPI_PAGE_SIZE
+        yield jobs, page_full
+        fresh += len(jobs) if window is None else sum(1 for job in jobs if job.freshnessScore <= window)
+        if not budget.wants_next_page(page_full, fresh):
+            return
+
+def _finalize_search(all_jobs: List[JobRecord], loc: str, pages_fetched: int, exhausted: bool) -> Dict[str, Any]:
+    """The cached result of a search; ``exhausted`` means SerpApi has nothing past ``pages_fetched`` pages"""
+    # Sort by posting age in hours (most recent first) and limit to 50
+    all_jobs.sort(key=attrgetter("freshnessScore"))
+    final_jobs = all_jobs[:50]
     
+    if final_jobs:
+        # Indexing happens off the response path
+        _spawn(_index_jobs(final_jobs, loc))
+        
+    return {"data": final_jobs, "total": len(final_jobs), "pages_fetched": pages_fetched, "exhausted": exhausted}
+
+async def _fetch_search_results(base_params: Dict[str, Any], loc: str, fresh_window: Optional[int] = None) -> Dict[str, Any]:
+    try:
+        all_jobs = []
+        pages = 0
+        last_page_full = False
+        async for page_jobs, last_page_full in _iter_search_pages(base_params, loc, fresh_window):
+            all_jobs.extend(page_jobs)
+            pages += 1
+        return _finalize_search(all_jobs, loc, pages, not last_page_full)
+        
+    except Exception as e:
+        print(f"Error fetching jobs from SerpApi: {str(e)}")
+        return {"data": [], "error": str(e)}
+
+def _build_search_params(
+    q: str, loc: str, date_filter: str, work_type: str, radius: str, exp_level: str, serpapi_key: str
+) -> Tuple[Dict[str, Any], Tuple[str, ...]]:
+    """SerpApi params for a search plus the cache key that identifies it"""
     # Add work type to query if specified
     work_type_query = ""
     if work_type == "remote":
@@ -86,149 +260,391 @@ def search_jobs(
     if chips:
         base_params["chips"] = ",".join(chips)
 
+    cache_key = search_cache_key(q, loc, base_params.get("chips", ""), radius, work_type_query)
+    return base_params, cache_key
+
+# Fetch one superset per query/location/radius and apply work type, date and experience filters locally
+SEARCH_LOCAL_FILTERS = os.environ.get("SEARCH_LOCAL_FILTERS", "1").lower() in ("1", "true", "yes")
+
+# Opt-in: a locally filtered superset with fewer jobs than this is topped up by the filtered
+# SerpApi query, once that has been fetched in the background (0 = never; toggles stay free)
+SEARCH_FILTER_MIN_RESULTS = int(os.environ.get("SEARCH_FILTER_MIN_RESULTS", "0"))
+
+@dataclass
+class SearchPlan:
+    """What a search fetches and caches, how that is narrowed locally, and the query to top it up with"""
+    base_params: Dict[str, Any]
+    cache_key: Tuple[str, ...]
+    filters: SearchFilters
+    # Posting age (hours) the user asked for; jobs inside it count toward the fresh target
+    fresh_window: Optional[int] = None
+    # The query with the filters left to SerpApi; None when that is the superset itself
+    narrow_params: Optional[Dict[str, Any]] = None
+    narrow_key: Optional[Tuple[str, ...]] = None
+
+def _plan_search(
+    q: str, loc: str, date_filter: str, work_type: str, radius: str, exp_level: str, job_type: str, serpapi_key: str
+) -> SearchPlan:
+    """SerpApi params and cache key for what to fetch, plus the filters to apply to it locally"""
+    narrow_params, narrow_key = _build_search_params(q, loc, date_filter, work_type, radius, exp_level, serpapi_key)
+    if not SEARCH_LOCAL_FILTERS:
+        # SerpApi has no job type filter, so that one is always applied here
+        return SearchPlan(narrow_params, narrow_key, SearchFilters(job_type=job_type), _freshness_window(narrow_params))
+    filters = SearchFilters(date_filter, work_type, exp_level, job_type)
+    base_params, cache_key = _build_search_params(q, loc, filters.superset_date_filter, "any", radius, "any", serpapi_key)
+    if narrow_key == cache_key:
+        narrow_params = narrow_key = None
+    return SearchPlan(base_params, cache_key, filters, filters.max_age_hours, narrow_params, narrow_key)
+
+@app.get("/api/v1/search/cache")
+async def search_cache_stats():
+    """Hit/miss/evict counters for tuning the search result cache"""
+    return search_cache.stats()
+
+def _or_unlimited(remaining: Optional[int]) -> int:
+    return -1 if remaining is None else remaining
+
+metrics.REGISTRY.register(metrics.CallbackMetric(
+    "northstar_serpapi_credits_spent", "SerpApi credits spent today by this instance.", (),
+    lambda: {(): get_budget().stats()["spent"]},
+))
+metrics.REGISTRY.register(metrics.CallbackMetric(
+    "northstar_serpapi_credits_remaining", "SerpApi credits left today (-1 when unlimited).", (),
+    lambda: {(): _or_unlimited(get_budget().remaining())},
+))
+
+@app.get("/api/v1/search/budget")
+async def search_budget_stats():
+    """SerpApi credits spent and left today, per instance and for the heaviest users"""
+    return get_budget().stats()
+
+@app.get("/api/v1/search")
+async def search_jobs(
+    query: str = "", 
+    location: str = "Minnesota", 
+    date_filter: str = "week",  # today, 3days, week, month
+    work_type: str = "any",  # remote, hybrid, onsite, any
+    radius: str = "50",  # miles from location
+    exp_level: str = "any", # entry, mid, senior, any
+    job_type: str = "any",  # Full-time, Part-time, Contractor, ... (matched against jobType), any
+    source: str = "live",  # live, local (index only), hybrid (index + live)
+    limit: Optional[int] = Query(None, ge=1, le=SEARCH_MAX_PAGE_SIZE),  # page size; starts a cursor-paginated search
+    cursor: Optional[str] = None,  # continue a paginated search (other params are ignored)
+    request: Request = None,
+):
+    _bill_credits_to(request)
+    if (limit is not None or cursor) and SearchFilters(job_type=job_type).job_type:
+        # Cursor pages are served in SerpApi's order as they are fetched, with no local filtering
+        raise HTTPException(status_code=400, detail="job_type is not supported with limit or cursor")
+    if cursor:
+        return FastJSONResponse(await _continue_cursor_search(cursor, limit))
+
+    # Safe query params
+    q = query.strip() if query.strip() else "Software"
+    loc = location.strip() if location.strip() else "Minnesota"
+
+    if source == "local":
+        return FastJSONResponse(SearchFilters(date_filter, work_type, exp_level, job_type).apply(await _search_local(q, loc)))
+
+    # SerpApi Google Jobs API
+    serpapi_key = os.environ.get("SERPAPI_KEY")
+    
+    if not serpapi_key:
+        return {"error": "SERPAPI_KEY not configured on server"}
+    
+    if limit is not None:
+        # Cursor pages are cut from SerpApi's own ordering, so these keep the filters in the query
+        base_params, cache_key = _build_search_params(q, loc, date_filter, work_type, radius, exp_level, serpapi_key)
+        return FastJSONResponse(await _start_cursor_search(cache_key, base_params, loc, limit))
+    plan = _plan_search(q, loc, date_filter, work_type, radius, exp_level, job_type, serpapi_key)
+    live_search = _live_search(plan.cache_key, plan.base_params, q, loc, plan.fresh_window)
+    if source == "hybrid":
+        local_result, live_result = await asyncio.gather(_search_local(q, loc), live_search)
+        return FastJSONResponse(_apply_plan(plan, loc, _merge_search_results(local_result, live_result)))
+    return FastJSONResponse(_apply_plan(plan, loc, await live_search))
+
+def _merge_search_results(local_result: Dict[str, Any], live_result: Dict[str, Any]) -> Dict[str, Any]:
+    # Live records win over indexed copies of the same job
+    merged = {job.id: job for job in local_result.get("data", [])}
+    merged.update((job.id, job) for job in live_result.get("data", []))
+    final_jobs = sorted(merged.values(), key=attrgetter("freshnessScore"))[:50]
+    result = {
+        "data": final_jobs,
+        "total": len(final_jobs),
+        "pages_fetched": live_result.get("pages_fetched", 0),
+        "exhausted": live_result.get("exhausted", True),
+        "source": "hybrid",
+        "localHits": len(local_result.get("data", [])),
+    }
+    if not final_jobs and "error" in live_result:
+        result["error"] = live_result["error"]
+    return result
+
+def _coalesced_fetch(cache_key, base_params: Dict[str, Any], loc: str, fresh_window: Optional[int] = None):
+    return search_flight.do(cache_key, lambda: _fetch_search_results(base_params, loc, fresh_window))
+
+def _refresh_search(cache_key, base_params: Dict[str, Any], loc: str, fresh_window: Optional[int] = None):
+    search_cache.refresh_in_background(
+        cache_key, lambda: _coalesced_fetch(cache_key, base_params, loc, fresh_window), should_cache=_is_cacheable_search
+    )
+
+# Proxies in front of the app that append the caller's address to X-Forwarded-For. On Vercel
+# every request arrives through its edge, which sets the header itself, so that hop is trusted
+TRUSTED_PROXY_HOPS = int(os.environ.get("TRUSTED_PROXY_HOPS", "1" if os.environ.get("VERCEL") else "0"))
+
+def _client_address(request: Request) -> Optional[str]:
+    """The caller's IP: the X-Forwarded-For entry the outermost trusted proxy added, else the socket peer"""
+    if TRUSTED_PROXY_HOPS > 0:
+        # Entries left of the trusted hops were written by the client and could be anything
+        hops = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+        if len(hops) >= TRUSTED_PROXY_HOPS:
+            return hops[-TRUSTED_PROXY_HOPS]
+        real_ip = request.headers.get("x-real-ip", "").strip()
+        if real_ip:
+            return real_ip
+    return request.client.host if request.client else None
+
+def _bill_credits_to(request: Optional[Request]):
+    """Charge SerpApi credits spent while handling this request to the client's address"""
+    # The address, not anything the request claims, so a client can't start itself a fresh budget
+    address = _client_address(request) if request is not None else None
+    if address:
+        current_user.set(address)
+
+async def _budget_fallback(q: str, loc: str) -> Dict[str, Any]:
+    """What a search returns instead of spending SerpApi credits the budget can't spare"""
+    get_budget().degraded += 1
+    result = await _search_local(q, loc)
+    result.setdefault("total", len(result["data"]))
+    result.setdefault("pages_fetched", 0)
+    result["degraded"] = "budget"
+    return result
+
+async def _live_search(
+    cache_key, base_params: Dict[str, Any], q: str, loc: str, fresh_window: Optional[int] = None
+) -> Dict[str, Any]:
+    cached, state = search_cache.lookup(cache_key)
+    if state == FRESH:
+        return cached
+
+    budget = get_budget()
+    if state == STALE:
+        # Serve the expired copy now and refresh it for the next caller, credits permitting
+        if not budget.is_low(current_user.get()):
+            _refresh_search(cache_key, base_params, loc, fresh_window)
+        return cached
+
+    if budget.is_low(current_user.get()):
+        # Nearly out of credits: jobs we indexed from earlier searches are good enough
+        fallback = await _budget_fallback(q, loc)
+        if fallback.get("data") or not budget.can_spend(current_user.get()):
+            return fallback
+
+    result = await _coalesced_fetch(cache_key, base_params, loc, fresh_window)
+    if _is_cacheable_search(result):
+        search_cache.set(cache_key, result)
+    return result
+
+def _cached_narrow_search(plan: SearchPlan, loc: str, filtered: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The filtered SerpApi query's cached result, when filtering the superset left too few jobs
+
+    Never waits for SerpApi: a missing or stale result is fetched in the
+    background, so filter toggles stay a cache lookup and the top-up shows
+    up from the next request on.
+    """
+    if (
+        plan.narrow_params is None
+        or len(filtered.get("data", [])) >= SEARCH_FILTER_MIN_RESULTS
+        or filtered.get("exhausted", True)
+    ):
+        return None
+    narrow, state = search_cache.lookup(plan.narrow_key)
+    if state != FRESH and not get_budget().is_low(current_user.get()):
+        _refresh_search(plan.narrow_key, plan.narrow_params, loc, plan.fresh_window)
+    if state == MISS:
+        return None
+    # SerpApi applied the rest of the filters itself
+    return SearchFilters(job_type=plan.filters.job_type or "any").apply(narrow)
+
+def _add_narrow_results(filtered: Dict[str, Any], narrow: Dict[str, Any]) -> Dict[str, Any]:
+    merged = {job.id: job for job in filtered.get("data", [])}
+    for job in narrow.get("data", []):
+        merged.setdefault(job.id, job)
+    final_jobs = sorted(merged.values(), key=attrgetter("freshnessScore"))[:50]
+    return dict(filtered, data=final_jobs, total=len(final_jobs), narrowHits=len(narrow.get("data", [])))
+
+def _apply_plan(plan: SearchPlan, loc: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """``result`` narrowed by the plan's filters, plus any cached top-up from the filtered SerpApi query"""
+    filtered = plan.filters.apply(result)
+    narrow = _cached_narrow_search(plan, loc, filtered)
+    return filtered if narrow is None else _add_narrow_results(filtered, narrow)
+
+# --- Paginated Job Search ---
+def _page_size(limit: Optional[int]) -> int:
+    # Out-of-range limits are rejected by the endpoint
+    return SEARCH_PAGE_SIZE if limit is None else limit
+
+async def _cursor_page(result_set: SearchResultSet, offset: int, limit: int) -> Dict[str, Any]:
+    # Only fetch another SerpApi page when this page runs past what we hold
+    new_jobs = await result_set.ensure(offset + limit)
+    if new_jobs:
+        _spawn(_index_jobs(new_jobs, result_set.loc))
+    return page_response(result_set, offset, limit)
+
+async def _start_cursor_search(cache_key, base_params: Dict[str, Any], loc: str, limit: int) -> Dict[str, Any]:
+    result_set = SearchResultSet.create(base_params, loc)
+    cached, state = search_cache.lookup(cache_key)
+    if state != MISS:
+        # Pick up where a cached full search left off instead of refetching page 1
+        result_set.seed(cached["data"], cached["pages_fetched"], cached["exhausted"])
+    search_result_sets.set(result_set.id, result_set, size=0)
+    return await _cursor_page(result_set, 0, _page_size(limit))
+
+async def _continue_cursor_search(cursor: str, limit: Optional[int]) -> Dict[str, Any]:
     try:
-        all_jobs = []
-        seen_ids = set()
-        
-        # Fetch up to 3 pages
-        for page in range(3):
-            params = base_params.copy()
-            if page > 0:
-                params["start"] = page * 10
-            
-            try:
-                response = requests.get(url, params=params, timeout=10)
-                # If a secondary page fails, we just return the results from the successful pages
-                if response.status_code != 200:
-                    print(f"SerpApi Page {page} failed with {response.status_code}: {response.text}")
-                    break
-                
-                data = response.json()
-                jobs_list = data.get("jobs_results", [])
-                if not jobs_list:
-                    break 
-            except Exception as e:
-                print(f"Error fetching SerpApi page {page}: {e}")
-                break
-            
-            for job in jobs_list:
-                job_id = job.get("job_id", "")
-                if job_id in seen_ids:
-                    continue  # Skip duplicates
-                seen_ids.add(job_id)
-                
-                extensions = job.get("detected_extensions", {})
-                
-                # Extract rich details
-                posted_at = extensions.get("posted_at", "Recently")
-                salary = extensions.get("salary", None)
-                schedule_type = extensions.get("schedule_type", None)
-                work_from_home = extensions.get("work_from_home", False)
-                job_type = None
-                
-                # Parse schedule to determine job type
-                if schedule_type:
-                    job_type = schedule_type
-                elif "Full-time" in str(job.get("extensions", [])):
-                    job_type = "Full-time"
-                elif "Part-time" in str(job.get("extensions", [])):
-                    job_type = "Part-time"
-                elif "Contract" in str(job.get("extensions", [])):
-                    job_type = "Contract"
-                
-                # Calculate posting freshness score (lower = more recent)
-                freshness_score = 100
-                posted_lower = posted_at.lower()
-                if "hour" in posted_lower:
-                    freshness_score = 1
-                elif "today" in posted_lower or "just" in posted_lower:
-                    freshness_score = 2
-                elif "1 day" in posted_lower or "yesterday" in posted_lower:
-                    freshness_score = 3
-                elif "2 day" in posted_lower:
-                    freshness_score = 4
-                elif "3 day" in posted_lower:
-                    freshness_score = 5
-                elif "day" in posted_lower:
-                    freshness_score = 10
-                elif "week" in posted_lower:
-                    freshness_score = 20
-                
-                # Get apply link
-                apply_options = job.get("apply_options", [])
-                apply_url = apply_options[0].get("link") if apply_options else job.get("share_link")
-                
-                # Get all apply sources
-                apply_sources = [opt.get("title", "Apply") for opt in apply_options[:3]] if apply_options else []
-                
-                # Build highlights from extensions
-                highlights = job.get("job_highlights", [])
-                qualifications = []
-                benefits = []
-                responsibilities = []
-                
-                for highlight in highlights:
-                    title = highlight.get("title", "").lower()
-                    items = highlight.get("items", [])
-                    if "qualif" in title or "require" in title:
-                        qualifications = items[:5]
-                    elif "benefit" in title:
-                        benefits = items[:5]
-                    elif "responsib" in title or "duties" in title:
-                        responsibilities = items[:3]
-                
-                all_jobs.append({
-                    "id": job.get("job_id", "N/A"),
-                    "title": job.get("title", "Unknown Role"),
-                    "company": job.get("company_name", "Unknown Company"),
-                    "location": job.get("location", loc),
-                    "postedDate": posted_at,
-                    "freshnessScore": freshness_score,
-                    "easyApply": len(apply_options) > 0,
-                    "description": job.get("description", "View details.")[:800],
-                    "url": apply_url,
-                    "logoUrl": job.get("thumbnail"),
-                    # Enhanced details
-                    "salary": salary,
-                    "jobType": job_type,
-                    "workFromHome": work_from_home,
-                    "applySources": apply_sources,
-                    "qualifications": qualifications,
-                    "benefits": benefits,
-                    "responsibilities": responsibilities,
-                    "via": job.get("via", "")
-                })
-        
-        # Sort by freshness (most recent first) and limit to 50
-        all_jobs.sort(key=lambda x: x["freshnessScore"])
-        final_jobs = all_jobs[:50]
-            
-        return {"data": final_jobs, "total": len(final_jobs), "pages_fetched": min(3, (len(all_jobs) // 10) + 1)}
-        
-    except Exception as e:
-        print(f"Error fetching jobs from SerpApi: {str(e)}")
-        return {"data": [], "error": str(e)}
+        set_id, offset = decode_cursor(cursor)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    result_set = search_result_sets.get(set_id)
+    if result_set is None:
+        raise HTTPException(status_code=410, detail="Cursor expired, start a new search")
+    return await _cursor_page(result_set, offset, _page_size(limit))
+
+# --- Streaming Job Search ---
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+def _stream_frame(event: str, data: Any, stream_format: str) -> bytes:
+    if stream_format == "sse":
+        return b"event: " + event.encode() + b"\ndata: " + fast_dumps(data) + b"\n\n"
+    return fast_dumps({"type": event, "data": data}) + b"\n"
 
+def _search_summary(result: Dict[str, Any]) -> Dict[str, Any]:
     return {
-        "connected": True,
-        "name": "Alex Application",
-        "headline": "Software Engineer | #OpenToWork",
-        "avatarUrl": "https://ui-avatars.com/api/?name=Alex+A&background=0077b5&color=fff",
-        "openToWork": True,
-        "profileUrl": "https://www.linkedin.com/in/"
+        "order": [job.id for job in result["data"]],
+        "total": result["total"],
+        "pages_fetched": result["pages_fetched"],
     }
 
+async def _stream_search(plan: SearchPlan, q: str, loc: str, stream_format: str) -> AsyncIterator[bytes]:
+    """Emit matching jobs page by page as SerpApi answers, then the freshness-sorted summary"""
+    cache_key, base_params, filters = plan.cache_key, plan.base_params, plan.filters
+    cached, state = search_cache.lookup(cache_key)
+    budget = get_budget()
+    if state != MISS:
+        if state == STALE and not budget.is_low(current_user.get()):
+            _refresh_search(cache_key, base_params, loc, plan.fresh_window)
+        filtered = filters.apply(cached)
+        for job in filtered["data"]:
+            yield _stream_frame("job", job, stream_format)
+        sent = {job.id for job in filtered["data"]}
+    else:
+        if budget.is_low(current_user.get()):
+            fallback = await _budget_fallback(q, loc)
+            if fallback.get("data") or not budget.can_spend(current_user.get()):
+                fallback = filters.apply(fallback)
+                for job in fallback["data"]:
+                    yield _stream_frame("job", job, stream_format)
+                yield _stream_frame("summary", _search_summary(fallback), stream_format)
+                return
+
+        all_jobs = []
+        sent = set()
+        pages = 0
+        last_page_full = False
+        try:
+            async for page_jobs, last_page_full in _iter_search_pages(base_params, loc, plan.fresh_window):
+                for job in page_jobs:
+                    if filters.matches(job):
+                        yield _stream_frame("job", job, stream_format)
+                        sent.add(job.id)
+                all_jobs.extend(page_jobs)
+                pages += 1
+        except Exception as e:
+            print(f"Error streaming jobs from SerpApi: {str(e)}")
+            yield _stream_frame("error", {"error": str(e)}, stream_format)
+            return
+
+        result = _finalize_search(all_jobs, loc, pages, not last_page_full)
+        if _is_cacheable_search(result):
+            search_cache.set(cache_key, result)
+        filtered = filters.apply(result)
+
+    narrow = _cached_narrow_search(plan, loc, filtered)
+    if narrow is not None:
+        for job in narrow["data"]:
+            if job.id not in sent:
+                yield _stream_frame("job", job, stream_format)
+        filtered = _add_narrow_results(filtered, narrow)
+    yield _stream_frame("summary", _search_summary(filtered), stream_format)
+
+@app.get("/api/v1/search/stream")
+async def search_jobs_stream(
+    query: str = "", 
+    location: str = "Minnesota", 
+    date_filter: str = "week",
+    work_type: str = "any",
+    radius: str = "50",
+    exp_level: str = "any",
+    job_type: str = "any",
+    stream_format: str = Query("ndjson", alias="format"),  # ndjson, sse
+    request: Request = None,
+):
+    """Same search as /api/v1/search, streamed as each SerpApi page arrives"""
+    _bill_credits_to(request)
+    serpapi_key = os.environ.get("SERPAPI_KEY")
+    
+    if not serpapi_key:
+        return {"error": "SERPAPI_KEY not configured on server"}
+    if stream_format not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+
+    q = query.strip() if query.strip() else "Software"
+    loc = location.strip() if location.strip() else "Minnesota"
+    plan = _plan_search(q, loc, date_filter, work_type, radius, exp_level, job_type, serpapi_key)
+
+    return StreamingResponse(
+        _stream_search(plan, q, loc, stream_format),
+        media_type=STREAM_MEDIA_TYPES[stream_format],
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# Optional write-behind: submissions are acknowledged from a local outbox and written to Firestore in batches
+APPLY_WRITE_BEHIND = os.environ.get("APPLY_WRITE_BEHIND", "").lower() in ("1", "true", "yes")
+APPLY_OUTBOX_PATH = os.environ.get("APPLY_OUTBOX_PATH", OUTBOX_DEFAULT_PATH)
+application_outbox: Optional[WriteBehindQueue] = None
+_outbox_lock = threading.Lock()
+
+
+def get_application_outbox(db) -> WriteBehindQueue:
+    """Create the outbox and its worker on first use, like the Firestore client itself."""
+    global application_outbox
+    if application_outbox is None:
+        with _outbox_lock:
+            if application_outbox is None:
+                outbox = WriteBehindQueue(
+                    db,
+                    path=APPLY_OUTBOX_PATH,
+                    batch_size=int(os.environ.get("APPLY_BATCH_SIZE", "200")),
+                    max_pending=int(os.environ.get("APPLY_MAX_PENDING", "10000")),
+                    timestamp_field="submittedAt",
+                )
+                outbox.start()
+                application_outbox = outbox
+    return application_outbox
 
-try:
-    if not firebase_admin._apps:
-        # Attempts to load default credentials (works on Vercel if env vars are set)
-        firebase_admin.initialize_app()
-    db = firestore.client()
-except Exception as e:
-    print(f"WARNING: Firebase Admin failed to initialize. Database features will be disabled.")
-    print(f"Reason: {e}")
-    print("Ensure GOOGLE_APPLICATION_CREDENTIALS is set or you are in a GCP environment.")
-    db = None
+
+@app.on_event("startup")
+def drain_leftover_submissions():
+    # Submissions accepted before a restart are flushed without waiting for the next one,
+    # in the background so the cold start doesn't pay for Firebase
+    if APPLY_WRITE_BEHIND and os.path.exists(APPLY_OUTBOX_PATH):
+        def drain():
+            db = get_db()
+            if db is not None:
+                get_application_outbox(db)
+        threading.Thread(target=drain, name="outbox-recovery", daemon=True).start()
 
 # --- Application Submission Endpoint ---
 class ApplicationRequest(BaseModel):
@@ -238,6 +654,8 @@ class ApplicationRequest(BaseModel):
 
 @app.post("/api/v1/apply")
 def submit_application(req: ApplicationRequest):
+    # Firebase is imported and initialized here, on the first submission, not at cold start
+    db = get_db()
     if not db:
         return {"success": False, "error": "Database not initialized on server."}
 
@@ -246,30 +664,58 @@ def submit_application(req: ApplicationRequest):
         if len(req.answers) < 3:
              return {"success": False, "error": "Incomplete application."}
 
-        # Write to Firestore (Securely)
-        doc_ref = db.collection("applications").add({
+        document = {
             "userId": req.userId,
             "jobId": req.jobId or "general",
             "answers": req.answers,
             "status": "received",
-            "submittedAt": firestore.SERVER_TIMESTAMP
-        })
+        }
+        if APPLY_WRITE_BEHIND:
+            # Durable locally now, in Firestore under the same id shortly
+            doc_id = get_application_outbox(db).enqueue("applications", document)
+            return {"success": True, "id": doc_id, "queued": True}
+
+        # Write to Firestore (Securely)
+        document["submittedAt"] = server_timestamp(db)
+        doc_ref = db.collection("applications").add(document)
         
         return {"success": True, "id": doc_ref[1].id}
+    except QueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many submissions are waiting to be saved. Please retry shortly.",
+            headers={"Retry-After": "2"},
+        )
     except Exception as e:
         print(f"Apply Error: {e}")
         return {"success": False, "error": str(e)}
 
 
+@app.get("/api/v1/apply/queue")
+def apply_queue_stats():
+    if application_outbox is None:
+        return {"enabled": APPLY_WRITE_BEHIND, "started": False}
+    return {"enabled": True, "started": True, **application_outbox.stats()}
+
+
 # --- Follow-Up Email Generation Endpoint ---
 class FollowUpRequest(BaseModel):
     jobTitle: str
     company: str
     jobDescription: str
     resumeText: Optional[str] = None
+    resumeHash: Optional[str] = None  # from /api/v1/parse-resume, used when resumeText is omitted
     contactName: Optional[str] = None
     contactEmail: Optional[str] = None
 
+# Parsed resumes keyed by the sha256 of the uploaded PDF
+resume_cache = ResumeCache(
+    os.environ.get("RESUME_CACHE_DIR", RESUME_CACHE_DEFAULT_DIR),
+    max_bytes=int(os.environ.get("RESUME_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    max_entries=int(os.environ.get("RESUME_CACHE_MAX_ENTRIES", "2000")),
+)
+metrics.register_cache("resume", lambda: (resume_cache.hits, resume_cache.misses))
+
 @app.post("/api/v1/parse-resume")
 async def parse_resume(file: UploadFile = File(...)):
     """Parse text from uploaded PDF resume"""
@@ -277,29 +723,61 @@ async def parse_resume(file: UploadFile = File(...)):
         raise HTTPException(status_code=400, detail="Only PDF files are supported")
     
     try:
-        content = await file.read()
-        pdf_file = io.BytesIO(content)
-        reader = PdfReader(pdf_file)
-        
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-            
-        return {"text": text.strip(), "filename": file.filename}
+        # Streamed to disk in chunks; oversized uploads are cut off early
+        spooled, resume_hash = await spool_upload(file)
+    except ResumeTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    try:
+        # The same PDF is uploaded again on apply, follow-up and profile edits
+        text = await run_in_threadpool(resume_cache.get, resume_hash)
+        if text is not None:
+            return {"text": text, "filename": file.filename, "hash": resume_hash, "cached": True}
+
+        # Parsing runs in a worker pool so one big resume can't stall the event loop
+        parse_started = time.perf_counter()
+        try:
+            text = await extract_text(spooled.name)
+        except Exception:
+            metrics.resume_parse_seconds.observe(time.perf_counter() - parse_started, "error")
+            raise
+        metrics.resume_parse_seconds.observe(time.perf_counter() - parse_started, "ok")
+        try:
+            await run_in_threadpool(resume_cache.put, resume_hash, text)
+        except OSError as e:
+            print(f"Resume cache write failed: {e}")
+        return {"text": text, "filename": file.filename, "hash": resume_hash, "cached": False}
+    except ResumeTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         print(f"Error parsing PDF: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to parse resume PDF")
+    finally:
+        discard(spooled)
 
-@app.post("/api/v1/generate-followup")
-def generate_followup(req: FollowUpRequest):
-    """Generate personalized follow-up email and LinkedIn message using LLM"""
-    groq_api_key = os.environ.get("GROQ_API_KEY")
-    
-    if not groq_api_key:
-        # Fallback to template-based response
-        contact = req.contactName or "Hiring Manager"
-        email_subject = f"Following Up - {req.jobTitle} Application at {req.company}"
-        email_body = f"""Dear {contact},
+# Concurrent identical prompts share one completion
+followup_flight = SingleFlight("generate-followup")
+FOLLOWUP_DEADLINE = float(os.environ.get("LLM_FOLLOWUP_DEADLINE", "15"))
+FOLLOWUP_SYSTEM_PROMPT = "You are a professional career coach helping job seekers write compelling follow-up messages. Always respond with valid JSON only."
+
+async def _llm_followup(provider: LLMProvider, prompt: str) -> Dict[str, Any]:
+    result = await complete_json(
+        provider,
+        [
+            {"role": "system", "content": FOLLOWUP_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        deadline=FOLLOWUP_DEADLINE,
+        max_tokens=1000,
+    )
+    result["ai_powered"] = True
+    return result
+
+def _template_followup(req: FollowUpRequest) -> Dict[str, Any]:
+    """Template-based response used when no LLM is configured"""
+    contact = req.contactName or "Hiring Manager"
+    email_subject = f"Following Up - {req.jobTitle} Application at {req.company}"
+    email_body = f"""Dear {contact},
 
 I hope this email finds you well. I recently applied for the {req.jobTitle} position at {req.company} and wanted to follow up on my application.
 
@@ -308,27 +786,45 @@ I am very excited about this opportunity and believe my skills and experience al
 Please let me know if you need any additional information from me. I look forward to hearing from you.
 
 Best regards"""
-        
-        linkedin_msg = f"""Hi {contact},
+    
+    linkedin_msg = f"""Hi {contact},
 
 I recently applied for the {req.jobTitle} role at {req.company} and wanted to connect. I'm very interested in this opportunity and would love to learn more about the team and role. Would you be open to a brief conversation?
 
 Thank you!"""
-        
-        return {
-            "email": {"subject": email_subject, "body": email_body},
-            "linkedinMessage": linkedin_msg,
-            "ai_powered": False
-        }
     
-    # Build prompt with context
+    return {
+        "email": {"subject": email_subject, "body": email_body},
+        "linkedinMessage": linkedin_msg,
+        "ai_powered": False
+    }
+
+def _error_followup(req: FollowUpRequest, error: Exception) -> Dict[str, Any]:
+    """Short fallback returned when the LLM call fails"""
+    contact = req.contactName or "Hiring Manager"
+    return {
+        "email": {
+            "subject": f"Following Up - {req.jobTitle} Application",
+            "body": f"Dear {contact},\n\nI wanted to follow up on my application for the {req.jobTitle} position at {req.company}. I remain very interested in this opportunity and would welcome the chance to discuss how I can contribute to your team.\n\nBest regards"
+        },
+        "linkedinMessage": f"Hi! I recently applied for the {req.jobTitle} role at {req.company} and wanted to connect. Would love to learn more about the opportunity!",
+        "ai_powered": False,
+        "error": str(error)
+    }
+
+async def _resolve_resume_text(resume_text: Optional[str], resume_hash: Optional[str]) -> Optional[str]:
+    if not resume_text and resume_hash and is_valid_hash(resume_hash):
+        return await run_in_threadpool(resume_cache.get, resume_hash)
+    return resume_text
+
+def _followup_prompt(req: FollowUpRequest, resume_text: Optional[str]) -> str:
     resume_context = ""
-    if req.resumeText and len(req.resumeText) > 50:
-        resume_context = f"\n\nCandidate's Resume/Background:\n{req.resumeText[:2000]}"
+    if resume_text and len(resume_text) > 50:
+        resume_context = f"\n\nCandidate's Resume/Background:\n{resume_text[:2000]}"
     
     contact = req.contactName or "the hiring team"
     
-    prompt = f"""Generate a professional follow-up email and LinkedIn message for a job application.
+    return f"""Generate a professional follow-up email and LinkedIn message for a job application.
 
 Job Details:
 - Position: {req.jobTitle}
@@ -355,100 +851,245 @@ Respond in this exact JSON format:
 
 Only output the JSON, nothing else."""
 
+async def _followup_for(req: FollowUpRequest, provider: Optional[LLMProvider], resume_text: Optional[str]) -> Dict[str, Any]:
+    """One follow-up with the same fallbacks as /api/v1/generate-followup"""
+    result = await _generate_followup(req, provider, resume_text)
+    metrics.record_ai_response("generate-followup", result)
+    return result
+
+async def _generate_followup(req: FollowUpRequest, provider: Optional[LLMProvider], resume_text: Optional[str]) -> Dict[str, Any]:
+    if provider is None:
+        return _template_followup(req)
+    prompt = _followup_prompt(req, resume_text)
     try:
-        response = requests.post(
-            "https://api.groq.com/openai/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {groq_api_key}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "llama-3.3-70b-versatile",
-                "messages": [
-                    {"role": "system", "content": "You are a professional career coach helping job seekers write compelling follow-up messages. Always respond with valid JSON only."},
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.7,
-                "max_tokens": 1000
-            },
-            timeout=15
-        )
-        
-        if response.ok:
-            data = response.json()
-            content = data["choices"][0]["message"]["content"]
-            
-            # Parse JSON from response
-            start = content.find("{")
-            end = content.rfind("}") + 1
-            if start >= 0 and end > start:
-                result = json.loads(content[start:end])
-                result["ai_powered"] = True
-                return result
-        
-        raise Exception("Failed to parse LLM response")
-        
+        prompt_key = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        result = await followup_flight.do(prompt_key, lambda: _llm_followup(provider, prompt))
+        # Waiters share one dict; hand each caller its own copy
+        return dict(result)
     except Exception as e:
         print(f"Follow-up generation error: {e}")
-        # Return fallback
-        contact = req.contactName or "Hiring Manager"
-        return {
-            "email": {
-                "subject": f"Following Up - {req.jobTitle} Application",
-                "body": f"Dear {contact},\n\nI wanted to follow up on my application for the {req.jobTitle} position at {req.company}. I remain very interested in this opportunity and would welcome the chance to discuss how I can contribute to your team.\n\nBest regards"
-            },
-            "linkedinMessage": f"Hi! I recently applied for the {req.jobTitle} role at {req.company} and wanted to connect. Would love to learn more about the opportunity!",
-            "ai_powered": False,
-            "error": str(e)
-        }
+        return _error_followup(req, e)
+
+async def _stream_followup(req: FollowUpRequest, provider: Optional[LLMProvider], resume_text: Optional[str]) -> AsyncIterator[bytes]:
+    """SSE: "token" frames as the model writes, then one "result" frame with the parsed reply or a fallback"""
+    if provider is None:
+        metrics.ai_responses.inc("generate-followup", "false")
+        yield _stream_frame("result", _template_followup(req), "sse")
+        return
+
+    messages = [
+        {"role": "system", "content": FOLLOWUP_SYSTEM_PROMPT},
+        {"role": "user", "content": _followup_prompt(req, resume_text)}
+    ]
+    content = []
+    try:
+        async for chunk in stream_completion(provider, messages, deadline=FOLLOWUP_DEADLINE, max_tokens=1000):
+            content.append(chunk)
+            yield _stream_frame("token", {"text": chunk}, "sse")
+        result = extract_json("".join(content))
+        if result is None:
+            raise LLMError(f"Failed to parse {provider.name} response")
+        result["ai_powered"] = True
+    except Exception as e:
+        print(f"Follow-up streaming error: {e}")
+        result = _error_followup(req, e)
+    metrics.record_ai_response("generate-followup", result)
+    yield _stream_frame("result", result, "sse")
+
+@app.post("/api/v1/generate-followup")
+async def generate_followup(req: FollowUpRequest, stream: bool = False):
+    """Generate personalized follow-up email and LinkedIn message using LLM"""
+    provider = get_provider()
+    resume_text = await _resolve_resume_text(req.resumeText, req.resumeHash) if provider is not None else None
+    if stream:
+        # Text shows up at time-to-first-token instead of after the whole completion
+        return StreamingResponse(
+            _stream_followup(req, provider, resume_text),
+            media_type=STREAM_MEDIA_TYPES["sse"],
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    return await _followup_for(req, provider, resume_text)
+
+# --- Batch Follow-Up Generation ---
+FOLLOWUP_BATCH_CONCURRENCY = int(os.environ.get("FOLLOWUP_BATCH_CONCURRENCY", "4"))
+FOLLOWUP_BATCH_MAX_ITEMS = int(os.environ.get("FOLLOWUP_BATCH_MAX_ITEMS", "50"))
+
+class FollowUpBatchRequest(BaseModel):
+    items: List[FollowUpRequest]
+    # Shared by every item that doesn't carry its own resume
+    resumeText: Optional[str] = None
+    resumeHash: Optional[str] = None
+
+async def _stream_followups(
+    batch: FollowUpBatchRequest, provider: Optional[LLMProvider], stream_format: str
+) -> AsyncIterator[bytes]:
+    """Emit each follow-up as soon as it is ready, tagged with its index in the batch"""
+    shared_resume = await _resolve_resume_text(batch.resumeText, batch.resumeHash) if provider is not None else None
+    limit = asyncio.Semaphore(max(1, FOLLOWUP_BATCH_CONCURRENCY))
+
+    async def run(index: int, item: FollowUpRequest) -> Tuple[int, Dict[str, Any]]:
+        async with limit:
+            resume_text = shared_resume
+            if provider is not None and (item.resumeText or item.resumeHash):
+                resume_text = await _resolve_resume_text(item.resumeText, item.resumeHash)
+            return index, await _followup_for(item, provider, resume_text)
+
+    tasks = [asyncio.ensure_future(run(index, item)) for index, item in enumerate(batch.items)]
+    ai_powered = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            index, result = await next_done
+            ai_powered += bool(result.get("ai_powered"))
+            yield _stream_frame("followup", {"index": index, **result}, stream_format)
+    finally:
+        # Client went away: don't keep generating for nobody
+        for task in tasks:
+            task.cancel()
+    yield _stream_frame("summary", {"total": len(tasks), "ai_powered": ai_powered}, stream_format)
+
+@app.post("/api/v1/generate-followup/batch")
+async def generate_followup_batch(
+    batch: FollowUpBatchRequest,
+    stream_format: str = Query("ndjson", alias="format")  # ndjson, sse
+):
+    """Follow-ups for many applications at once, streamed back as each finishes"""
+    if stream_format not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+    if len(batch.items) > FOLLOWUP_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {FOLLOWUP_BATCH_MAX_ITEMS} items per batch")
+
+    return StreamingResponse(
+        _stream_followups(batch, get_provider(), stream_format),
+        media_type=STREAM_MEDIA_TYPES[stream_format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # --- Contact Discovery Endpoint ---
+contact_flight = SingleFlight("find-contact")
+# Recruiters for a company rarely change within a day; empty searches are remembered for less
+contact_cache = ContactCache(
+    os.environ.get("CONTACT_CACHE_PATH", CONTACT_CACHE_DEFAULT_PATH),
+    ttl=float(os.environ.get("CONTACT_CACHE_TTL", "86400")),
+    negative_ttl=float(os.environ.get("CONTACT_NEGATIVE_TTL", "21600")),
+)
+metrics.register_cache("contact", lambda: (contact_cache.hits + contact_cache.negative_hits, contact_cache.misses))
+CONTACT_BATCH_CONCURRENCY = int(os.environ.get("CONTACT_BATCH_CONCURRENCY", "5"))
+CONTACT_BATCH_MAX_ITEMS = int(os.environ.get("CONTACT_BATCH_MAX_ITEMS", "50"))
+
+async def _search_contacts(company: str, job_title: str, serpapi_key: str) -> List[Dict[str, Any]]:
+    # Search for company recruiters/hiring managers
+    query = f"{company} recruiter OR hiring manager {job_title}"
+    get_budget().spend()
+    
+    response = await get_client().get(
+        SERPAPI_URL,
+        params={
+            "engine": "google",
+            "q": f"site:linkedin.com/in {query}",
+            "api_key": serpapi_key,
+            "num": 5
+        },
+        timeout=10
+    )
+    # A failed search must not be cached as "nobody found"
+    if not response.is_success:
+        raise Exception(f"SerpApi contact search failed with {response.status_code}")
+    
+    contacts = []
+    data = response.json()
+    results = data.get("organic_results", [])
+    
+    for result in results[:5]:
+        title = result.get("title", "")
+        link = result.get("link", "")
+        snippet = result.get("snippet", "")
+        
+        if "linkedin.com/in" in link:
+            contacts.append({
+                "name": title.split(" - ")[0] if " - " in title else title,
+                "title": snippet[:100],
+                "linkedinUrl": link
+            })
+    return contacts
+
+async def _fetch_and_cache_contacts(key: ContactKey, company: str, job_title: str, serpapi_key: str) -> List[Dict[str, Any]]:
+    contacts = await _search_contacts(company, job_title, serpapi_key)
+    await run_in_threadpool(contact_cache.put, key, contacts)
+    return contacts
+
+async def _lookup_contacts(
+    key: ContactKey, company: str, job_title: str, serpapi_key: str, cached: Dict[ContactKey, List[Dict[str, Any]]]
+) -> Dict[str, Any]:
+    if key in cached:
+        return {"contacts": list(cached[key]), "cached": True}
+    contacts = await contact_flight.do(key, lambda: _fetch_and_cache_contacts(key, company, job_title, serpapi_key))
+    return {"contacts": list(contacts), "cached": False}
+
 @app.get("/api/v1/find-contact")
-def find_contact(company: str, job_title: str = ""):
+async def find_contact(company: str, job_title: str = "", request: Request = None):
     """Search for hiring manager/recruiter contact info"""
+    _bill_credits_to(request)
     serpapi_key = os.environ.get("SERPAPI_KEY")
     
     if not serpapi_key:
         return {"contacts": [], "error": "SERPAPI_KEY not configured"}
     
     try:
-        # Search for company recruiters/hiring managers
-        query = f"{company} recruiter OR hiring manager {job_title}"
-        
-        response = requests.get(
-            "https://serpapi.com/search",
-            params={
-                "engine": "google",
-                "q": f"site:linkedin.com/in {query}",
-                "api_key": serpapi_key,
-                "num": 5
-            },
-            timeout=10
-        )
-        
-        contacts = []
-        if response.ok:
-            data = response.json()
-            results = data.get("organic_results", [])
-            
-            for result in results[:5]:
-                title = result.get("title", "")
-                link = result.get("link", "")
-                snippet = result.get("snippet", "")
-                
-                if "linkedin.com/in" in link:
-                    contacts.append({
-                        "name": title.split(" - ")[0] if " - " in title else title,
-                        "title": snippet[:100],
-                        "linkedinUrl": link
-                    })
-        
-        return {"contacts": contacts}
+        # "Target Corp" and "Target Corporation" share one entry
+        key = contact_key(company, job_title)
+        cached = await run_in_threadpool(contact_cache.get_many, [key])
+        return await _lookup_contacts(key, company, job_title, serpapi_key, cached)
         
     except Exception as e:
         print(f"Contact search error: {e}")
         return {"contacts": [], "error": str(e)}
+
+class ContactLookup(BaseModel):
+    company: str
+    job_title: str = ""
+
+class ContactBatchRequest(BaseModel):
+    items: List[ContactLookup]
+
+@app.post("/api/v1/find-contact/batch")
+async def find_contacts_batch(req: ContactBatchRequest, request: Request = None):
+    """Contacts for many companies at once; SerpApi is only searched for cache misses"""
+    _bill_credits_to(request)
+    serpapi_key = os.environ.get("SERPAPI_KEY")
+    if len(req.items) > CONTACT_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {CONTACT_BATCH_MAX_ITEMS} items per batch")
+
+    keys = [contact_key(item.company, item.job_title) for item in req.items]
+    cached = await run_in_threadpool(contact_cache.get_many, keys)
+    limit = asyncio.Semaphore(max(1, CONTACT_BATCH_CONCURRENCY))
+
+    async def resolve(item: ContactLookup, key: ContactKey) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"company": item.company, "job_title": item.job_title}
+        if key not in cached and not serpapi_key:
+            result.update({"contacts": [], "cached": False, "error": "SERPAPI_KEY not configured"})
+            return result
+        try:
+            if key in cached:
+                result.update(await _lookup_contacts(key, item.company, item.job_title, serpapi_key, cached))
+            else:
+                async with limit:
+                    result.update(await _lookup_contacts(key, item.company, item.job_title, serpapi_key, cached))
+        except Exception as e:
+            print(f"Contact search error for {item.company}: {e}")
+            result.update({"contacts": [], "cached": False, "error": str(e)})
+        return result
+
+    # Duplicate companies in one batch share a single search through contact_flight
+    results = await asyncio.gather(*[resolve(item, key) for item, key in zip(req.items, keys)])
+    return {"results": results, "cacheHits": sum(1 for key in keys if key in cached)}
+
+@app.get("/api/v1/find-contact/cache")
+async def contact_cache_stats():
+    """Hit/miss counters for the contact cache"""
+    return {"cache": contact_cache.stats(), "searches": contact_flight.stats()}
+
+
 class ChatRequest(BaseModel):
     message: str
     userName: str
@@ -475,7 +1116,7 @@ def ai_chat_assist(req: ChatRequest):
     return {"reply": response_text}
 
 
-# --- In-Memory Store Logic ---
+# --- Application Store ---
 class ApplicationModel(BaseModel):
     id: str
     firstName: str
@@ -488,55 +1129,50 @@ class ApplicationModel(BaseModel):
     week: str
     notifications: List[Dict[str, Any]] = []
     workLog: List[Dict[str, Any]] = []
+    # The embedded workLog is the newest entries only; the rest is paged from /api/v1/work-log
+    workLogTotal: int = 0
+    workLogCursor: Optional[str] = None
 
-class InMemoryStore:
-    def __init__(self):
-        self.applications = {}
-        # Seed
-        self.seed()
-
-    def seed(self):
-        self.applications['MN-2024-555'] = {
-            "id": 'MN-2024-555',
-            "firstName": 'John',
-            "lastName": 'Doe',
-            "submittedAt": "2024-12-22T10:00:00Z",
-            "status": 'Pending Review',
-            "step": 1,
-            "progress": 33,
-            "estimatedCompletion": '5-7 business days',
-            "week": 'Dec 15 - Dec 21',
-            "notifications": [
-                { "id": 1, "message": 'Application Received', "date": 'Dec 22, 2:30 PM', "type": 'success' },
-                { "id": 2, "message": 'Handbook Available', "date": 'Dec 22, 2:31 PM', "type": 'info' }
-            ],
-            "workLog": []
-        }
-
-    def get(self, app_id: str):
-        return self.applications.get(app_id)
-
-    def get_all(self):
-        return list(self.applications.values())
-
-    def update(self, app_id: str, updates: Dict):
-        if app_id in self.applications:
-            self.applications[app_id].update(updates)
-            return self.applications[app_id]
-        return None
-
-store = InMemoryStore()
+# Persistent by default so every worker sees the same applications (APP_STORE=memory for the old dict)
+store = create_store()
+ADMIN_PAGE_SIZE = 50
 
 # --- Ported Endpoints ---
 
 @app.get("/api/v1/status")
 def get_status():
     # Return seeded app for MVP dashboard consistency
-    return store.get('MN-2024-555')
+    return FastJSONResponse(store.get('MN-2024-555'))
 
 @app.get("/api/v1/admin")
-def get_admin_data():
-    return store.get_all()
+def get_admin_data(
+    status: Optional[str] = None,
+    step: Optional[int] = None,
+    submitted_from: Optional[str] = None,
+    submitted_to: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=APPLICATION_MAX_PAGE_SIZE),
+    fields: Optional[str] = None  # comma-separated, e.g. "id,firstName,lastName,status,step"
+):
+    listing_params = (status, step, submitted_from, submitted_to, cursor, limit, fields)
+    if all(param is None for param in listing_params):
+        # The dashboard's original call: every application as a bare array
+        return FastJSONResponse(store.get_all())
+
+    try:
+        query = ListQuery(
+            status=status,
+            step=step,
+            submitted_from=submitted_from,
+            submitted_to=submitted_to,
+            cursor=cursor,
+            limit=limit or ADMIN_PAGE_SIZE,
+            fields=[field.strip() for field in fields.split(",") if field.strip()] if fields else None,
+        )
+    except ValueError as e:
+        # Includes InvalidCursor
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse(store.list(query))
 
 class LogRequest(BaseModel):
     userId: str
@@ -549,43 +1185,57 @@ def add_work_log(req: LogRequest):
         return {"error": "User not found"}
     
     log_entry = {
-        "id": f"log-{int(time.time())}",
         "jobTitle": req.job.get('title'),
         "company": req.job.get('company'),
         "dateApplied": "Just now", # Simpler date handling
         "status": "Applied"
     }
     
-    current_log = app.get('workLog', [])
-    store.update(app['id'], {"workLog": [log_entry] + current_log})
+    # Appended on its own; the store assigns a unique, increasing id
+    log_entry = store.append_work_log(app['id'], log_entry)
     return {"success": True, "log": log_entry}
 
+@app.get("/api/v1/work-log")
+def get_work_log(userId: str, cursor: Optional[str] = None, limit: int = Query(20, ge=1, le=APPLICATION_MAX_PAGE_SIZE)):
+    """Work-log history newest first, one page at a time"""
+    # No seed fallback here: that would show another claimant's history
+    app = store.get(userId)
+    if not app:
+        raise HTTPException(status_code=404, detail="Application not found")
+    try:
+        return FastJSONResponse(store.work_log(app['id'], cursor=cursor, limit=limit))
+    except InvalidApplicationCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 class AdminAction(BaseModel):
     id: str
     action: str
 
 @app.patch("/api/v1/admin")
 def admin_action(req: AdminAction):
-    app = store.get(req.id)
-    if not app:
+    def transition(app):
+        # Re-run by the store if another write to this application wins the race
+        updates = {}
+        if req.action == 'approve':
+            next_step = min(app['step'] + 1, 3)
+            updates['step'] = next_step
+
+            notifications = list(app.get('notifications', []))
+            if next_step == 1:
+                updates.update({"status": "Under Review", "progress": 33})
+                notifications.append({"id": int(time.time()), "message": "Your application is being reviewed.", "type": "info"})
+            elif next_step == 2:
+                 updates.update({"status": "Determination Pending", "progress": 66})
+                 notifications.append({"id": int(time.time()), "message": "Determination pending.", "type": "info"})
+            elif next_step == 3:
+                 updates.update({"status": "Payment Issued", "progress": 100})
+                 notifications.append({"id": int(time.time()), "message": "Payment authorized.", "type": "success"})
+            updates['notifications'] = notifications
+        return updates
+
+    # Read, transition and write happen atomically per application
+    if store.modify(req.id, transition) is None:
         return {"error": "App not found"}
-        
-    updates = {}
-    if req.action == 'approve':
-        next_step = min(app['step'] + 1, 3)
-        updates['step'] = next_step
-        
-        if next_step == 1:
-            updates.update({"status": "Under Review", "progress": 33})
-            app['notifications'].append({"id": int(time.time()), "message": "Your application is being reviewed.", "type": "info"})
-        elif next_step == 2:
-             updates.update({"status": "Determination Pending", "progress": 66})
-             app['notifications'].append({"id": int(time.time()), "message": "Determination pending.", "type": "info"})
-        elif next_step == 3:
-             updates.update({"status": "Payment Issued", "progress": 100})
-             app['notifications'].append({"id": int(time.time()), "message": "Payment authorized.", "type": "success"})
-        
-    store.update(req.id, updates)
     return store.get(req.id)
 
 
@@ -627,8 +1277,59 @@ JOB_CAREER_MAP = {
     "construction": ["Construction Worker", "Carpenter", "Plumber", "Welder", "General Laborer", "Superintendent"],
 }
 
+CAREER_ALTERNATIVE_RULES = [
+    (["tech", "software", "developer", "engineer"], ["Product Manager", "Data Analyst", "UX Designer", "Technical Writer", "IT Support"]),
+    (["nurse", "medical", "health"], ["Medical Assistant", "Health Coach", "Pharmacy Tech", "Medical Coder", "Healthcare Admin"]),
+    (["sales", "marketing"], ["Customer Success", "Account Manager", "Business Development", "Event Coordinator"]),
+    (["admin", "office"], ["Project Coordinator", "HR Assistant", "Bookkeeper", "Office Manager"]),
+]
+DEFAULT_CAREER_ALTERNATIVES = ["Project Manager", "Customer Service", "Data Entry", "Sales Associate"]
+
+# Built once at startup; JOB_TITLES_PATH adds a larger occupation taxonomy (.json or .txt)
+_job_titles_path = os.environ.get("JOB_TITLES_PATH")
+title_index = TitleIndex.from_file(_job_titles_path, JOB_CAREER_MAP) if _job_titles_path else TitleIndex(JOB_CAREER_MAP)
+career_alternatives = AlternativesMatcher(CAREER_ALTERNATIVE_RULES, DEFAULT_CAREER_ALTERNATIVES)
+
+# Type-ahead answers; the stats endpoint reports how many LLM calls this saves
+suggest_cache = SuggestionCache(
+    ttl=float(os.environ.get("SUGGEST_CACHE_TTL", "3600")),
+    stale_ttl=float(os.environ.get("SUGGEST_CACHE_STALE_TTL", "86400")),
+    negative_ttl=float(os.environ.get("SUGGEST_NEGATIVE_TTL", "60")),
+    max_entries=int(os.environ.get("SUGGEST_CACHE_MAX_ENTRIES", "2048")),
+)
+
+def _suggest_cache_counts() -> Tuple[int, int]:
+    # Prefix and negative hits answer without waiting for the model, so they count as hits
+    misses = suggest_cache.cache.misses - suggest_cache.prefix_hits - suggest_cache.negative_hits
+    return suggest_cache.requests - misses, misses
+
+metrics.register_cache("suggest", _suggest_cache_counts)
+
+SUGGEST_DEADLINE = float(os.environ.get("LLM_SUGGEST_DEADLINE", "5"))
+SUGGEST_SYSTEM_PROMPT = "You are a career advisor. Given a job title or skill, suggest related job titles. Respond ONLY with a JSON object in this exact format: {\"suggestions\": [\"Job 1\", \"Job 2\", ...], \"related\": [\"Related 1\", \"Related 2\", ...], \"alternatives\": [\"Alt 1\", \"Alt 2\", ...], \"tip\": \"Helpful tip\"}. Suggestions are direct matches, related are similar roles, alternatives are career pivots. Each array should have 5 items max."
+
+async def _llm_suggest(provider: LLMProvider, q: str) -> Dict[str, Any]:
+    result = await complete_json(
+        provider,
+        [
+            {"role": "system", "content": SUGGEST_SYSTEM_PROMPT},
+            {"role": "user", "content": f"Suggest job titles for someone searching for: {q}"}
+        ],
+        deadline=SUGGEST_DEADLINE,
+        max_tokens=500,
+        # Autocomplete can't wait out long backoffs; one quick retry at most
+        retries=1,
+    )
+    result["ai_powered"] = True
+    return result
+
+@app.get("/api/v1/suggest-jobs/cache")
+async def suggest_cache_stats():
+    """Hit ratios and LLM calls saved by the suggestion cache"""
+    return suggest_cache.stats()
+
 @app.get("/api/v1/suggest-jobs")
-def suggest_jobs(query: str = ""):
+async def suggest_jobs(query: str = ""):
     """Returns AI-powered job title suggestions using Groq LLM"""
     q = query.strip()
     
@@ -640,82 +1341,27 @@ def suggest_jobs(query: str = ""):
             "tip": "Enter a job title or skill to get AI-powered suggestions"
         }
     
-    groq_api_key = os.environ.get("GROQ_API_KEY")
+    provider = get_provider()
     
-    # Try Groq LLM first
-    if groq_api_key:
+    # Try the LLM first
+    if provider is not None:
         try:
-            response = requests.post(
-                "https://api.groq.com/openai/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {groq_api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "llama-3.3-70b-versatile",
-                    "messages": [
-                        {
-                            "role": "system",
-                            "content": "You are a career advisor. Given a job title or skill, suggest related job titles. Respond ONLY with a JSON object in this exact format: {\"suggestions\": [\"Job 1\", \"Job 2\", ...], \"related\": [\"Related 1\", \"Related 2\", ...], \"alternatives\": [\"Alt 1\", \"Alt 2\", ...], \"tip\": \"Helpful tip\"}. Suggestions are direct matches, related are similar roles, alternatives are career pivots. Each array should have 5 items max."
-                        },
-                        {
-                            "role": "user",
-                            "content": f"Suggest job titles for someone searching for: {q}"
-                        }
-                    ],
-                    "temperature": 0.7,
-                    "max_tokens": 500
-                },
-                timeout=5
-            )
-            
-            if response.ok:
-                data = response.json()
-                content = data["choices"][0]["message"]["content"]
-                # Parse JSON from response
-                # Find JSON in response
-                start = content.find("{")
-                end = content.rfind("}") + 1
-                if start >= 0 and end > start:
-                    result = json.loads(content[start:end])
-                    result["ai_powered"] = True
-                    return result
+            # Keystrokes from many users converge on the same queries and prefixes
+            result, _ = await suggest_cache.get(q, lambda: _llm_suggest(provider, q))
+            if result is not None:
+                metrics.ai_responses.inc("suggest-jobs", "true")
+                return dict(result)
         except Exception as e:
-            print(f"Groq API error: {e}")
-    
-    # Fallback to career mapping
-    q_lower = q.lower()
-    suggestions = []
-    related = []
-    
-    for keyword, titles in JOB_CAREER_MAP.items():
-        if keyword in q_lower or q_lower in keyword:
-            suggestions.extend(titles)
-        elif any(q_lower in t.lower() for t in titles):
-            suggestions.extend([t for t in titles if q_lower in t.lower()])
-            related.extend([t for t in titles if q_lower not in t.lower()][:3])
-    
-    # Generate alternatives
-    career_alternatives = []
-    if any(k in q_lower for k in ["tech", "software", "developer", "engineer"]):
-        career_alternatives = ["Product Manager", "Data Analyst", "UX Designer", "Technical Writer", "IT Support"]
-    elif any(k in q_lower for k in ["nurse", "medical", "health"]):
-        career_alternatives = ["Medical Assistant", "Health Coach", "Pharmacy Tech", "Medical Coder", "Healthcare Admin"]
-    elif any(k in q_lower for k in ["sales", "marketing"]):
-        career_alternatives = ["Customer Success", "Account Manager", "Business Development", "Event Coordinator"]
-    elif any(k in q_lower for k in ["admin", "office"]):
-        career_alternatives = ["Project Coordinator", "HR Assistant", "Bookkeeper", "Office Manager"]
-    else:
-        career_alternatives = ["Project Manager", "Customer Service", "Data Entry", "Sales Associate"]
+            print(f"LLM suggestion error ({provider.name}): {e}")
     
-    # Dedupe
-    seen = set()
-    unique = [s for s in suggestions if not (s.lower() in seen or seen.add(s.lower()))]
+    # Fallback to the precomputed title index
+    suggestions, related = title_index.search(q, limit=8, related_limit=5)
+    metrics.ai_responses.inc("suggest-jobs", "false")
     
     return {
-        "suggestions": unique[:8],
-        "related": list(set(related))[:5],
-        "alternatives": career_alternatives[:5],
+        "suggestions": suggestions,
+        "related": related,
+        "alternatives": career_alternatives.match(q)[:5],
         "tip": f"Showing jobs related to '{q}'. Add GROQ_API_KEY for AI suggestions!",
         "ai_powered": False
     }
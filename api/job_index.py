@@ -0,0 +1,202 @@
+"""Local SQLite FTS5 index of normalized jobs seen in search results."""
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Iterable, List, Optional
+
+import fast_json
+from job_normalizer import UNKNOWN_AGE_HOURS, JobRecord
+
+DEFAULT_PATH = os.path.join(tempfile.gettempdir(), "northstar_jobs.db")
+# Jobs no search has returned for this long (seconds) are treated as expired
+DEFAULT_MAX_AGE = 14 * 24 * 3600
+# Expired rows are deleted on every PRUNE_EVERY-th upsert
+PRUNE_EVERY = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL DEFAULT '',
+    company TEXT NOT NULL DEFAULT '',
+    description TEXT NOT NULL DEFAULT '',
+    qualifications TEXT NOT NULL DEFAULT '',
+    location TEXT NOT NULL DEFAULT '',
+    search_location TEXT NOT NULL DEFAULT '',
+    freshness_score REAL NOT NULL,
+    payload TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_search_location ON jobs(search_location);
+CREATE INDEX IF NOT EXISTS jobs_last_seen ON jobs(last_seen);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+    title, company, description, qualifications, location,
+    content='jobs', content_rowid='rowid', tokenize='porter unicode61'
+);
+
+CREATE TRIGGER IF NOT EXISTS jobs_ai AFTER INSERT ON jobs BEGIN
+    INSERT INTO jobs_fts(rowid, title, company, description, qualifications, location)
+    VALUES (new.rowid, new.title, new.company, new.description, new.qualifications, new.location);
+END;
+CREATE TRIGGER IF NOT EXISTS jobs_ad AFTER DELETE ON jobs BEGIN
+    INSERT INTO jobs_fts(jobs_fts, rowid, title, company, description, qualifications, location)
+    VALUES ('delete', old.rowid, old.title, old.company, old.description, old.qualifications, old.location);
+END;
+CREATE TRIGGER IF NOT EXISTS jobs_au AFTER UPDATE OF title, company, description, qualifications, location ON jobs BEGIN
+    INSERT INTO jobs_fts(jobs_fts, rowid, title, company, description, qualifications, location)
+    VALUES ('delete', old.rowid, old.title, old.company, old.description, old.qualifications, old.location);
+    INSERT INTO jobs_fts(rowid, title, company, description, qualifications, location)
+    VALUES (new.rowid, new.title, new.company, new.description, new.qualifications, new.location);
+END;
+"""
+
+# Seen-again jobs only touch their bookkeeping columns; the text columns (and
+# with them the FTS rows) are rewritten separately and only when they changed.
+_UPSERT = """
+INSERT INTO jobs (job_id, title, company, description, qualifications, location,
+                  search_location, freshness_score, payload, first_seen, last_seen)
+VALUES (:job_id, :title, :company, :description, :qualifications, :location,
+        :search_location, :freshness_score, :payload, :now, :now)
+ON CONFLICT(job_id) DO UPDATE SET
+    search_location = excluded.search_location,
+    freshness_score = excluded.freshness_score,
+    payload = excluded.payload,
+    last_seen = excluded.last_seen
+"""
+
+_UPDATE_TEXT = """
+UPDATE jobs SET title = :title, company = :company, description = :description,
+                qualifications = :qualifications, location = :location
+WHERE job_id = :job_id
+  AND (title != :title OR company != :company OR description != :description
+       OR qualifications != :qualifications OR location != :location)
+"""
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_location(loc: str) -> str:
+    return " ".join(loc.lower().split())
+
+
+def build_match_query(query: str) -> str:
+    """Turn free text into an FTS5 query: every word must match, as a prefix."""
+    tokens = _TOKEN_RE.findall(query.lower())
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+class JobIndex:
+    """Persist normalized job records and answer text searches over them.
+
+    Each thread gets its own connection; the database runs in WAL mode so
+    the request threads can read while a search result batch is written.
+    Jobs not seen in a search for ``max_age`` seconds are left out of results
+    and deleted every ``prune_every`` upserts; a ``max_age`` of 0 keeps them.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, max_age: float = DEFAULT_MAX_AGE, prune_every: int = PRUNE_EVERY):
+        self.path = path
+        self.max_age = max_age
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._upserts = 0
+        self._upserts_lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(_SCHEMA)
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def upsert(self, jobs: Iterable[JobRecord], search_location: str = "", now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        rows = []
+        for job in jobs:
+            if not job.id or job.id == "N/A":
+                continue
+            rows.append({
+                "job_id": job.id,
+                "title": job.title or "",
+                "company": job.company or "",
+                "description": job.description or "",
+                "qualifications": "\n".join(job.qualifications or ()),
+                "location": job.location or "",
+                "search_location": normalize_location(search_location),
+                "freshness_score": UNKNOWN_AGE_HOURS if job.freshnessScore is None else job.freshnessScore,
+                "payload": fast_json.dumps(job).decode("utf-8"),
+                "now": now,
+            })
+        if not rows:
+            return 0
+
+        conn = self._conn()
+        with conn:
+            conn.executemany(_UPSERT, rows)
+            conn.executemany(_UPDATE_TEXT, rows)
+
+        with self._upserts_lock:
+            self._upserts += 1
+            due = self.max_age and self.prune_every and self._upserts % self.prune_every == 0
+        if due:
+            self.prune(now - self.max_age)
+        return len(rows)
+
+    def search(
+        self, query: str, location: str = "", limit: int = 50, now: Optional[float] = None
+    ) -> List[JobRecord]:
+        """Freshest matching jobs, best text match first among equally fresh ones.
+
+        ``freshnessScore`` is a posting age in hours as of ``last_seen``, so it
+        is aged by the time elapsed since then. Expired jobs are skipped even
+        before the next prune deletes them.
+        """
+        match = build_match_query(query)
+        if not match:
+            return []
+
+        now = time.time() if now is None else now
+        sql = """
+            SELECT j.payload, j.freshness_score + (? - j.last_seen) / 3600.0 AS age
+            FROM jobs_fts
+            JOIN jobs j ON j.rowid = jobs_fts.rowid
+            WHERE jobs_fts MATCH ?
+        """
+        params: List[Any] = [now, match]
+        if self.max_age:
+            sql += " AND j.last_seen >= ?"
+            params.append(now - self.max_age)
+        loc = normalize_location(location)
+        if loc:
+            sql += " AND (j.search_location = ? OR lower(j.location) LIKE ?)"
+            params.extend([loc, f"%{loc}%"])
+        sql += " ORDER BY age, bm25(jobs_fts) LIMIT ?"
+        params.append(limit)
+
+        results = []
+        for payload, age in self._conn().execute(sql, params):
+            job = JobRecord.from_dict(fast_json.loads(payload))
+            job.freshnessScore = round(age, 2)
+            results.append(job)
+        return results
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT count(*) FROM jobs").fetchone()[0]
+
+    def prune(self, older_than: float) -> int:
+        """Drop jobs not seen in a search since ``older_than`` (epoch seconds)."""
+        conn = self._conn()
+        with conn:
+            return conn.execute("DELETE FROM jobs WHERE last_seen < ?", (older_than,)).rowcount
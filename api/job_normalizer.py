@@ -0,0 +1,163 @@
+"""Turn raw SerpApi Google Jobs results into the job records served by /api/v1/search."""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+DESCRIPTION_LIMIT = 800
+
+# freshnessScore for postings whose age we can't read; sorts after a month-old post
+UNKNOWN_AGE_HOURS = 24.0 * 45
+
+_UNIT_HOURS = {
+    "minute": 1 / 60, "min": 1 / 60,
+    "hour": 1.0, "hr": 1.0,
+    "day": 24.0,
+    "week": 24.0 * 7,
+    "month": 24.0 * 30,
+    "year": 24.0 * 365,
+}
+_AGE_RE = re.compile(r"\b(\d+|an?|one)\+?\s*(minute|min|hour|hr|day|week|month|year)s?\b", re.IGNORECASE)
+_JUST_NOW_RE = re.compile(r"\b(just|today|now)\b", re.IGNORECASE)
+_YESTERDAY_RE = re.compile(r"\byesterday\b", re.IGNORECASE)
+
+_JOB_TYPES = ("Full-time", "Part-time", "Contract")
+
+
+@dataclass
+class JobRecord:
+    """One normalized job as served by /api/v1/search.
+
+    Attribute names match the JSON keys the frontend reads. The class is
+    slotted and list fields are tuples, which keeps thousands of cached
+    jobs per worker cheap; ``fast_json`` serializes it without a dict copy.
+    """
+
+    __slots__ = (
+        "id", "title", "company", "location", "postedDate", "freshnessScore", "easyApply",
+        "description", "url", "logoUrl", "salary", "jobType", "workFromHome", "applySources",
+        "qualifications", "benefits", "responsibilities", "via",
+    )
+
+    id: str
+    title: str
+    company: str
+    location: str
+    postedDate: Optional[str]
+    freshnessScore: float
+    easyApply: bool
+    description: str
+    url: Optional[str]
+    logoUrl: Optional[str]
+    # Enhanced details
+    salary: Optional[str]
+    jobType: Optional[str]
+    workFromHome: bool
+    applySources: Sequence[str]
+    qualifications: Sequence[str]
+    benefits: Sequence[str]
+    responsibilities: Sequence[str]
+    via: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "JobRecord":
+        return cls(**{name: data.get(name) for name in cls.__slots__})
+
+
+def parse_posted_age_hours(posted_at: Optional[str]) -> Optional[float]:
+    """Age of a posting in hours from SerpApi's "posted_at" text, e.g. "3 days ago".
+
+    Returns None when the text carries no age ("Recently", missing).
+    """
+    if not posted_at:
+        return None
+    match = _AGE_RE.search(posted_at)
+    if match:
+        amount, unit = match.groups()
+        count = int(amount) if amount.isdigit() else 1
+        return count * _UNIT_HOURS[unit.lower()]
+    if _JUST_NOW_RE.search(posted_at):
+        return 0.0
+    if _YESTERDAY_RE.search(posted_at):
+        return 24.0
+    return None
+
+
+# Postings repeat a small vocabulary of "N units ago" strings across every search
+@lru_cache(maxsize=1024)
+def freshness_score(posted_at: Optional[str]) -> float:
+    """Sort key for a posting: its age in hours, lower = more recent."""
+    age = parse_posted_age_hours(posted_at)
+    return UNKNOWN_AGE_HOURS if age is None else round(age, 2)
+
+
+def _job_type(schedule_type: Optional[str], extensions: Any) -> Optional[str]:
+    if schedule_type:
+        return schedule_type
+    # Fall back to the free-form extension strings when SerpApi detected no schedule
+    joined = " ".join(map(str, extensions)) if isinstance(extensions, list) else str(extensions or "")
+    for job_type in _JOB_TYPES:
+        if job_type in joined:
+            return job_type
+    return None
+
+
+def normalize_jobs(
+    raw_jobs: Iterable[Dict[str, Any]], default_location: str, seen_ids: Optional[Set[str]] = None
+) -> List[JobRecord]:
+    """Normalize one page of ``jobs_results`` in a single pass.
+
+    Jobs whose ``job_id`` is already in ``seen_ids`` are skipped; new ids are
+    added to it, so passing the same set across pages dedupes the whole search.
+    """
+    if seen_ids is None:
+        seen_ids = set()
+    records = []
+    append = records.append
+    # Runs for every job of every search: lookups are bound once per job and
+    # records are built positionally, in ``JobRecord.__slots__`` order
+    for job in raw_jobs:
+        get = job.get
+        job_id = get("job_id", "")
+        if job_id in seen_ids:
+            continue  # Skip duplicates
+        seen_ids.add(job_id)
+
+        extension = (get("detected_extensions") or {}).get
+        posted_at = extension("posted_at", "Recently")
+        apply_options = get("apply_options") or ()
+
+        qualifications = benefits = responsibilities = ()
+        for highlight in get("job_highlights") or ():
+            title = highlight.get("title", "").lower()
+            if "qualif" in title or "require" in title:
+                qualifications = tuple(highlight.get("items", ())[:5])
+            elif "benefit" in title:
+                benefits = tuple(highlight.get("items", ())[:5])
+            elif "responsib" in title or "duties" in title:
+                responsibilities = tuple(highlight.get("items", ())[:3])
+
+        append(JobRecord(
+            get("job_id", "N/A"),
+            get("title", "Unknown Role"),
+            get("company_name", "Unknown Company"),
+            get("location", default_location),
+            posted_at,
+            freshness_score(posted_at),
+            bool(apply_options),
+            get("description", "View details.")[:DESCRIPTION_LIMIT],
+            apply_options[0].get("link") if apply_options else get("share_link"),
+            get("thumbnail"),
+            extension("salary"),
+            _job_type(extension("schedule_type"), get("extensions")),
+            extension("work_from_home", False),
+            tuple([option.get("title", "Apply") for option in apply_options[:3]]),
+            qualifications,
+            benefits,
+            responsibilities,
+            get("via", ""),
+        ))
+    return records
@@ -0,0 +1,307 @@
+"""Async chat-completion backends for the AI endpoints.
+
+Every provider speaks the OpenAI chat-completions shape: Groq in the cloud,
+a local OpenAI-compatible server (Ollama, LocalAI, llama.cpp) for offline
+inference, or a deterministic in-process fake for benchmarks and local runs.
+Requests go through the shared pooled client in ``upstream``.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import httpx
+
+from metrics import llm_request_seconds
+from upstream import get_client
+
+GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+GROQ_MODEL = "llama-3.3-70b-versatile"
+# Ollama's OpenAI-compatible endpoint; LocalAI listens on :8080/v1
+LOCAL_BASE_URL = "http://localhost:11434/v1"
+LOCAL_MODEL = "llama3"
+
+MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "2"))
+RETRY_BASE_DELAY = 0.25
+RETRY_MAX_DELAY = 2.0
+
+Messages = List[Dict[str, str]]
+
+_override: Optional["LLMProvider"] = None
+
+
+class LLMError(Exception):
+    """The completion failed or its content could not be used."""
+
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class LLMProvider:
+    name = "base"
+
+    async def complete(self, messages: Messages, temperature: float, max_tokens: int, timeout: float) -> str:
+        """Return the assistant message content for one chat completion."""
+        raise NotImplementedError
+
+    async def stream(self, messages: Messages, temperature: float, max_tokens: int, timeout: float) -> AsyncIterator[str]:
+        """Yield the content as it is generated; providers without streaming yield it whole."""
+        yield await self.complete(messages, temperature, max_tokens, timeout)
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    def __init__(self, base_url: str, model: str, api_key: Optional[str] = None, name: str = "openai"):
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.model = model
+        self.api_key = api_key
+        self.name = name
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
+
+    async def complete(self, messages: Messages, temperature: float, max_tokens: int, timeout: float) -> str:
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            content = await self._complete(messages, temperature, max_tokens, timeout)
+            outcome = "ok"
+            return content
+        except LLMError as e:
+            outcome = "retryable" if e.retryable else "error"
+            raise
+        except asyncio.CancelledError:
+            # complete_json's deadline ran out mid-request
+            outcome = "cancelled"
+            raise
+        finally:
+            llm_request_seconds.observe(time.perf_counter() - start, self.name, "complete", outcome)
+
+    async def _complete(self, messages: Messages, temperature: float, max_tokens: int, timeout: float) -> str:
+        try:
+            response = await get_client().post(
+                self.url,
+                headers=self._headers(),
+                json={"model": self.model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens},
+                timeout=timeout,
+            )
+        except httpx.TransportError as e:
+            raise LLMError(f"{self.name} request failed: {e!r}", retryable=True)
+
+        if not response.is_success:
+            retryable = response.status_code == 429 or response.status_code >= 500
+            raise LLMError(f"{self.name} returned {response.status_code}", retryable=retryable)
+        try:
+            return response.json()["choices"][0]["message"]["content"]
+        except (ValueError, KeyError, IndexError, TypeError):
+            raise LLMError(f"{self.name} returned an unexpected response body")
+
+    async def stream(self, messages: Messages, temperature: float, max_tokens: int, timeout: float) -> AsyncIterator[str]:
+        start = time.perf_counter()
+        outcome = "cancelled"
+        try:
+            async for chunk in self._stream(messages, temperature, max_tokens, timeout):
+                yield chunk
+            outcome = "ok"
+        except LLMError as e:
+            outcome = "retryable" if e.retryable else "error"
+            raise
+        finally:
+            # Until the last chunk (or the failure), not the first token
+            llm_request_seconds.observe(time.perf_counter() - start, self.name, "stream", outcome)
+
+    async def _stream(self, messages: Messages, temperature: float, max_tokens: int, timeout: float) -> AsyncIterator[str]:
+        body = {"model": self.model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens, "stream": True}
+        try:
+            async with get_client().stream("POST", self.url, headers=self._headers(), json=body, timeout=timeout) as response:
+                if not response.is_success:
+                    retryable = response.status_code == 429 or response.status_code >= 500
+                    raise LLMError(f"{self.name} returned {response.status_code}", retryable=retryable)
+                # Server-sent events: "data: {chunk}" lines, ending with "data: [DONE]"
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        return
+                    try:
+                        delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                    except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+                        continue
+                    if delta:
+                        yield delta
+        except httpx.TransportError as e:
+            raise LLMError(f"{self.name} stream failed: {e!r}", retryable=True)
+
+
+class FakeProvider(LLMProvider):
+    """Deterministic offline provider.
+
+    ``responder`` maps the messages to the content to return; by default the
+    content is a stable JSON object derived from the prompt. ``latency``
+    simulates the model round trip without blocking the event loop.
+    """
+
+    name = "fake"
+
+    def __init__(self, responder: Optional[Callable[[Messages], str]] = None, latency: float = 0.0):
+        self.responder = responder or _echo_json
+        self.latency = latency
+        self.calls = 0
+
+    async def complete(self, messages: Messages, temperature: float, max_tokens: int, timeout: float) -> str:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(min(self.latency, timeout))
+            if self.latency > timeout:
+                raise LLMError("fake provider timed out", retryable=True)
+        return self.responder(messages)
+
+    async def stream(self, messages: Messages, temperature: float, max_tokens: int, timeout: float) -> AsyncIterator[str]:
+        content = await self.complete(messages, temperature, max_tokens, timeout)
+        # Small chunks, like a model emitting tokens
+        for start in range(0, len(content), 8):
+            yield content[start:start + 8]
+            await asyncio.sleep(0)
+
+
+def _echo_json(messages: Messages) -> str:
+    digest = hashlib.sha256(messages[-1]["content"].encode("utf-8")).hexdigest()[:12]
+    return json.dumps({"id": digest})
+
+
+def get_provider() -> Optional[LLMProvider]:
+    """Build the provider selected by the environment, or None if AI is not configured.
+
+    ``LLM_PROVIDER`` is one of ``groq`` (default when ``GROQ_API_KEY`` is
+    set), ``local`` or ``openai`` (any OpenAI-compatible server at
+    ``LLM_BASE_URL``), or ``fake``.
+    """
+    if _override is not None:
+        return _override
+
+    kind = os.environ.get("LLM_PROVIDER", "").lower()
+    groq_api_key = os.environ.get("GROQ_API_KEY")
+    if kind in ("", "groq"):
+        if not groq_api_key:
+            return None
+        return OpenAICompatibleProvider(GROQ_BASE_URL, os.environ.get("LLM_MODEL", GROQ_MODEL), groq_api_key, name="groq")
+    if kind in ("local", "openai", "ollama", "localai"):
+        return OpenAICompatibleProvider(
+            os.environ.get("LLM_BASE_URL", LOCAL_BASE_URL),
+            os.environ.get("LLM_MODEL", LOCAL_MODEL),
+            os.environ.get("LLM_API_KEY"),
+            name=kind,
+        )
+    if kind == "fake":
+        return FakeProvider()
+    print(f"Unknown LLM_PROVIDER {kind!r}; AI features are disabled")
+    return None
+
+
+def set_provider(provider: Optional[LLMProvider]):
+    """Force a provider regardless of the environment (benchmarks, local runs); None restores it."""
+    global _override
+    _override = provider
+
+
+def extract_json(content: str) -> Optional[Dict[str, Any]]:
+    """Parse the outermost JSON object in a model reply, ignoring any prose around it."""
+    start = content.find("{")
+    end = content.rfind("}") + 1
+    if start < 0 or end <= start:
+        return None
+    try:
+        result = json.loads(content[start:end])
+    except ValueError:
+        return None
+    return result if isinstance(result, dict) else None
+
+
+def _backoff(attempt: int) -> float:
+    # Full jitter keeps retries from many workers from arriving in lockstep
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)))
+
+
+async def complete_json(
+    provider: LLMProvider,
+    messages: Messages,
+    deadline: float,
+    temperature: float = 0.7,
+    max_tokens: int = 1000,
+    retries: int = MAX_RETRIES,
+) -> Dict[str, Any]:
+    """Run a completion and parse its JSON object, retrying transient failures.
+
+    ``deadline`` bounds the whole call in seconds, including retries and
+    backoff; each attempt gets whatever time is left.
+    """
+    expires_at = time.monotonic() + deadline
+    attempt = 0
+    while True:
+        remaining = expires_at - time.monotonic()
+        if remaining <= 0:
+            raise LLMError(f"{provider.name} deadline of {deadline}s exceeded")
+        try:
+            content = await asyncio.wait_for(provider.complete(messages, temperature, max_tokens, remaining), remaining)
+        except asyncio.TimeoutError:
+            raise LLMError(f"{provider.name} deadline of {deadline}s exceeded")
+        except LLMError as e:
+            delay = _backoff(attempt)
+            if not e.retryable or attempt >= retries or time.monotonic() + delay >= expires_at:
+                raise
+            attempt += 1
+            await asyncio.sleep(delay)
+            continue
+
+        result = extract_json(content)
+        if result is None:
+            raise LLMError(f"Failed to parse {provider.name} response")
+        return result
+
+
+async def stream_completion(
+    provider: LLMProvider,
+    messages: Messages,
+    deadline: float,
+    temperature: float = 0.7,
+    max_tokens: int = 1000,
+    retries: int = MAX_RETRIES,
+) -> AsyncIterator[str]:
+    """Yield content chunks as the model produces them, within ``deadline`` seconds overall.
+
+    Transient failures are retried only until the first chunk has been
+    yielded; after that the caller already holds partial output.
+    """
+    expires_at = time.monotonic() + deadline
+    attempt = 0
+    while True:
+        started = False
+        chunks = provider.stream(messages, temperature, max_tokens, max(0.0, expires_at - time.monotonic()))
+        try:
+            while True:
+                remaining = expires_at - time.monotonic()
+                if remaining <= 0:
+                    raise LLMError(f"{provider.name} deadline of {deadline}s exceeded")
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), remaining)
+                except StopAsyncIteration:
+                    return
+                except asyncio.TimeoutError:
+                    raise LLMError(f"{provider.name} deadline of {deadline}s exceeded")
+                started = True
+                yield chunk
+        except LLMError as e:
+            delay = _backoff(attempt)
+            if started or not e.retryable or attempt >= retries or time.monotonic() + delay >= expires_at:
+                raise
+            attempt += 1
+            await asyncio.sleep(delay)
+        finally:
+            await chunks.aclose()
@@ -0,0 +1,256 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Recording is lock-free: every thread writes to its own shard of each metric
+(the event loop is one thread, each threadpool worker another), and the
+shards are only summed when ``/api/v1/metrics`` is scraped. The only lock
+is taken the first time a thread records to a metric.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers cached responses (sub-millisecond) up to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Sharded:
+    """Per-thread ``{labels: series}`` dicts, merged at collection time."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str]):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[Dict[Labels, Any]] = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> Dict[Labels, Any]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def _snapshots(self) -> Iterator[Tuple[Labels, Any]]:
+        with self._shards_lock:
+            shards = list(self._shards)
+        for shard in shards:
+            # list() copies the items in one step, so a concurrent insert can't break iteration
+            yield from list(shard.items())
+
+
+class Counter(_Sharded):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def values(self) -> Dict[Labels, float]:
+        totals: Dict[Labels, float] = {}
+        for labels, value in self._snapshots():
+            totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in sorted(self.values().items())]
+
+
+class Histogram(_Sharded):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str):
+        shard = self._shard()
+        series = shard.get(labels)
+        if series is None:
+            # One count per bucket plus +Inf, then the running sum
+            series = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    @contextmanager
+    def time(self, *labels: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def values(self) -> Dict[Labels, List[float]]:
+        totals: Dict[Labels, List[float]] = {}
+        for labels, series in self._snapshots():
+            total = totals.setdefault(labels, [0] * len(series))
+            for i, value in enumerate(list(series)):
+                total[i] += value
+        return totals
+
+    def render(self) -> List[str]:
+        lines = []
+        for labels, series in sorted(self.values().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class CallbackMetric:
+    """A gauge or counter whose values are read from elsewhere (e.g. a cache's ``stats()``) at scrape time."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str], collect: Callable[[], Dict[Labels, float]], kind: str = "gauge"):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+        self.kind = kind
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in sorted(self.collect().items())]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                samples = metric.render()
+            except Exception as e:
+                # One broken callback shouldn't take the whole scrape down
+                print(f"Metric {metric.name} failed to collect: {e}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+http_request_seconds = REGISTRY.histogram(
+    "northstar_http_request_seconds", "Request latency by route, until the last body byte is sent.", ("method", "route"))
+http_requests = REGISTRY.counter(
+    "northstar_http_requests_total", "Requests by route and status code.", ("method", "route", "status"))
+serpapi_page_seconds = REGISTRY.histogram(
+    "northstar_serpapi_page_seconds", "SerpApi Google Jobs page fetches.", ("page", "outcome"))
+llm_request_seconds = REGISTRY.histogram(
+    "northstar_llm_request_seconds", "LLM completion requests (Groq or another OpenAI-compatible server).",
+    ("provider", "mode", "outcome"))
+ai_responses = REGISTRY.counter(
+    "northstar_ai_responses_total", "AI endpoint responses by whether the LLM produced them or a template fallback did.",
+    ("endpoint", "ai_powered"))
+resume_parse_seconds = REGISTRY.histogram(
+    "northstar_resume_parse_seconds", "PDF resume text extraction (cache misses only).", ("outcome",))
+
+
+def record_ai_response(endpoint: str, result: Dict[str, Any]):
+    ai_responses.inc(endpoint, "true" if result.get("ai_powered") else "false")
+
+
+_caches: Dict[str, Callable[[], Tuple[float, float]]] = {}
+
+
+def register_cache(name: str, stats: Callable[[], Tuple[float, float]]):
+    """Expose ``stats() -> (hits, misses)`` as northstar_cache_* series labelled ``cache=name``."""
+    _caches[name] = stats
+
+
+def _cache_counts(index: int) -> Callable[[], Dict[Labels, float]]:
+    return lambda: {(name,): stats()[index] for name, stats in _caches.items()}
+
+
+def _cache_ratios() -> Dict[Labels, float]:
+    ratios = {}
+    for name, stats in _caches.items():
+        hits, misses = stats()
+        ratios[(name,)] = round(hits / (hits + misses), 4) if hits + misses else 0.0
+    return ratios
+
+
+REGISTRY.register(CallbackMetric("northstar_cache_hits_total", "Cache lookups answered from the cache.", ("cache",), _cache_counts(0), "counter"))
+REGISTRY.register(CallbackMetric("northstar_cache_misses_total", "Cache lookups that went to the source.", ("cache",), _cache_counts(1), "counter"))
+REGISTRY.register(CallbackMetric("northstar_cache_hit_ratio", "Hits over lookups since the process started.", ("cache",), _cache_ratios))
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request by its route template.
+
+    Unmatched paths are reported as route "unmatched" so scanners can't blow up
+    the label set. Streaming responses are timed until their last chunk.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            http_request_seconds.observe(time.perf_counter() - start, method, path)
+            http_requests.inc(method, path, str(status[0]))
+
+
+def render() -> str:
+    return REGISTRY.render()
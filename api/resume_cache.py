@@ -0,0 +1,92 @@
+"""Content-addressed on-disk cache of extracted resume text."""
+import os
+import re
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+DEFAULT_DIR = os.path.join(tempfile.gettempdir(), "northstar_resume_cache")
+
+_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def is_valid_hash(value: str) -> bool:
+    return bool(value) and bool(_HASH_RE.match(value))
+
+
+class ResumeCache:
+    """Extracted text stored as ``<sha256>.txt`` files, bounded by size and count.
+
+    Recency lives in file mtimes (touched on every hit), so eviction is LRU
+    and the store can be shared by several workers on one host.
+    """
+
+    def __init__(self, directory: str = DEFAULT_DIR, max_bytes: int = 64 * 1024 * 1024, max_entries: int = 2000):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, f"{digest}.txt")
+
+    def get(self, digest: str) -> Optional[str]:
+        if not is_valid_hash(digest):
+            return None
+        path = self._path(digest)
+        try:
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return text
+
+    def put(self, digest: str, text: str):
+        if not is_valid_hash(digest):
+            raise ValueError("Resume hash must be a hex sha256 digest")
+        os.makedirs(self.directory, exist_ok=True)
+        # Write-then-rename so a concurrent reader never sees a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, self._path(digest))
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            total = 0
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.name.endswith(".txt"):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+            if total <= self.max_bytes and len(entries) <= self.max_entries:
+                return
+
+            entries.sort()
+            count = len(entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes and count <= self.max_entries:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                count -= 1
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
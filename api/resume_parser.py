@@ -0,0 +1,121 @@
+"""PDF resume text extraction off the event loop.
+
+Extraction runs in a bounded process pool; long documents are split into
+page ranges that are extracted in parallel. Where a process pool can't be
+created (e.g. serverless runtimes without /dev/shm) a thread pool is used.
+"""
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import IO, List, Optional, Tuple
+
+MAX_UPLOAD_BYTES = int(os.environ.get("RESUME_MAX_BYTES", str(10 * 1024 * 1024)))
+MAX_PAGES = int(os.environ.get("RESUME_MAX_PAGES", "30"))
+WORKERS = int(os.environ.get("RESUME_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Documents longer than this are split into ranges of this many pages
+PAGES_PER_TASK = 4
+CHUNK_SIZE = 64 * 1024
+
+_executor: Optional[Executor] = None
+
+
+class ResumeTooLarge(ValueError):
+    pass
+
+
+# pypdf is imported by the functions that parse, which mostly run in the worker
+# processes, so the API process doesn't load it until the first upload.
+
+
+def count_pages(path: str) -> int:
+    from pypdf import PdfReader
+
+    return len(PdfReader(path).pages)
+
+
+def extract_pages(path: str, start: int, stop: int) -> List[str]:
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    return [(reader.pages[i].extract_text() or "") for i in range(start, stop)]
+
+
+def get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        if WORKERS > 0:
+            try:
+                # spawn: forking a process that already runs an event loop and threads is unsafe
+                _executor = ProcessPoolExecutor(max_workers=WORKERS, mp_context=multiprocessing.get_context("spawn"))
+            except (OSError, NotImplementedError) as e:
+                print(f"Process pool unavailable for resume parsing, using threads: {e}")
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max(1, WORKERS), thread_name_prefix="resume-parse")
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+
+async def _run(fn, *args):
+    global _executor
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_executor(), fn, *args)
+    except BrokenProcessPool:
+        # A worker died (OOM on a hostile PDF, killed by the platform); start a fresh pool once
+        shutdown_executor()
+        return await loop.run_in_executor(get_executor(), fn, *args)
+
+
+async def spool_upload(upload, max_bytes: int = MAX_UPLOAD_BYTES) -> Tuple[IO[bytes], str]:
+    """Copy an UploadFile to a named temp file in chunks, enforcing ``max_bytes``.
+
+    Returns the file and the sha256 hex digest of its content. The file is
+    named so pool workers can open it themselves instead of being sent the
+    bytes. The caller owns (and must delete) the returned file.
+    """
+    spooled = tempfile.NamedTemporaryFile(prefix="resume-", suffix=".pdf", delete=False)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        while True:
+            chunk = await upload.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise ResumeTooLarge(f"Resume exceeds the {max_bytes / (1024 * 1024):.1f} MB upload limit")
+            spooled.write(chunk)
+            digest.update(chunk)
+        spooled.flush()
+        return spooled, digest.hexdigest()
+    except BaseException:
+        discard(spooled)
+        raise
+
+
+def discard(spooled: IO[bytes]):
+    spooled.close()
+    try:
+        os.unlink(spooled.name)
+    except OSError:
+        pass
+
+
+async def extract_text(path: str, max_pages: int = MAX_PAGES) -> str:
+    page_count = await _run(count_pages, path)
+    if page_count > max_pages:
+        raise ResumeTooLarge(f"Resume has {page_count} pages; the limit is {max_pages}")
+
+    ranges = [(start, min(start + PAGES_PER_TASK, page_count)) for start in range(0, page_count, PAGES_PER_TASK)]
+    chunks = await asyncio.gather(*[_run(extract_pages, path, start, stop) for start, stop in ranges])
+    return "\n".join(text for chunk in chunks for text in chunk).strip()
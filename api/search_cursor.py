@@ -0,0 +1,105 @@
+"""Server-held job search result sets behind opaque pagination cursors."""
+import asyncio
+import base64
+import binascii
+import secrets
+from operator import attrgetter
+from typing import Any, Dict, List, Set, Tuple
+
+from job_normalizer import JobRecord, normalize_jobs
+from upstream import SERPAPI_PAGE_SIZE, fetch_serpapi_page
+
+# Deepest SerpApi page a cursor will walk to (start=90)
+MAX_CURSOR_PAGES = 10
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class SearchResultSet:
+    """Jobs fetched so far for one search, grown one SerpApi page at a time.
+
+    Each fetched page is sorted by freshness before it is appended, so items
+    already handed out never move when later pages arrive.
+    """
+
+    def __init__(self, set_id: str, base_params: Dict[str, Any], loc: str):
+        self.id = set_id
+        self.base_params = base_params
+        self.loc = loc
+        self.jobs: List[JobRecord] = []
+        self.seen_ids: Set[str] = set()
+        self.pages_fetched = 0
+        self.exhausted = False
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def create(cls, base_params: Dict[str, Any], loc: str) -> "SearchResultSet":
+        return cls(secrets.token_urlsafe(12), base_params, loc)
+
+    def seed(self, jobs: List[JobRecord], pages_fetched: int, exhausted: bool):
+        """Start from an already fetched (e.g. cached) result instead of page 1.
+
+        ``exhausted`` is whether that fetch ended on a short page, i.e. SerpApi has nothing further.
+        """
+        self.jobs = list(jobs)
+        self.seen_ids = {job.id for job in jobs}
+        self.pages_fetched = pages_fetched
+        self.exhausted = exhausted or pages_fetched >= MAX_CURSOR_PAGES
+
+    async def ensure(self, count: int) -> List[JobRecord]:
+        """Fetch further SerpApi pages until ``count`` jobs are held or results run out.
+
+        Returns the jobs that were newly fetched.
+        """
+        new_jobs: List[JobRecord] = []
+        # One fetcher per result set; a concurrent caller waits and then sees its pages
+        async with self._lock:
+            while len(self.jobs) < count and not self.exhausted:
+                jobs_list = await fetch_serpapi_page(self.base_params, self.pages_fetched)
+                self.pages_fetched += 1
+                if not jobs_list:
+                    self.exhausted = True
+                    break
+                page_jobs = normalize_jobs(jobs_list, self.loc, self.seen_ids)
+                page_jobs.sort(key=attrgetter("freshnessScore"))
+                self.jobs.extend(page_jobs)
+                new_jobs.extend(page_jobs)
+                # A short page is SerpApi's last one
+                if len(jobs_list) < SERPAPI_PAGE_SIZE or self.pages_fetched >= MAX_CURSOR_PAGES:
+                    self.exhausted = True
+        return new_jobs
+
+    def has_more(self, offset: int) -> bool:
+        return offset < len(self.jobs) or not self.exhausted
+
+
+def encode_cursor(set_id: str, offset: int) -> str:
+    raw = f"{set_id}:{offset}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        set_id, offset = base64.urlsafe_b64decode(padded.encode("ascii")).decode("ascii").rsplit(":", 1)
+        offset = int(offset)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise InvalidCursor("Malformed cursor")
+    if not set_id or offset < 0:
+        raise InvalidCursor("Malformed cursor")
+    return set_id, offset
+
+
+def page_response(result_set: SearchResultSet, offset: int, limit: int) -> Dict[str, Any]:
+    items = result_set.jobs[offset:offset + limit]
+    next_offset = offset + len(items)
+    has_more = bool(items) and result_set.has_more(next_offset)
+    return {
+        "data": items,
+        "total": len(items),
+        "cursor": encode_cursor(result_set.id, next_offset) if has_more else None,
+        "has_more": has_more,
+        "pages_fetched": result_set.pages_fetched,
+    }
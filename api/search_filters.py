@@ -0,0 +1,129 @@
+"""Search filters evaluated over cached results instead of by SerpApi.
+
+/api/v1/search used to bake ``work_type``, ``date_filter`` and
+``exp_level`` into the SerpApi query and chips, so every toggle on the
+search page was a new, uncached search. Now one broader superset is
+fetched and cached per query, location and radius (a week wide, or a month
+for the month filter; see ``SUPERSET_DATE_FILTERS``), and ``SearchFilters``
+narrows it from the normalized job fields:
+
+- date: ``freshnessScore`` (posting age in hours) within the filter's window;
+  jobs whose age couldn't be parsed stay in the week and month windows
+- work type: ``workFromHome``; "hybrid" is a mention in the title, location
+  or description, as SerpApi's keyword match was
+- experience: years of experience stated in ``qualifications``, falling
+  back to the title's seniority when no years are stated
+- job type: ``jobType`` (Full-time, Part-time, Contract...), local only
+"""
+import re
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Optional, Sequence
+
+from job_normalizer import UNKNOWN_AGE_HOURS, JobRecord
+
+# Posting age (hours) each date filter keeps
+DATE_FILTER_HOURS = {
+    "today": 24,
+    "3days": 72,
+    "week": 168,
+    "month": 720,
+}
+# What is fetched from SerpApi for each date filter. The default "week" search
+# covers today and 3days too, so toggling between those is free; only "month"
+# pays for month-old postings
+SUPERSET_DATE_FILTERS = {
+    "today": "week",
+    "3days": "week",
+    "week": "week",
+    "month": "month",
+}
+# SerpApi's own chip returned postings whose age we can't parse ("freshnessScore"
+# of UNKNOWN_AGE_HOURS, or more once aged in the local index); the wider windows
+# keep them as it would, the narrow ones only want postings known to be recent
+KEEP_UNKNOWN_AGE = frozenset(("week", "month"))
+
+WORK_TYPES = ("remote", "hybrid", "onsite")
+EXPERIENCE_LEVELS = ("entry", "mid", "senior")
+
+# "3+ years", "2-4 years", "5 yrs"; the first number is the minimum
+_YEARS_RE = re.compile(r"\b(\d{1,2})\s*\+?\s*(?:(?:-|–|to)\s*\d{1,2}\s*\+?\s*)?(?:years?|yrs?)\b", re.IGNORECASE)
+_NO_EXPERIENCE_RE = re.compile(
+    r"\b(no (?:prior |previous )?experience|entry[- ]level|new grads?|will train|training provided)\b", re.IGNORECASE
+)
+_SENIOR_TITLE_RE = re.compile(r"\b(senior|sr\.?|lead|principal|staff|director|head|architect)\b", re.IGNORECASE)
+
+
+def _required_years(qualifications: Sequence[str]) -> Optional[int]:
+    """Fewest years of experience any qualification asks for, or None if none states it."""
+    years = None
+    for line in qualifications:
+        if "experience" not in line.lower():
+            continue
+        for match in _YEARS_RE.finditer(line):
+            value = int(match.group(1))
+            years = value if years is None else min(years, value)
+    return years
+
+
+# Cached result sets hand the same jobs to every toggle, so classify each one once
+@lru_cache(maxsize=8192)
+def experience_levels(title: str, qualifications: Sequence[str]) -> FrozenSet[str]:
+    """The ``exp_level`` values a job matches, mirroring SerpApi's requirement chips.
+
+    "entry" is no experience required, "mid" under three years (so it
+    includes entry) and "senior" three years or more. Jobs that state no
+    years count as every level below senior, unless the title is senior.
+    """
+    if _NO_EXPERIENCE_RE.search(" ".join(qualifications)):
+        return frozenset(("entry", "mid"))
+    years = _required_years(qualifications)
+    if years is None:
+        return frozenset(("senior",)) if _SENIOR_TITLE_RE.search(title) else frozenset(("entry", "mid"))
+    if years < 1:
+        return frozenset(("entry", "mid"))
+    return frozenset(("mid",)) if years < 3 else frozenset(("senior",))
+
+
+def _mentions_hybrid(job: JobRecord) -> bool:
+    return any("hybrid" in (text or "").lower() for text in (job.title, job.location, job.description))
+
+
+class SearchFilters:
+    """The narrowing filters of one search request; "any" (or an unknown value) doesn't filter."""
+
+    def __init__(self, date_filter: str = "any", work_type: str = "any", exp_level: str = "any", job_type: str = "any"):
+        self.max_age_hours = DATE_FILTER_HOURS.get(date_filter)
+        self.keep_unknown_age = date_filter in KEEP_UNKNOWN_AGE
+        self.work_type = work_type if work_type in WORK_TYPES else None
+        self.exp_level = exp_level if exp_level in EXPERIENCE_LEVELS else None
+        self.job_type = job_type.strip().lower() if job_type and job_type.strip().lower() != "any" else None
+        # SerpApi is asked for the widest window any date filter needs, or for any age without one
+        self.superset_date_filter = SUPERSET_DATE_FILTERS.get(date_filter, date_filter)
+
+    @property
+    def is_empty(self) -> bool:
+        return self.max_age_hours is None and not (self.work_type or self.exp_level or self.job_type)
+
+    def matches(self, job: JobRecord) -> bool:
+        # Cheapest checks first; most toggles are decided before experience is looked at
+        if self.max_age_hours is not None and job.freshnessScore > self.max_age_hours:
+            if not (self.keep_unknown_age and job.freshnessScore >= UNKNOWN_AGE_HOURS):
+                return False
+        if self.job_type and (job.jobType or "").lower() != self.job_type:
+            return False
+        if self.work_type == "remote" and not job.workFromHome:
+            return False
+        if self.work_type == "onsite" and job.workFromHome:
+            return False
+        if self.work_type == "hybrid" and not _mentions_hybrid(job):
+            return False
+        if self.exp_level and self.exp_level not in experience_levels(job.title, tuple(job.qualifications or ())):
+            return False
+        return True
+
+    def apply(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """A search result narrowed to the matching jobs; the cached ``result`` itself is left untouched."""
+        if self.is_empty or not result.get("data"):
+            return result
+        jobs = [job for job in result["data"] if self.matches(job)]
+        return dict(result, data=jobs, total=len(jobs), filtered_from=len(result["data"]))
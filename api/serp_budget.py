@@ -0,0 +1,157 @@
+"""Daily SerpApi credit budget, per instance and per user.
+
+Every SerpApi request (one Google Jobs page, one contact search) costs one
+credit. ``CreditBudget`` counts them per UTC day for this instance and for
+each client, refuses requests past either limit, and tells the search path
+how deep to page: further pages are fetched only while the previous page
+came back full and fewer than ``fresh_target`` jobs fell inside the
+freshness window, and not at all once the budget runs low.
+
+The client is taken from ``current_user``, which the endpoints set to the
+connecting address (never to anything the request itself claims), so the
+upstream helpers that actually spend credits don't need it threaded
+through. Budgets are per process; with several workers, divide the plan's
+daily credits between them.
+"""
+import os
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+# Everything three full Google Jobs pages can return, i.e. no early stop by default
+DEFAULT_FRESH_TARGET = 30
+# Clients whose spending is remembered; the least recently charged are forgotten first
+DEFAULT_MAX_USERS = 10_000
+
+current_user: ContextVar[str] = ContextVar("serpapi_user", default="anonymous")
+
+_budget: Optional["CreditBudget"] = None
+
+
+class BudgetExhausted(Exception):
+    """The daily SerpApi budget (instance or user) has no credits left for this request."""
+
+
+def _utc_day(now: float) -> str:
+    return time.strftime("%Y-%m-%d", time.gmtime(now))
+
+
+class CreditBudget:
+    """Credits spent today, and how many are left.
+
+    ``daily_budget`` and ``user_daily_budget`` of 0 mean unlimited (credits
+    are still counted). The budget is "low" once ``low_water`` of the
+    instance's daily credits or of the user's are left; searches then stop
+    after one page and prefer cached or indexed results. All calls happen
+    on the event loop, so no locking is needed.
+
+    At most ``max_users`` clients are tracked; past that, the one charged
+    least recently is dropped and starts the day afresh if it comes back.
+    """
+
+    def __init__(
+        self,
+        daily_budget: int = 0,
+        user_daily_budget: int = 0,
+        low_water: float = 0.1,
+        fresh_target: int = DEFAULT_FRESH_TARGET,
+        max_users: int = DEFAULT_MAX_USERS,
+        clock=time.time,
+    ):
+        self.daily_budget = daily_budget
+        self.user_daily_budget = user_daily_budget
+        self.low_water = low_water
+        self.fresh_target = fresh_target
+        self.max_users = max(1, max_users)
+        self.clock = clock
+        self.day = _utc_day(clock())
+        self.spent = 0
+        self.spent_by_user: "OrderedDict[str, int]" = OrderedDict()
+        self.refused = 0
+        self.degraded = 0
+        self.pages_skipped = 0
+
+    def _roll(self):
+        day = _utc_day(self.clock())
+        if day != self.day:
+            self.day = day
+            self.spent = 0
+            self.spent_by_user.clear()
+
+    def remaining(self, user: Optional[str] = None) -> Optional[int]:
+        """Credits left today for the instance, or for ``user`` if that is tighter; None if unlimited."""
+        self._roll()
+        left = []
+        if self.daily_budget:
+            left.append(self.daily_budget - self.spent)
+        if self.user_daily_budget and user is not None:
+            left.append(self.user_daily_budget - self.spent_by_user.get(user, 0))
+        return max(0, min(left)) if left else None
+
+    def can_spend(self, user: Optional[str] = None, credits: int = 1) -> bool:
+        remaining = self.remaining(user)
+        return remaining is None or remaining >= credits
+
+    def is_low(self, user: Optional[str] = None) -> bool:
+        self._roll()
+        if self.daily_budget and self.daily_budget - self.spent <= self.daily_budget * self.low_water:
+            return True
+        if self.user_daily_budget and user is not None:
+            return self.user_daily_budget - self.spent_by_user.get(user, 0) <= self.user_daily_budget * self.low_water
+        return False
+
+    def spend(self, user: Optional[str] = None, credits: int = 1):
+        """Charge ``credits`` to the instance and ``user``, or raise ``BudgetExhausted``."""
+        user = current_user.get() if user is None else user
+        if not self.can_spend(user, credits):
+            self.refused += 1
+            raise BudgetExhausted(f"SerpApi budget exhausted for today ({self.spent} credits spent)")
+        self.spent += credits
+        self.spent_by_user[user] = self.spent_by_user.pop(user, 0) + credits
+        if len(self.spent_by_user) > self.max_users:
+            self.spent_by_user.popitem(last=False)
+
+    def wants_next_page(self, page_full: bool, fresh_jobs: int, user: Optional[str] = None) -> bool:
+        """Whether a search whose last page was ``page_full``, with ``fresh_jobs`` fresh jobs so far, should page on."""
+        user = current_user.get() if user is None else user
+        more = page_full and fresh_jobs < self.fresh_target and not self.is_low(user)
+        if page_full and not more:
+            self.pages_skipped += 1
+        return more
+
+    def stats(self) -> Dict[str, Any]:
+        self._roll()
+        return {
+            "day": self.day,
+            "spent": self.spent,
+            "remaining": self.remaining(),
+            "dailyBudget": self.daily_budget,
+            "userDailyBudget": self.user_daily_budget,
+            "users": len(self.spent_by_user),
+            "topUsers": sorted(self.spent_by_user.items(), key=lambda item: item[1], reverse=True)[:10],
+            "refused": self.refused,
+            "degraded": self.degraded,
+            "pagesSkipped": self.pages_skipped,
+            "low": self.is_low(),
+        }
+
+
+def get_budget() -> CreditBudget:
+    """The process-wide budget, configured by SERPAPI_DAILY_BUDGET, SERPAPI_USER_DAILY_BUDGET,
+    SERPAPI_BUDGET_LOW_WATER and SEARCH_FRESH_TARGET."""
+    global _budget
+    if _budget is None:
+        _budget = CreditBudget(
+            daily_budget=int(os.environ.get("SERPAPI_DAILY_BUDGET", "0")),
+            user_daily_budget=int(os.environ.get("SERPAPI_USER_DAILY_BUDGET", "0")),
+            low_water=float(os.environ.get("SERPAPI_BUDGET_LOW_WATER", "0.1")),
+            fresh_target=int(os.environ.get("SEARCH_FRESH_TARGET", str(DEFAULT_FRESH_TARGET))),
+        )
+    return _budget
+
+
+def set_budget(budget: Optional[CreditBudget]):
+    """Replace the process-wide budget (benchmarks, local runs); None rebuilds it from the environment."""
+    global _budget
+    _budget = budget
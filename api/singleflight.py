@@ -0,0 +1,46 @@
+"""Coalesce concurrent identical upstream calls into one in-flight request."""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Run at most one call per key at a time; concurrent callers share its outcome.
+
+    The first caller for a key starts ``fn`` as its own task and later callers
+    await the same task, so every waiter sees the same result or exception.
+    The task is shielded, so a caller that disconnects does not cancel the
+    call for everyone else. Once the call finishes the key is released and
+    the next caller starts a fresh one (caching is a separate concern).
+    """
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self._calls: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._release(key, done))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"calls": self.calls, "coalesced": self.coalesced, "inFlight": len(self._calls)}
+
+    def _release(self, key: Hashable, done: "asyncio.Future[Any]"):
+        if self._calls.get(key) is done:
+            del self._calls[key]
+        # Mark the exception as retrieved even if every waiter went away
+        if not done.cancelled():
+            done.exception()
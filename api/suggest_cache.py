@@ -0,0 +1,102 @@
+"""Memoized job-title suggestions for type-ahead queries."""
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from singleflight import SingleFlight
+from ttl_cache import MISS, STALE, TTLCache
+
+Suggestions = Dict[str, Any]
+
+# Where an answer came from, reported alongside the stats
+CACHED = "cached"
+PREFIX = "prefix"
+NEGATIVE = "negative"
+LLM = "llm"
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class SuggestionCache:
+    """Suggestions keyed on the normalized query.
+
+    Answers are cached for ``ttl`` seconds and then served stale while a
+    background call refreshes them. A query with no cached answer reuses the
+    answer for its longest cached prefix ("softw" for "software") and fetches
+    its own in the background, so typing one more letter never waits on the
+    model. Failed calls are remembered for ``negative_ttl`` seconds so callers
+    fall back immediately instead of retrying a failing provider per keystroke.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 3600,
+        stale_ttl: float = 86400,
+        negative_ttl: float = 60,
+        max_entries: int = 2048,
+        min_prefix: int = 3,
+    ):
+        self.cache = TTLCache(ttl, stale_ttl=stale_ttl, max_entries=max_entries, max_bytes=8 * 1024 * 1024)
+        self.failures = TTLCache(negative_ttl, max_entries=max_entries)
+        self.flight = SingleFlight("suggest-jobs")
+        self.min_prefix = min_prefix
+        self.requests = 0
+        self.prefix_hits = 0
+        self.negative_hits = 0
+
+    def _longest_prefix(self, key: str) -> Optional[Suggestions]:
+        for end in range(len(key) - 1, self.min_prefix - 1, -1):
+            value = self.cache.peek(key[:end])
+            if value is not None:
+                return value
+        return None
+
+    def _fetcher(self, key: str, fetch: Callable[[], Awaitable[Suggestions]]) -> Callable[[], Awaitable[Suggestions]]:
+        async def _fetch() -> Suggestions:
+            try:
+                return await self.flight.do(key, fetch)
+            except Exception:
+                self.failures.set(key, True, size=1)
+                raise
+        return _fetch
+
+    async def get(self, query: str, fetch: Callable[[], Awaitable[Suggestions]]) -> Tuple[Optional[Suggestions], str]:
+        """Return ``(suggestions, source)``; suggestions is None when the caller should fall back.
+
+        ``fetch`` asks the model for the full query. Exceptions from a
+        foreground fetch propagate after being negatively cached.
+        """
+        self.requests += 1
+        key = normalize_query(query)
+        value, state = self.cache.lookup(key)
+        if state != MISS:
+            if state == STALE:
+                self.cache.refresh_in_background(key, self._fetcher(key, fetch))
+            return value, CACHED
+
+        if self.failures.get(key) is not None:
+            self.negative_hits += 1
+            return None, NEGATIVE
+
+        fetch_key = self._fetcher(key, fetch)
+        value = self._longest_prefix(key)
+        if value is not None:
+            self.prefix_hits += 1
+            self.cache.refresh_in_background(key, fetch_key)
+            return value, PREFIX
+
+        value = await fetch_key()
+        self.cache.set(key, value)
+        return value, LLM
+
+    def stats(self) -> Dict[str, Any]:
+        llm_calls = self.flight.calls
+        return {
+            "requests": self.requests,
+            "cache": self.cache.stats(),
+            "prefixHits": self.prefix_hits,
+            "negativeEntries": len(self.failures),
+            "negativeHits": self.negative_hits,
+            "llmCalls": llm_calls,
+            "llmCallsSaved": max(0, self.requests - llm_calls),
+        }
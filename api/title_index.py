@@ -0,0 +1,275 @@
+"""Precomputed autocomplete index over job titles.
+
+Titles are tokenized once into an inverted index (token -> titles) and a
+prefix trie over those tokens whose nodes hold the best-ranked titles below
+them, so the partially typed last word of a query is answered with a walk
+of its length instead of a scan over the taxonomy. Titles belong to groups
+(the keywords of ``JOB_CAREER_MAP`` or an occupation family from a data
+file), which supply group matches and "related" titles. Queries that match
+no title word by prefix fall back to a substring match over whole titles,
+as the original scan did ("gineer" still finds "Software Engineer").
+"""
+import bisect
+import json
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# Titles kept per trie node; a prefix query ranks at most this many
+TOP_PER_NODE = 64
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class _TrieNode:
+    __slots__ = ("children", "top")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.top: List[int] = []
+
+
+class TitleIndex:
+    def __init__(self, groups: Dict[str, Sequence[str]]):
+        # Collect unique titles (first spelling wins) and group memberships
+        spellings: Dict[str, str] = {}
+        memberships: Dict[str, List[str]] = {}
+        for group, titles in groups.items():
+            key = " ".join(tokenize(group))
+            members = memberships.setdefault(key, []) if key else None
+            for title in titles:
+                title = title.strip()
+                lower = title.lower()
+                spellings.setdefault(lower, title)
+                # Ungrouped titles from a data file only join the index
+                if members is not None and lower not in members:
+                    members.append(lower)
+
+        # Title ids follow taxonomy order, which lists the most common title
+        # of each group first, so sorting ids sorts by rank
+        tokenized = {lower: tuple(tokenize(lower)) for lower in spellings}
+        ranked = list(spellings)
+
+        self.titles: List[str] = [spellings[lower] for lower in ranked]
+        self._tokens: List[Tuple[str, ...]] = [tokenized[lower] for lower in ranked]
+        self._normalized: List[str] = [" ".join(tokens) for tokens in self._tokens]
+        ids = {lower: title_id for title_id, lower in enumerate(ranked)}
+        self._ids_by_normalized: Dict[str, int] = {}
+        for title_id, normalized in enumerate(self._normalized):
+            self._ids_by_normalized.setdefault(normalized, title_id)
+
+        self.groups: Dict[str, List[int]] = {key: [ids[lower] for lower in members] for key, members in memberships.items() if key}
+        self._title_groups: List[List[str]] = [[] for _ in self.titles]
+        for key, members in self.groups.items():
+            for title_id in members:
+                self._title_groups[title_id].append(key)
+        self._group_keys = sorted(self.groups)
+
+        self._postings: Dict[str, Set[int]] = {}
+        for title_id, tokens in enumerate(self._tokens):
+            for token in tokens:
+                self._postings.setdefault(token, set()).add(title_id)
+        self._vocab = sorted(self._postings)
+        self._root = _TrieNode()
+        self._build_trie()
+
+        # Every title on one line, in rank order, for the substring fallback
+        self._text = "\n".join(self._normalized)
+        self._line_starts: List[int] = []
+        offset = 0
+        for normalized in self._normalized:
+            self._line_starts.append(offset)
+            offset += len(normalized) + 1
+
+    @classmethod
+    def from_file(cls, path: str, base: Optional[Dict[str, Sequence[str]]] = None) -> "TitleIndex":
+        groups = dict(base or {})
+        for group, titles in load_taxonomy(path).items():
+            groups[group] = list(groups.get(group, ())) + list(titles)
+        return cls(groups)
+
+    def __len__(self):
+        return len(self.titles)
+
+    def _build_trie(self):
+        for token, title_ids in self._postings.items():
+            node = self._root
+            for char in token:
+                node = node.children.setdefault(char, _TrieNode())
+            node.top = sorted(title_ids)[:TOP_PER_NODE]
+        # Post-order: a node's best titles are its own token's plus its children's
+        order = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(node.children.values())
+        for node in reversed(order):
+            if node.children:
+                merged = set(node.top)
+                for child in node.children.values():
+                    merged.update(child.top)
+                node.top = sorted(merged)[:TOP_PER_NODE]
+
+    def _prefix_top(self, prefix: str) -> List[int]:
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return node.top
+
+    def _prefix_tokens(self, prefix: str) -> List[str]:
+        start = bisect.bisect_left(self._vocab, prefix)
+        end = bisect.bisect_left(self._vocab, prefix + "\uffff", start)
+        return self._vocab[start:end]
+
+    def _candidates(self, complete: List[str], partial: str) -> List[int]:
+        """Up to TOP_PER_NODE matching title ids, best rank first."""
+        if not complete:
+            return self._prefix_top(partial)
+        postings = []
+        for token in complete:
+            title_ids = self._postings.get(token)
+            if not title_ids:
+                return []
+            postings.append(title_ids)
+        postings.sort(key=len)
+        matched = postings[0].intersection(*postings[1:])
+        if partial:
+            # Set operations run in C; one per vocabulary word the prefix expands to
+            base, matched = matched, set()
+            for token in self._prefix_tokens(partial):
+                matched |= base & self._postings[token]
+        return sorted(matched)[:TOP_PER_NODE]
+
+    def _substring_matches(self, normalized: str, limit: int, exclude: Set[int]) -> List[int]:
+        """Titles containing ``normalized`` anywhere, best rank first; one C-level find per hit."""
+        matches: List[int] = []
+        position = self._text.find(normalized)
+        while position != -1 and len(matches) < limit:
+            title_id = bisect.bisect_right(self._line_starts, position) - 1
+            if title_id not in exclude:
+                matches.append(title_id)
+                exclude.add(title_id)
+            # Continue after this title's line; one hit per title is enough
+            next_line = self._line_starts[title_id + 1] if title_id + 1 < len(self._line_starts) else len(self._text)
+            position = self._text.find(normalized, next_line)
+        return matches
+
+    def _matching_groups(self, complete: List[str], partial: str) -> List[str]:
+        query = " ".join(complete + ([partial] if partial else []))
+        matched = [key for key in complete if key in self.groups]
+        if query in self.groups and query not in matched:
+            matched.append(query)
+        if partial:
+            # Group keywords the query is a prefix of, e.g. "elec" -> "electrician"
+            start = bisect.bisect_left(self._group_keys, query)
+            for key in self._group_keys[start:start + 8]:
+                if not key.startswith(query):
+                    break
+                if key not in matched:
+                    matched.append(key)
+        return matched
+
+    def search(self, query: str, limit: int = 8, related_limit: int = 5) -> Tuple[List[str], List[str]]:
+        """Return ``(suggestions, related)`` titles for a partially typed query.
+
+        Every query word must match a word of the title; the last word may be
+        a prefix unless the query ends in a space. Short of ``limit`` such
+        titles, titles containing the query anywhere follow. Titles from
+        groups whose keyword matches the query come after the direct matches.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return [], []
+        if query[-1:].isspace():
+            complete, partial = tokens, ""
+        else:
+            complete, partial = tokens[:-1], tokens[-1]
+        normalized = " ".join(tokens)
+
+        candidates = self._candidates(complete, partial)
+        # The exact title leads; the rest keep rank order
+        exact = self._ids_by_normalized.get(normalized)
+        direct = [exact] if exact is not None else []
+        seen: Set[int] = set(direct)
+        for title_id in candidates:
+            if len(direct) >= limit:
+                break
+            if title_id not in seen:
+                direct.append(title_id)
+                seen.add(title_id)
+        if len(direct) < limit:
+            direct.extend(self._substring_matches(normalized, limit - len(direct), seen))
+
+        suggestion_ids = list(direct)
+        for key in self._matching_groups(complete, partial):
+            for title_id in self.groups[key]:
+                if len(suggestion_ids) >= limit:
+                    break
+                if title_id not in seen:
+                    suggestion_ids.append(title_id)
+                    seen.add(title_id)
+
+        related: List[str] = []
+        for title_id in direct:
+            for key in self._title_groups[title_id]:
+                for other in self.groups[key]:
+                    if len(related) >= related_limit:
+                        break
+                    if other not in seen:
+                        related.append(self.titles[other])
+                        seen.add(other)
+        return [self.titles[i] for i in suggestion_ids], related
+
+
+class AlternativesMatcher:
+    """First matching rule's career pivots for a query, with one regex pass.
+
+    Rules keep their original priority: the earliest rule with any trigger
+    inside the query wins, wherever in the query the trigger appears.
+    """
+
+    def __init__(self, rules: Iterable[Tuple[Sequence[str], Sequence[str]]], default: Sequence[str]):
+        self.rules = [list(alternatives) for _, alternatives in rules]
+        self.default = list(default)
+        self._trigger_rule: Dict[str, int] = {}
+        for index, (triggers, _) in enumerate(rules):
+            for trigger in triggers:
+                self._trigger_rule.setdefault(trigger, index)
+        # Longest first so "healthcare" is not matched as "health"
+        triggers = sorted(self._trigger_rule, key=len, reverse=True)
+        self._pattern = re.compile("|".join(re.escape(t) for t in triggers)) if triggers else None
+
+    def match(self, query: str) -> List[str]:
+        if self._pattern is None:
+            return self.default
+        rules = [self._trigger_rule[found.group(0)] for found in self._pattern.finditer(query.lower())]
+        return self.rules[min(rules)] if rules else self.default
+
+
+def load_taxonomy(path: str) -> Dict[str, List[str]]:
+    """Read extra titles from a data file.
+
+    ``.json`` files map a group keyword to its titles, like ``JOB_CAREER_MAP``.
+    Other files hold one title per line, optionally as ``group<TAB>title``;
+    blank lines and ``#`` comments are skipped.
+    """
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return {str(group): [str(title) for title in titles] for group, titles in data.items()}
+
+    groups: Dict[str, List[str]] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            group, _, title = line.rpartition("\t")
+            groups.setdefault(group.strip(), []).append(title)
+    return groups
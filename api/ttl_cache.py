@@ -0,0 +1,163 @@
+"""Bounded in-process TTL + LRU cache with stale-while-revalidate."""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple
+
+import fast_json
+
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate the memory cost of a JSON-able value by its encoded length."""
+    try:
+        return len(fast_json.dumps(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+class _Entry:
+    __slots__ = ("value", "size", "expires_at", "stale_until")
+
+    def __init__(self, value: Any, size: int, expires_at: float, stale_until: float):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+
+
+class TTLCache:
+    """LRU cache bounded by entry count and approximate byte size.
+
+    Entries are fresh for ``ttl`` seconds and may then be served stale for a
+    further ``stale_ttl`` seconds while a background refresh replaces them.
+    The cache is meant to be used from a single event loop and does no locking.
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float = 0, max_entries: int = 256, max_bytes: int = 32 * 1024 * 1024):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._refreshing: Set[Hashable] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, key: Hashable) -> Tuple[Optional[Any], str]:
+        """Return ``(value, state)`` where state is FRESH, STALE or MISS."""
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is None or now >= entry.stale_until:
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None, MISS
+
+        self._entries.move_to_end(key)
+        if now < entry.expires_at:
+            self.hits += 1
+            return entry.value, FRESH
+        self.stale_hits += 1
+        return entry.value, STALE
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        value, state = self.lookup(key)
+        return value if state == FRESH else None
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Return a fresh or stale value without touching recency or the hit counters."""
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() >= entry.stale_until:
+            return None
+        return entry.value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, size: Optional[int] = None):
+        """Store ``value``; ``size`` overrides the JSON-length estimate for non-JSON values."""
+        size = estimate_size(value) if size is None else size
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+
+        now = time.monotonic()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        self._entries[key] = _Entry(value, size, expires_at, expires_at + self.stale_ttl)
+        self._bytes += size
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        if key in self._entries:
+            self._remove(key)
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def refresh_in_background(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        should_cache: Callable[[Any], bool] = lambda value: True,
+    ):
+        """Schedule ``fetch`` to replace ``key``, unless a refresh is already running."""
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def _refresh():
+            try:
+                value = await fetch()
+                if should_cache(value):
+                    self.set(key, value)
+                    self.refreshes += 1
+                else:
+                    self.refresh_errors += 1
+            except Exception as e:
+                self.refresh_errors += 1
+                print(f"Background cache refresh failed for {key}: {e}")
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.ensure_future(_refresh())
+        # Keep a reference so the task is not garbage collected mid-flight
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "maxEntries": self.max_entries,
+            "maxBytes": self.max_bytes,
+            "ttl": self.ttl,
+            "staleTtl": self.stale_ttl,
+            "hits": self.hits,
+            "staleHits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "refreshes": self.refreshes,
+            "refreshErrors": self.refresh_errors,
+            "hitRatio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
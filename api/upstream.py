@@ -0,0 +1,90 @@
+"""Shared async HTTP client for upstream APIs (SerpApi, Groq)."""
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from metrics import serpapi_page_seconds
+from serp_budget import BudgetExhausted, get_budget
+
+SERPAPI_URL = "https://serpapi.com/search"
+SERPAPI_PAGE_SIZE = 10
+SERPAPI_MAX_PAGES = 3
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the pooled client for the running event loop, creating it on first use."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    # Connections are bound to the loop that opened them, so a new loop
+    # (e.g. a test client or a reloaded worker) gets a fresh pool.
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(10.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        )
+        _client_loop = loop
+    return _client
+
+
+async def close_client():
+    global _client, _client_loop
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+
+
+async def fetch_serpapi_page(base_params: Dict[str, Any], page: int) -> Optional[List[Dict[str, Any]]]:
+    """Fetch one Google Jobs page. Returns None if the request failed or the credit budget is spent."""
+    params = base_params.copy()
+    if page > 0:
+        params["start"] = page * SERPAPI_PAGE_SIZE
+
+    try:
+        get_budget().spend()
+    except BudgetExhausted as e:
+        print(f"SerpApi page {page} skipped: {e}")
+        return None
+
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        response = await get_client().get(SERPAPI_URL, params=params)
+        if response.status_code != 200:
+            outcome = str(response.status_code)
+            print(f"SerpApi Page {page} failed with {response.status_code}: {response.text}")
+            return None
+        jobs = response.json().get("jobs_results", [])
+        outcome = "ok" if jobs else "empty"
+        return jobs
+    except Exception as e:
+        print(f"Error fetching SerpApi page {page}: {e}")
+        return None
+    finally:
+        serpapi_page_seconds.observe(time.perf_counter() - start, str(page), outcome)
+
+
+async def iter_job_pages(
+    base_params: Dict[str, Any], max_pages: int = SERPAPI_MAX_PAGES, first_page: int = 0
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Yield SerpApi result pages ``first_page`` up to ``max_pages`` in order while they are fetched concurrently.
+
+    Iteration stops at the first empty or failed page; later pages are
+    discarded even if they succeeded, matching the sequential behaviour.
+    """
+    tasks = [asyncio.ensure_future(fetch_serpapi_page(base_params, page)) for page in range(first_page, max_pages)]
+    try:
+        for task in tasks:
+            jobs_list = await task
+            if not jobs_list:
+                break
+            yield jobs_list
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
@@ -0,0 +1,450 @@
+"""Write-behind queue for Firestore documents.
+
+``/api/v1/apply`` can acknowledge a submission as soon as it is committed to
+a local SQLite outbox, with a document ID generated up front. A background
+thread drains the outbox to Firestore in batched writes. Each write is a
+``set`` on that pre-generated ID, so a batch that is retried after a partial
+failure or a crash can't create duplicates. ``FakeFirestore`` stands in for
+the ``firestore`` client in benchmarks and local runs.
+
+A failed batch is split in half and retried, down to single documents, so
+one document Firestore refuses doesn't hold back the rest of its batch.
+A document that keeps failing on its own while other writes go through is
+moved to the ``parked`` table instead of being retried forever.
+"""
+import datetime
+import os
+import random
+import secrets
+import sqlite3
+import string
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import fast_json
+
+DEFAULT_PATH = os.path.join(tempfile.gettempdir(), "northstar_outbox.db")
+
+# Firestore's limits: writes per batch, and roughly the size of one document
+MAX_BATCH_SIZE = 500
+MAX_DOCUMENT_BYTES = 1_000_000
+
+# Same shape as the IDs the Firestore client generates for add()
+_ID_ALPHABET = string.ascii_letters + string.digits
+_ID_LENGTH = 20
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    doc_id TEXT NOT NULL UNIQUE,
+    collection TEXT NOT NULL,
+    document TEXT NOT NULL,
+    enqueued_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox(next_attempt_at, seq);
+CREATE TABLE IF NOT EXISTS parked (
+    seq INTEGER PRIMARY KEY,
+    doc_id TEXT NOT NULL UNIQUE,
+    collection TEXT NOT NULL,
+    document TEXT NOT NULL,
+    enqueued_at REAL NOT NULL,
+    attempts INTEGER NOT NULL,
+    parked_at REAL NOT NULL,
+    last_error TEXT
+);
+"""
+# Added after the outbox first shipped; existing files get them on open
+_OUTBOX_COLUMNS = {
+    "failures": "INTEGER NOT NULL DEFAULT 0",
+    "last_attempt_at": "REAL NOT NULL DEFAULT 0",
+}
+
+_INSERT = "INSERT INTO outbox (doc_id, collection, document, enqueued_at, next_attempt_at) VALUES (?, ?, ?, ?, ?)"
+_SELECT_DUE = """
+SELECT seq, doc_id, collection, document, enqueued_at, attempts, failures, last_attempt_at FROM outbox
+WHERE next_attempt_at <= ? ORDER BY next_attempt_at, seq LIMIT ?
+"""
+_PARK = """
+INSERT OR REPLACE INTO parked (seq, doc_id, collection, document, enqueued_at, attempts, parked_at, last_error)
+SELECT seq, doc_id, collection, document, enqueued_at, ?, ?, ? FROM outbox WHERE seq = ?
+"""
+_REQUEUE = """
+INSERT OR IGNORE INTO outbox (doc_id, collection, document, enqueued_at, next_attempt_at)
+SELECT doc_id, collection, document, enqueued_at, ? FROM parked
+"""
+
+# (seq, doc_id, collection, document, enqueued_at, attempts, failures, last_attempt_at)
+Row = Tuple[int, str, str, str, float, int, int, float]
+
+
+class QueueFull(Exception):
+    """The outbox is at capacity; the caller should ask the client to retry later."""
+
+
+def new_document_id() -> str:
+    return "".join(secrets.choice(_ID_ALPHABET) for _ in range(_ID_LENGTH))
+
+
+class WriteBehindQueue:
+    """Durable outbox of Firestore writes, flushed in batches by a worker thread.
+
+    ``enqueue`` returns once the document is on disk (``synchronous=FULL``,
+    since an acknowledged submission must survive a power cut). When
+    ``max_pending`` documents are waiting it blocks for up to ``max_wait``
+    seconds for room, then raises ``QueueFull``. A failed batch is bisected
+    until the documents that fail on their own are found; each of those is
+    retried with capped exponential backoff on its own attempt count. Once
+    one has failed alone ``max_failures`` times, each time after some other
+    commit had succeeded, it is parked: kept in the ``parked`` table, counted
+    in ``stats()``, and put back with ``requeue_parked``. Failures while no
+    commit succeeds (Firestore being down) back off but never park. Claimed rows are
+    leased for ``lease`` seconds, so several workers can share one outbox
+    file; a worker that dies mid-batch just lets its lease expire.
+
+    ``timestamp_field``, if set, is filled with the time the document was
+    enqueued, which is when the client submitted it.
+    """
+
+    def __init__(
+        self,
+        client,
+        path: str = DEFAULT_PATH,
+        batch_size: int = 200,
+        flush_interval: float = 0.05,
+        max_pending: int = 10_000,
+        max_wait: float = 0.5,
+        lease: float = 30.0,
+        max_backoff: float = 60.0,
+        max_failures: int = 5,
+        timestamp_field: Optional[str] = None,
+    ):
+        self.client = client
+        self.path = path
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_wait = max_wait
+        self.lease = lease
+        self.max_backoff = max_backoff
+        self.max_failures = max(1, max_failures)
+        self.timestamp_field = timestamp_field
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._space = threading.Condition()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pending = self._count()
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+        self._last_success_at = 0.0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(_SCHEMA)
+                    columns = {row[1] for row in conn.execute("PRAGMA table_info(outbox)")}
+                    for name, definition in _OUTBOX_COLUMNS.items():
+                        if name not in columns:
+                            conn.execute(f"ALTER TABLE outbox ADD COLUMN {name} {definition}")
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def _count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def pending(self) -> int:
+        return self._pending
+
+    def enqueue(self, collection: str, document: Dict[str, Any], doc_id: Optional[str] = None) -> str:
+        """Durably queue ``document`` for ``collection`` and return its Firestore document ID."""
+        data = fast_json.dumps(document)
+        if len(data) > MAX_DOCUMENT_BYTES:
+            raise ValueError(f"Document is larger than Firestore's {MAX_DOCUMENT_BYTES} byte limit")
+
+        with self._space:
+            if self._pending >= self.max_pending:
+                self._wake.set()
+                if not self._space.wait_for(lambda: self._pending < self.max_pending, self.max_wait):
+                    self.rejected += 1
+                    raise QueueFull(f"{self._pending} documents are waiting to be written")
+            self._pending += 1
+
+        doc_id = doc_id or new_document_id()
+        now = time.time()
+        try:
+            self._conn().execute(_INSERT, (doc_id, collection, data.decode("utf-8"), now, now))
+        except BaseException:
+            with self._space:
+                self._pending -= 1
+            raise
+        self.enqueued += 1
+        if self._pending >= self.batch_size:
+            self._wake.set()
+        return doc_id
+
+    def _claim(self, now: float) -> List[Row]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(_SELECT_DUE, (now, self.batch_size)).fetchall()
+            if rows:
+                conn.executemany(
+                    "UPDATE outbox SET next_attempt_at = ? WHERE seq = ?",
+                    [(now + self.lease, row[0]) for row in rows],
+                )
+            conn.execute("COMMIT")
+            return rows
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _document(self, data: str, enqueued_at: float) -> Dict[str, Any]:
+        document = fast_json.loads(data)
+        if self.timestamp_field:
+            document[self.timestamp_field] = datetime.datetime.fromtimestamp(enqueued_at, datetime.timezone.utc)
+        return document
+
+    def _commit(self, rows: List[Row]) -> Optional[str]:
+        """Write ``rows`` in one batch; returns the error, or None once committed."""
+        try:
+            batch = self.client.batch()
+            for _, doc_id, collection, data, enqueued_at, *_ in rows:
+                batch.set(self.client.collection(collection).document(doc_id), self._document(data, enqueued_at))
+            batch.commit()
+        except Exception as e:
+            self.failed_batches += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            return self.last_error
+        self.batches += 1
+        self._last_success_at = time.time()
+        return None
+
+    def _bisect(self, rows: List[Row], error: str, written: List[Row], failed: Dict[int, Tuple[str, bool]]):
+        """Find what in a failed batch still commits; ``failed`` maps seq to (error, failed alone)."""
+        if len(rows) == 1:
+            failed[rows[0][0]] = (error, True)
+            return
+        middle = len(rows) // 2
+        for half in (rows[:middle], rows[middle:]):
+            half_error = self._commit(half)
+            if half_error is None:
+                written.extend(half)
+            elif written or not failed or len(half) == 1:
+                self._bisect(half, half_error, written, failed)
+            else:
+                # Nothing has gone through yet: more likely an outage than bad documents, so stop splitting
+                for row in half:
+                    failed[row[0]] = (half_error, False)
+
+    def flush_once(self, now: Optional[float] = None) -> int:
+        """Write the due documents, one batch or its bisected halves; returns how many were written."""
+        now = time.time() if now is None else now
+        rows = self._claim(now)
+        if not rows:
+            return 0
+
+        written: List[Row] = []
+        failed: Dict[int, Tuple[str, bool]] = {}
+        error = self._commit(rows)
+        if error is None:
+            written = rows
+        else:
+            self._bisect(rows, error, written, failed)
+
+        retries, parked = [], []
+        for seq, _, _, _, _, attempts, failures, last_attempt_at in rows:
+            if seq not in failed:
+                continue
+            error, alone = failed[seq]
+            # A failure only counts towards parking if Firestore took another write since this row's last try
+            if alone and self._last_success_at > last_attempt_at:
+                failures += 1
+            if failures >= self.max_failures:
+                parked.append((attempts + 1, now, error, seq))
+            else:
+                # Full jitter, so several workers don't all retry at the same moment
+                retry_at = now + random.uniform(0, min(self.max_backoff, self.flush_interval * (2 ** (attempts + 1))))
+                retries.append((retry_at, error, failures, now, seq))
+
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("DELETE FROM outbox WHERE seq = ?", [(row[0],) for row in written])
+            conn.executemany(
+                "UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ?, last_error = ?, failures = ?,"
+                " last_attempt_at = ? WHERE seq = ?",
+                retries,
+            )
+            conn.executemany(_PARK, parked)
+            conn.executemany("DELETE FROM outbox WHERE seq = ?", [(park[3],) for park in parked])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self.written += len(written)
+        if parked:
+            print(f"Outbox parked {len(parked)} document(s) after {self.max_failures} failures: {parked[0][2]}")
+        if written or parked:
+            with self._space:
+                self._pending = max(0, self._pending - len(written) - len(parked))
+                self._space.notify_all()
+        return len(written)
+
+    def parked_count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM parked").fetchone()[0]
+
+    def requeue_parked(self) -> int:
+        """Move every parked document back into the outbox with fresh attempt counts; returns how many."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            moved = conn.execute(_REQUEUE, (time.time(),)).rowcount
+            conn.execute("DELETE FROM parked")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        with self._space:
+            self._pending += moved
+        self._wake.set()
+        return moved
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                written = self.flush_once()
+            except Exception as e:
+                print(f"Outbox flush error: {e}")
+                written = 0
+            if written < self.batch_size:
+                # Let submissions accumulate into the next batch
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                with self._space:
+                    # Other workers sharing the file may have drained it
+                    if not written:
+                        self._pending = self._count()
+                        self._space.notify_all()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="firestore-write-behind", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the worker after draining what is due, for up to ``timeout`` seconds."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and self.flush_once() == self.batch_size:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self._pending,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "batches": self.batches,
+            "failedBatches": self.failed_batches,
+            "parked": self.parked_count(),
+            "rejected": self.rejected,
+            "lastError": self.last_error,
+            "maxPending": self.max_pending,
+        }
+
+
+class _FakeDocument:
+    def __init__(self, collection: "_FakeCollection", doc_id: str):
+        self.collection = collection
+        self.id = doc_id
+        self.path = f"{collection.name}/{doc_id}"
+
+
+class _FakeCollection:
+    def __init__(self, client: "FakeFirestore", name: str):
+        self.client = client
+        self.name = name
+
+    def document(self, doc_id: Optional[str] = None) -> _FakeDocument:
+        return _FakeDocument(self, doc_id or new_document_id())
+
+    def add(self, document: Dict[str, Any]):
+        ref = self.document()
+        batch = self.client.batch()
+        batch.set(ref, document)
+        batch.commit()
+        return time.time(), ref
+
+
+class _FakeBatch:
+    def __init__(self, client: "FakeFirestore"):
+        self.client = client
+        self.writes: List[Tuple[_FakeDocument, Dict[str, Any]]] = []
+
+    def set(self, ref: _FakeDocument, document: Dict[str, Any], merge: bool = False):
+        if len(self.writes) >= MAX_BATCH_SIZE:
+            raise ValueError(f"Batches are limited to {MAX_BATCH_SIZE} writes")
+        self.writes.append((ref, dict(document)))
+
+    def commit(self):
+        self.client._commit(self.writes)
+        return [None] * len(self.writes)
+
+
+class FakeFirestore:
+    """In-process stand-in for ``firestore.client()``: collections, ``add`` and batched ``set``.
+
+    Every commit (``add`` is one) costs ``latency`` seconds, like a network
+    round trip. Set ``fail_commits`` to make that many upcoming commits raise,
+    and add document IDs to ``invalid_ids`` to make every commit that
+    includes one of them raise, as Firestore does for a malformed document.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self.commits = 0
+        self.fail_commits = 0
+        self.invalid_ids = set()
+        self._lock = threading.Lock()
+
+    def collection(self, name: str) -> _FakeCollection:
+        return _FakeCollection(self, name)
+
+    def batch(self) -> _FakeBatch:
+        return _FakeBatch(self)
+
+    def _commit(self, writes: List[Tuple[_FakeDocument, Dict[str, Any]]]):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.commits += 1
+            if self.fail_commits > 0:
+                self.fail_commits -= 1
+                raise ConnectionError("fake Firestore is unavailable")
+            for ref, _ in writes:
+                if ref.id in self.invalid_ids:
+                    raise ValueError(f"invalid document {ref.path}")
+            for ref, document in writes:
+                self.documents[ref.path] = document
@@ -0,0 +1,129 @@
+"""Lost updates and throughput under concurrent admin approvals and work-log writes.
+
+"naive" is the old admin_action: get(), compute the new notifications list,
+update(); two threads interleaving between the read and the write each
+append to the same old list and one notification is lost. "modify" is the
+store's atomic read-transition-write (a per-application lock in memory,
+compare-and-swap on a version column in SQLite). Every write appends one
+notification, so a correct run ends with exactly one per write.
+
+"shared" sends every thread at one application; "separate" gives each
+thread its own, which must not be slowed down by the others. With every
+thread on one SQLite row, and the thread switch interval forced down to
+1 us so threads are preempted between read and write, about one CAS retry
+per write is expected. Those retries back off exponentially (capped at
+CAS_BACKOFF_MAX), and throughput stays within the same order as the naive
+path while losing nothing. The script
+exits non-zero if ``modify`` loses a notification or any run loses a
+work-log entry, so it doubles as a regression check.
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from common import print_table
+
+from app_store import SEED_APPLICATIONS, InMemoryStore, SQLiteStore
+
+THREADS = 8
+WRITES_PER_THREAD = 300
+
+
+def make_app(i: int) -> dict:
+    return dict(SEED_APPLICATIONS[0], id=f"MN-2024-{i:04d}", notifications=[], workLog=[])
+
+
+def fill(store, count: int):
+    for i in range(count):
+        app = make_app(i)
+        if isinstance(store, SQLiteStore):
+            store.insert(app)
+        else:
+            store.applications[app["id"]] = app
+
+
+def notify(app: dict) -> dict:
+    notifications = list(app.get("notifications", []))
+    notifications.append({"id": len(notifications), "message": "Your application is being reviewed.", "type": "info"})
+    return {"notifications": notifications}
+
+
+def naive(store, app_id: str):
+    app = store.get(app_id)
+    store.update(app_id, notify(app))
+
+
+def atomic(store, app_id: str):
+    store.modify(app_id, notify)
+
+
+def count_work_log(store, app_id: str) -> int:
+    count, cursor = 0, None
+    while True:
+        page = store.work_log(app_id, cursor=cursor, limit=200)
+        count += len(page["data"])
+        cursor = page["cursor"]
+        if cursor is None:
+            return count
+
+
+def run(store, write, app_ids):
+    """Every thread writes WRITES_PER_THREAD times; returns (lost notifications, work-log gaps, writes/s)."""
+    def worker(app_id: str):
+        for n in range(WRITES_PER_THREAD):
+            write(store, app_id)
+            store.append_work_log(app_id, {"jobTitle": "Cashier", "company": f"Store {n}", "status": "Applied"})
+
+    pool = [threading.Thread(target=worker, args=(app_id,)) for app_id in app_ids]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    expected = {}
+    for app_id in app_ids:
+        expected[app_id] = expected.get(app_id, 0) + WRITES_PER_THREAD
+    lost = sum(n - len(store.get(app_id)["notifications"]) for app_id, n in expected.items())
+    logs_lost = sum(n - count_work_log(store, app_id) for app_id, n in expected.items())
+    return lost, logs_lost, len(app_ids) * WRITES_PER_THREAD / elapsed
+
+
+def fresh(kind: str, apps: int):
+    if kind == "dict":
+        store = InMemoryStore()
+    else:
+        path = os.path.join(tempfile.mkdtemp(prefix="bench-app-concurrency-"), "applications.db")
+        store = SQLiteStore(path, seed=False)
+    fill(store, apps)
+    return store
+
+
+def main():
+    # Switch threads as often as possible so unsafe interleavings actually happen
+    sys.setswitchinterval(1e-6)
+    rows = []
+    failures = []
+    for kind in ("dict", "sqlite"):
+        for layout in ("shared", "separate"):
+            app_ids = ["MN-2024-0000"] * THREADS if layout == "shared" else [f"MN-2024-{i:04d}" for i in range(THREADS)]
+            for name, write in (("naive", naive), ("modify", atomic)):
+                store = fresh(kind, THREADS)
+                lost, logs_lost, rate = run(store, write, app_ids)
+                conflicts = getattr(store, "conflicts", "-")
+                rows.append([kind, layout, name, lost, logs_lost, conflicts, f"{rate:,.0f}"])
+                if (name == "modify" and lost) or logs_lost:
+                    failures.append(f"{kind}/{layout}/{name}: {lost} notifications, {logs_lost} log entries lost")
+
+    print(f"{THREADS} threads x {WRITES_PER_THREAD} approvals + work-log writes, {os.cpu_count()} CPUs\n")
+    print_table(["store", "apps", "admin write", "lost notifications", "lost log entries", "CAS retries", "approvals/s"], rows)
+    if failures:
+        print("\nLost updates:\n" + "\n".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Application store reads and writes per second, InMemoryStore vs. SQLiteStore.
+
+The SQLite store pays for durability and cross-worker consistency; this
+shows how much, single-threaded and with several request threads, for the
+operations behind /api/v1/status (get), /api/v1/admin (get_all) and
+/api/v1/work-log (update).
+"""
+import os
+import tempfile
+import threading
+import time
+
+from common import print_table
+
+from app_store import SEED_APPLICATIONS, InMemoryStore, SQLiteStore
+
+APPLICATIONS = 200
+DURATION = 1.0
+
+
+def make_app(i: int) -> dict:
+    app = dict(SEED_APPLICATIONS[0], id=f"MN-2024-{i:04d}", notifications=[], workLog=[])
+    app["status"] = ["Pending Review", "Under Review", "Determination Pending"][i % 3]
+    return app
+
+
+def fill(store):
+    for i in range(APPLICATIONS):
+        app = make_app(i)
+        if isinstance(store, SQLiteStore):
+            store.insert(app)
+        else:
+            store.applications[app["id"]] = app
+
+
+def ops_per_second(op, threads: int) -> float:
+    counts = [0] * threads
+    stop = time.perf_counter() + DURATION
+
+    def worker(slot: int):
+        n = 0
+        while time.perf_counter() < stop:
+            op(n)
+            n += 1
+        counts[slot] = n
+
+    pool = [threading.Thread(target=worker, args=(slot,)) for slot in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return sum(counts) / (time.perf_counter() - start)
+
+
+def operations(store):
+    log_entry = {"id": "log-1", "jobTitle": "Software Engineer", "company": "Acme", "dateApplied": "Just now", "status": "Applied"}
+    return {
+        "get": lambda n: store.get(f"MN-2024-{n % APPLICATIONS:04d}"),
+        "get_all": lambda n: store.get_all(),
+        "update": lambda n: store.update(f"MN-2024-{n % APPLICATIONS:04d}", {"workLog": [log_entry]}),
+    }
+
+
+def main():
+    path = os.path.join(tempfile.mkdtemp(prefix="bench-app-store-"), "applications.db")
+    stores = {"dict": InMemoryStore(), "sqlite": SQLiteStore(path)}
+    for store in stores.values():
+        fill(store)
+
+    rows = []
+    for name in ("get", "get_all", "update"):
+        for threads in (1, 4):
+            dict_ops = ops_per_second(operations(stores["dict"])[name], threads)
+            sqlite_ops = ops_per_second(operations(stores["sqlite"])[name], threads)
+            rows.append([name, threads, f"{dict_ops:,.0f}", f"{sqlite_ops:,.0f}", f"{sqlite_ops / dict_ops:.3f}"])
+
+    print(f"{APPLICATIONS} applications, {os.cpu_count()} CPUs, WAL + synchronous=NORMAL\n")
+    print_table(["operation", "threads", "dict ops/s", "sqlite ops/s", "sqlite/dict"], rows)
+
+
+if __name__ == "__main__":
+    main()
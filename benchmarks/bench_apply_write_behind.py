@@ -0,0 +1,82 @@
+"""/api/v1/apply acknowledgement latency and Firestore round trips, synchronous add vs. write-behind.
+
+"before" is the original request path: one ``collection("applications").add()``
+round trip per submission. "after" commits the submission to the local
+outbox in api/write_behind.py and returns the pre-generated ID; the worker
+writes batches to Firestore. Firestore is the in-process ``FakeFirestore``
+with a simulated round trip of ROUND_TRIP seconds, so no credentials or
+network are needed. "drained" is when the last document reached Firestore.
+"""
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from common import print_table
+
+from write_behind import FakeFirestore, WriteBehindQueue
+
+ROUND_TRIP = 0.04
+SUBMISSIONS_PER_THREAD = 50
+
+
+def submission(n: int) -> dict:
+    return {"userId": f"user-{n}", "jobId": "general", "answers": {"q1": "yes", "q2": "no", "q3": "40 hours"}, "status": "received"}
+
+
+def percentile(values, pct: float) -> float:
+    return sorted(values)[min(len(values) - 1, int(len(values) * pct))]
+
+
+def run(submit, threads: int):
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(slot: int):
+        mine = []
+        for n in range(SUBMISSIONS_PER_THREAD):
+            start = time.perf_counter()
+            submit(submission(slot * SUBMISSIONS_PER_THREAD + n))
+            mine.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(mine)
+
+    pool = [threading.Thread(target=worker, args=(slot,)) for slot in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return latencies, time.perf_counter() - start
+
+
+def main():
+    rows = []
+    for threads in (4, 16, 40):
+        total = threads * SUBMISSIONS_PER_THREAD
+
+        firestore = FakeFirestore(latency=ROUND_TRIP)
+        before, before_s = run(lambda doc: firestore.collection("applications").add(doc), threads)
+        rows.append([threads, "add() per request", f"{statistics.median(before) * 1e3:.1f}",
+                     f"{percentile(before, 0.95) * 1e3:.1f}", f"{total / before_s:,.0f}", firestore.commits, f"{before_s:.2f}"])
+
+        firestore = FakeFirestore(latency=ROUND_TRIP)
+        path = os.path.join(tempfile.mkdtemp(prefix="bench-outbox-"), "outbox.db")
+        outbox = WriteBehindQueue(firestore, path=path, timestamp_field="submittedAt")
+        outbox.start()
+        start = time.perf_counter()
+        after, after_s = run(lambda doc: outbox.enqueue("applications", doc), threads)
+        while len(firestore.documents) < total:
+            time.sleep(0.005)
+        drained_s = time.perf_counter() - start
+        outbox.stop()
+        rows.append([threads, "write-behind", f"{statistics.median(after) * 1e3:.1f}",
+                     f"{percentile(after, 0.95) * 1e3:.1f}", f"{total / after_s:,.0f}", firestore.commits, f"{drained_s:.2f}"])
+
+    print(f"{SUBMISSIONS_PER_THREAD} submissions per thread, simulated Firestore round trip {ROUND_TRIP * 1e3:.0f} ms\n")
+    print_table(["threads", "path", "ack p50 ms", "ack p95 ms", "acks/s", "Firestore commits", "drained s"], rows)
+
+
+if __name__ == "__main__":
+    main()
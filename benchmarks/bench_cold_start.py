@@ -0,0 +1,132 @@
+"""Cold start of api/index.py: import cost per module and time to first response per endpoint.
+
+Every measurement runs in a fresh interpreter, the way a serverless cold
+start does. The first table is ``python -X importtime`` for ``import index``,
+summed per top-level package. The second spawns one process per endpoint
+and times the import plus the first request through the ASGI app.
+
+"eager" reproduces the old module-level work before importing index:
+importing pypdf and creating the Firestore client through the same
+``firestore_db.get_db()`` the app uses (which, outside GCP and without
+credentials, includes google-auth's metadata-server probe and ends with no
+client). "lazy" is api/index.py as it is now. Both modes take the real
+Firebase path, so /api/v1/apply pays for the SDK in both: eager at import,
+lazy on the first submission. No LLM or SerpApi keys are set, so the
+metadata probe is the only thing that leaves the machine.
+
+The application store is created at import but opens, seeds and migrates
+its SQLite file on the first query, so that cost shows up in the first
+request to /api/v1/admin, not in the import.
+"""
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+from common import API_DIR, make_text_pdf, print_table
+
+TOP_PACKAGES = 12
+DEFERRED = ["firebase_admin", "google.cloud.firestore", "grpc", "pypdf", "requests"]
+
+EAGER_PRELUDE = """
+import pypdf
+import firestore_db
+firestore_db.get_db()
+"""
+
+CHILD = """
+import json, os, sys, time
+start = time.perf_counter()
+{prelude}
+import index
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(index.app) as client:
+    method, path, kwargs = json.loads(sys.argv[1])
+    if "files" in kwargs:
+        kwargs["files"] = {{"file": ("resume.pdf", open(kwargs["files"], "rb"), "application/pdf")}}
+    ready = time.perf_counter()
+    status = client.request(method, path, **kwargs).status_code
+    done = time.perf_counter()
+print(json.dumps({{
+    "import": imported - start, "first": done - ready, "status": status,
+    "loaded": [name for name in {deferred!r} if name in sys.modules],
+}}))
+"""
+
+
+def child_env(scratch: str) -> dict:
+    env = {key: value for key, value in os.environ.items() if key not in ("GROQ_API_KEY", "SERPAPI_KEY", "LLM_PROVIDER")}
+    env.pop("FIRESTORE_FAKE", None)
+    env.update(
+        APP_STORE_PATH=os.path.join(scratch, "applications.db"),
+        CONTACT_CACHE_PATH=os.path.join(scratch, "contacts.db"),
+        JOB_INDEX_PATH=os.path.join(scratch, "jobs.db"),
+        RESUME_CACHE_DIR=os.path.join(scratch, "resumes"),
+        APPLY_OUTBOX_PATH=os.path.join(scratch, "outbox.db"),
+        RESUME_PARSE_WORKERS="0",
+    )
+    return env
+
+
+def import_report(env: dict):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import index"],
+        cwd=API_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    per_package = {}
+    total = 0
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)", line)
+        if not match:
+            continue
+        self_us, cumulative_us, _, name = match.groups()
+        per_package[name.split(".")[0]] = per_package.get(name.split(".")[0], 0) + int(self_us)
+        if name == "index":
+            total = int(cumulative_us)
+    ranked = sorted(per_package.items(), key=lambda item: item[1], reverse=True)[:TOP_PACKAGES]
+    print(f"import index: {total / 1e3:.0f} ms (self time summed per top-level package)\n")
+    print_table(["package", "self ms", "share"], [[name, f"{us / 1e3:.1f}", f"{us / total:.0%}"] for name, us in ranked])
+
+
+def first_response(prelude: str, request) -> dict:
+    # Fresh caches and stores too: nothing from an earlier run may answer the request
+    code = CHILD.format(prelude=prelude, deferred=DEFERRED)
+    result = subprocess.run(
+        [sys.executable, "-c", code, json.dumps(request)],
+        cwd=API_DIR, env=child_env(tempfile.mkdtemp(prefix="bench-cold-start-")), capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    scratch = tempfile.mkdtemp(prefix="bench-cold-start-")
+    pdf_path = os.path.join(scratch, "resume.pdf")
+    with open(pdf_path, "wb") as f:
+        f.write(make_text_pdf(1))
+
+    endpoints = {
+        "GET /api/v1/suggest-jobs": ["GET", "/api/v1/suggest-jobs?query=nurse", {}],
+        "GET /api/v1/status": ["GET", "/api/v1/status", {}],
+        "GET /api/v1/admin": ["GET", "/api/v1/admin?limit=20", {}],
+        "POST /api/v1/apply": ["POST", "/api/v1/apply", {"json": {"userId": "u1", "answers": {"a": 1, "b": 2, "c": 3}}}],
+        "POST /api/v1/parse-resume": ["POST", "/api/v1/parse-resume", {"files": pdf_path}],
+    }
+
+    import_report(child_env(scratch))
+    rows = []
+    for name, request in endpoints.items():
+        for mode, prelude in (("eager", EAGER_PRELUDE), ("lazy", "")):
+            result = first_response(prelude, request)
+            rows.append([
+                name, mode, f"{result['import'] * 1e3:,.0f}", f"{result['first'] * 1e3:,.0f}",
+                f"{(result['import'] + result['first']) * 1e3:,.0f}", result["status"], ", ".join(result["loaded"]) or "-",
+            ])
+    print()
+    print_table(["endpoint", "mode", "import ms", "first request ms", "time to first response ms", "status", "heavy modules loaded"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Memory per 1k cached jobs and response serialization time: dict jobs vs. JobRecord.
+
+"before" is what search_jobs used to hold and return: one 17-key dict per
+job, encoded through FastAPI's default path (jsonable_encoder, then
+json.dumps as JSONResponse does). "after" is a list of slotted JobRecords
+encoded by fast_json.
+"""
+import json
+import tracemalloc
+
+from common import best_of, load_serpapi_jobs, print_table
+from bench_normalizer import baseline_normalize, make_batch
+
+import fast_json
+from fastapi.encoders import jsonable_encoder
+from job_normalizer import normalize_jobs
+
+
+def measure_memory(build):
+    """Bytes still allocated by ``build()`` once it returns (the result is kept alive)."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return size, result
+
+
+def fastapi_default_render(content):
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def main():
+    fixture_jobs = load_serpapi_jobs()
+    batch = make_batch(fixture_jobs, 1000)
+
+    dict_bytes, dict_jobs = measure_memory(lambda: baseline_normalize(batch, "Minnesota"))
+    record_bytes, records = measure_memory(lambda: normalize_jobs(batch, "Minnesota"))
+
+    print("Memory for 1,000 normalized jobs (tracemalloc, includes the shared description strings)\n")
+    print_table(
+        ["representation", "total KiB", "bytes/job"],
+        [
+            ["dict (before)", f"{dict_bytes / 1024:,.1f}", f"{dict_bytes / 1000:,.0f}"],
+            ["JobRecord (after)", f"{record_bytes / 1024:,.1f}", f"{record_bytes / 1000:,.0f}"],
+        ],
+    )
+
+    print("\nSerializing a /api/v1/search response\n")
+    rows = []
+    for size in (50, 1000):
+        dict_body = {"data": dict_jobs[:size], "total": size, "pages_fetched": 3}
+        record_body = {"data": records[:size], "total": size, "pages_fetched": 3}
+        number = max(1, 2000 // size)
+        before = best_of(lambda: fastapi_default_render(dict_body), repeat=7, number=number)
+        after = best_of(lambda: fast_json.dumps(record_body), repeat=7, number=number)
+        rows.append([size, f"{before * 1e3:.3f}", f"{after * 1e3:.3f}", f"{before / after:.1f}x"])
+    print_table(["jobs", "before ms", "after ms", "speedup"], rows)
+    print(f"\nfast_json backend: {'orjson' if fast_json.orjson is not None else 'json (orjson not installed)'}")
+
+
+if __name__ == "__main__":
+    main()
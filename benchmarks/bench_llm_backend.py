@@ -0,0 +1,61 @@
+"""LLM call throughput under concurrent requests, and threadpool workers held meanwhile.
+
+"before" is the original call pattern: a blocking HTTP round trip inside a
+sync endpoint, i.e. one of Starlette's 40 threadpool workers per call.
+"after" is api/llm.py: ``complete_json`` awaiting the provider on the event
+loop. Both use the same simulated model latency, so nothing leaves the host.
+"""
+import asyncio
+import json
+import time
+
+from common import print_table
+
+from fastapi.concurrency import run_in_threadpool
+
+import llm
+
+LATENCY = 0.2
+CONTENT = 'Sure! {"email": {"subject": "Hi", "body": "Body"}, "linkedinMessage": "Hello"}'
+MESSAGES = [{"role": "user", "content": "Generate a follow-up"}]
+
+
+def blocking_call() -> dict:
+    time.sleep(LATENCY)
+    start = CONTENT.find("{")
+    end = CONTENT.rfind("}") + 1
+    return json.loads(CONTENT[start:end])
+
+
+async def run_before(calls: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*[run_in_threadpool(blocking_call) for _ in range(calls)])
+    return time.perf_counter() - start
+
+
+async def run_after(calls: int) -> float:
+    provider = llm.FakeProvider(lambda messages: CONTENT, latency=LATENCY)
+    start = time.perf_counter()
+    results = await asyncio.gather(*[llm.complete_json(provider, MESSAGES, deadline=15) for _ in range(calls)])
+    elapsed = time.perf_counter() - start
+    assert results[0] == blocking_call()
+    return elapsed
+
+
+async def main():
+    rows = []
+    for calls in (10, 40, 200):
+        before_s = await run_before(calls)
+        after_s = await run_after(calls)
+        rows.append([
+            calls,
+            f"{calls / before_s:.0f}", min(calls, 40),
+            f"{calls / after_s:.0f}", 0,
+        ])
+
+    print(f"Simulated model latency: {LATENCY * 1e3:.0f} ms\n")
+    print_table(["concurrent", "before calls/s", "before threads", "after calls/s", "after threads"], rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
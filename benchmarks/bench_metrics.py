@@ -0,0 +1,67 @@
+"""Cost of recording a metric, lock per observation vs. api/metrics.py's per-thread shards.
+
+"locked" is the straightforward registry: one lock around every histogram
+update. "sharded" is ``metrics.Histogram``, which writes to the calling
+thread's own shard and only merges when /api/v1/metrics is scraped. The
+last column is a full scrape of the shared registry after the run.
+"""
+import bisect
+import threading
+import time
+
+from common import best_of, print_table
+
+from metrics import DEFAULT_BUCKETS, Registry
+
+OBSERVATIONS = 200_000
+ROUTES = ["/api/v1/search", "/api/v1/suggest-jobs", "/api/v1/status", "/api/v1/admin"]
+
+
+class LockedHistogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+
+def ns_per_observation(histogram, threads: int) -> float:
+    per_thread = OBSERVATIONS // threads
+
+    def worker():
+        observe = histogram.observe
+        for n in range(per_thread):
+            observe((n % 1000) / 1e4, "GET", ROUTES[n % 4])
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return (time.perf_counter() - start) / (per_thread * threads) * 1e9
+
+
+def main():
+    rows = []
+    for threads in (1, 4, 16):
+        locked = ns_per_observation(LockedHistogram(), threads)
+        registry = Registry()
+        sharded = registry.histogram("bench_seconds", "Benchmark.", ("method", "route"))
+        sharded_ns = ns_per_observation(sharded, threads)
+        scrape = best_of(registry.render, repeat=5)
+        rows.append([threads, f"{locked:.0f}", f"{sharded_ns:.0f}", f"{scrape * 1e3:.2f}"])
+
+    print(f"{OBSERVATIONS:,} histogram observations over {len(ROUTES)} routes\n")
+    print_table(["threads", "locked ns/obs", "sharded ns/obs", "scrape ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Cost of normalizing SerpApi jobs, the original per-job loop vs. api/job_normalizer.py.
+
+The baseline below is the loop search_jobs ran before api/job_normalizer.py
+existed, kept verbatim (minus the HTTP plumbing) so the numbers stay comparable.
+Batches are the sizes search actually normalizes: one SerpApi page (10
+jobs) and one full three-page search (30). The new path also parses
+posted_at into an age in hours (cached per distinct string) and builds
+slotted ``JobRecord``s positionally in one pass, which is cheaper than the
+baseline's 18-key dict.
+"""
+import copy
+
+from common import best_of, load_serpapi_jobs, print_table
+
+import fast_json
+from job_normalizer import normalize_jobs
+
+
+def baseline_normalize(jobs_list, loc):
+    all_jobs = []
+    seen_ids = set()
+    for job in jobs_list:
+        job_id = job.get("job_id", "")
+        if job_id in seen_ids:
+            continue  # Skip duplicates
+        seen_ids.add(job_id)
+
+        extensions = job.get("detected_extensions", {})
+
+        posted_at = extensions.get("posted_at", "Recently")
+        salary = extensions.get("salary", None)
+        schedule_type = extensions.get("schedule_type", None)
+        work_from_home = extensions.get("work_from_home", False)
+        job_type = None
+
+        if schedule_type:
+            job_type = schedule_type
+        elif "Full-time" in str(job.get("extensions", [])):
+            job_type = "Full-time"
+        elif "Part-time" in str(job.get("extensions", [])):
+            job_type = "Part-time"
+        elif "Contract" in str(job.get("extensions", [])):
+            job_type = "Contract"
+
+        freshness_score = 100
+        posted_lower = posted_at.lower()
+        if "hour" in posted_lower:
+            freshness_score = 1
+        elif "today" in posted_lower or "just" in posted_lower:
+            freshness_score = 2
+        elif "1 day" in posted_lower or "yesterday" in posted_lower:
+            freshness_score = 3
+        elif "2 day" in posted_lower:
+            freshness_score = 4
+        elif "3 day" in posted_lower:
+            freshness_score = 5
+        elif "day" in posted_lower:
+            freshness_score = 10
+        elif "week" in posted_lower:
+            freshness_score = 20
+
+        apply_options = job.get("apply_options", [])
+        apply_url = apply_options[0].get("link") if apply_options else job.get("share_link")
+        apply_sources = [opt.get("title", "Apply") for opt in apply_options[:3]] if apply_options else []
+
+        highlights = job.get("job_highlights", [])
+        qualifications = []
+        benefits = []
+        responsibilities = []
+        for highlight in highlights:
+            title = highlight.get("title", "").lower()
+            items = highlight.get("items", [])
+            if "qualif" in title or "require" in title:
+                qualifications = items[:5]
+            elif "benefit" in title:
+                benefits = items[:5]
+            elif "responsib" in title or "duties" in title:
+                responsibilities = items[:3]
+
+        all_jobs.append({
+            "id": job.get("job_id", "N/A"),
+            "title": job.get("title", "Unknown Role"),
+            "company": job.get("company_name", "Unknown Company"),
+            "location": job.get("location", loc),
+            "postedDate": posted_at,
+            "freshnessScore": freshness_score,
+            "easyApply": len(apply_options) > 0,
+            "description": job.get("description", "View details.")[:800],
+            "url": apply_url,
+            "logoUrl": job.get("thumbnail"),
+            "salary": salary,
+            "jobType": job_type,
+            "workFromHome": work_from_home,
+            "applySources": apply_sources,
+            "qualifications": qualifications,
+            "benefits": benefits,
+            "responsibilities": responsibilities,
+            "via": job.get("via", "")
+        })
+    return all_jobs
+
+
+def make_batch(fixture_jobs, size):
+    """``size`` jobs cycled from the fixtures, each with a unique job_id."""
+    batch = []
+    for i in range(size):
+        job = copy.copy(fixture_jobs[i % len(fixture_jobs)])
+        job["job_id"] = f"{job['job_id']}-{i}"
+        batch.append(job)
+    return batch
+
+
+def main():
+    fixture_jobs = load_serpapi_jobs()
+
+    # Both paths must serialize to the same JSON except for the freshness representation
+    old = baseline_normalize(fixture_jobs, "Minnesota")
+    new = fast_json.loads(fast_json.dumps(normalize_jobs(fixture_jobs, "Minnesota")))
+    for a, b in zip(old, new):
+        a.pop("freshnessScore"), b.pop("freshnessScore")
+        assert a == b, (a["id"], a, b)
+
+    rows = []
+    for name, size in (("one page", 10), ("one search", 30)):
+        batch = make_batch(fixture_jobs, size)
+        before = best_of(lambda: baseline_normalize(batch, "Minnesota"), repeat=50, number=200)
+        after = best_of(lambda: normalize_jobs(batch, "Minnesota"), repeat=50, number=200)
+        rows.append([
+            f"{name} ({size} jobs)", f"{size / before:,.0f}", f"{size / after:,.0f}",
+            f"{before * 1e6:.0f}", f"{after * 1e6:.0f}",
+        ])
+
+    print(f"Fixtures: {len(fixture_jobs)} SerpApi jobs from benchmarks/fixtures\n")
+    print_table(["batch", "before jobs/s", "after jobs/s", "before us/batch", "after us/batch"], rows)
+
+
+if __name__ == "__main__":
+    main()
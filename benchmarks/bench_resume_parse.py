@@ -0,0 +1,98 @@
+"""Resume parsing throughput under concurrent uploads, and how long it stalls the event loop.
+
+"before" is the original parse_resume body: pypdf run directly on the event
+loop with ``text += ...``. "after" is api/resume_parser.py: the upload is
+spooled to a temp file and pages are extracted in the worker pool.
+"""
+import asyncio
+import io
+import os
+import tempfile
+import time
+
+from common import make_text_pdf, print_table
+
+import resume_parser
+from pypdf import PdfReader
+
+
+class FakeUpload:
+    """Just enough of starlette's UploadFile for spool_upload."""
+
+    def __init__(self, content: bytes):
+        self._buffer = io.BytesIO(content)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self._buffer.read(size)
+
+
+async def parse_before(content: bytes) -> str:
+    reader = PdfReader(io.BytesIO(content))
+    text = ""
+    for page in reader.pages:
+        text += page.extract_text() + "\n"
+    return text.strip()
+
+
+async def parse_after(content: bytes) -> str:
+    spooled, _ = await resume_parser.spool_upload(FakeUpload(content))
+    try:
+        return await resume_parser.extract_text(spooled.name)
+    finally:
+        resume_parser.discard(spooled)
+
+
+async def run_concurrent(parse, content: bytes, uploads: int):
+    """Wall time for ``uploads`` concurrent parses and the worst event-loop stall meanwhile."""
+    worst_stall = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal worst_stall
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            worst_stall = max(worst_stall, time.perf_counter() - start - 0.001)
+
+    tick = asyncio.ensure_future(ticker())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    results = await asyncio.gather(*[parse(content) for _ in range(uploads)])
+    elapsed = time.perf_counter() - start
+    done = True
+    await tick
+    return elapsed, worst_stall, results[0]
+
+
+async def main():
+    # Start the pool up front so worker spawn time isn't billed to the first round
+    await resume_parser.extract_text(write_pdf(make_text_pdf(1)))
+
+    rows = []
+    for pages, uploads in ((2, 16), (8, 8), (24, 4)):
+        content = make_text_pdf(pages)
+        before_s, before_stall, before_text = await run_concurrent(parse_before, content, uploads)
+        after_s, after_stall, after_text = await run_concurrent(parse_after, content, uploads)
+        assert before_text == after_text
+        rows.append([
+            pages, uploads,
+            f"{uploads / before_s:.1f}", f"{before_stall * 1e3:.0f}",
+            f"{uploads / after_s:.1f}", f"{after_stall * 1e3:.0f}",
+        ])
+
+    print(f"Worker pool: {type(resume_parser.get_executor()).__name__} x {resume_parser.WORKERS}, {os.cpu_count()} CPUs\n")
+    print_table(
+        ["pages", "concurrent", "before docs/s", "before stall ms", "after docs/s", "after stall ms"], rows
+    )
+    resume_parser.shutdown_executor()
+
+
+def write_pdf(content: bytes) -> str:
+    path = os.path.join(tempfile.gettempdir(), "bench-resume-warmup.pdf")
+    with open(path, "wb") as f:
+        f.write(content)
+    return path
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+"""Toggling search filters: a SerpApi query per combination vs. filtering a cached superset.
+
+One user runs the default search (date_filter=week), then steps through
+every date x work type x experience combination the search page offers.
+"query per filter" is the old behavior (``SEARCH_LOCAL_FILTERS=0``): each
+combination is its own SerpApi query and cache entry. "filter on cache"
+fetches the week-wide superset once (plus the month-wide one for the month
+filter) and narrows it with api/search_filters.py. "top-up below 10" also
+sets ``SEARCH_FILTER_MIN_RESULTS``, so short combinations fetch their own
+query in the background; the toggle itself still doesn't wait for it. All go
+through index.py's ``_plan_search``, ``_live_search`` and ``_apply_plan``
+against a mock SerpApi that serves the Google Jobs fixtures with
+``PAGE_LATENCY`` per page.
+
+With the default configuration, a toggle that stays inside the week-wide
+superset must cost no credits; the run fails otherwise.
+"""
+import asyncio
+import itertools
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+
+from common import load_fixture, print_table
+
+PAGE_LATENCY = 0.08
+DATE_FILTERS = ["week", "today", "3days", "month"]
+WORK_TYPES = ["any", "remote", "hybrid", "onsite"]
+EXP_LEVELS = ["any", "entry", "mid", "senior"]
+
+PAGES = [load_fixture(f"serpapi_google_jobs_page{page}.json")["jobs_results"] for page in (1, 2, 3)]
+calls = []
+
+
+async def serpapi(request: httpx.Request) -> httpx.Response:
+    calls.append(request.url.params.get("q"))
+    await asyncio.sleep(PAGE_LATENCY)
+    page = int(request.url.params.get("start", 0)) // 10
+    return httpx.Response(200, json={"jobs_results": PAGES[page] if page < len(PAGES) else []})
+
+
+def percentile(values, pct: float) -> float:
+    return sorted(values)[min(len(values) - 1, int(len(values) * pct))]
+
+
+async def run(index, local_filters: bool, min_results: int = 0):
+    """Returns the table row and the combinations whose toggle spent credits"""
+    index.SEARCH_LOCAL_FILTERS = local_filters
+    index.SEARCH_FILTER_MIN_RESULTS = min_results
+    index.search_cache.clear()
+    calls.clear()
+
+    latencies = []
+    paid = []
+    for combination in itertools.product(DATE_FILTERS, WORK_TYPES, EXP_LEVELS):
+        date_filter, work_type, exp_level = combination
+        spent = len(calls)
+        start = time.perf_counter()
+        plan = index._plan_search("software engineer", "Minnesota", date_filter, work_type, "50", exp_level, "any", "key")
+        result = await index._live_search(plan.cache_key, plan.base_params, "software engineer", "Minnesota", plan.fresh_window)
+        index._apply_plan(plan, "Minnesota", result)
+        latencies.append(time.perf_counter() - start)
+        if len(calls) > spent:
+            paid.append(combination)
+    # Background top-ups spend credits too, just not while anyone waits
+    while index.search_cache._tasks:
+        await asyncio.gather(*index.search_cache._tasks)
+    toggles = latencies[1:]
+    row = [
+        len(calls), len(paid[1:]), f"{latencies[0] * 1e3:.1f}", f"{percentile(toggles, 0.5) * 1e3:.3f}",
+        f"{percentile(toggles, 0.95) * 1e3:.3f}",
+    ]
+    return row, paid[1:]
+
+
+async def main():
+    scratch = tempfile.mkdtemp(prefix="bench-search-filters-")
+    os.environ["JOB_INDEX_PATH"] = os.path.join(scratch, "jobs.db")
+    os.environ["APP_STORE"] = "memory"
+    import index
+    import upstream
+
+    upstream._client = httpx.AsyncClient(transport=httpx.MockTransport(serpapi))
+    upstream._client_loop = asyncio.get_running_loop()
+
+    per_filter, _ = await run(index, local_filters=False)
+    on_cache, paid = await run(index, local_filters=True)
+    top_up, _ = await run(index, local_filters=True, min_results=10)
+    rows = [["query per filter"] + per_filter, ["filter on cache"] + on_cache, ["filter on cache, top-up below 10"] + top_up]
+    combinations = len(DATE_FILTERS) * len(WORK_TYPES) * len(EXP_LEVELS)
+    print(f"1 search + {combinations - 1} filter toggles, {PAGE_LATENCY * 1e3:.0f} ms per SerpApi page\n")
+    print_table(
+        ["strategy", "SerpApi credits", "toggles that waited on SerpApi", "first search ms", "toggle p50 ms",
+         "toggle p95 ms"],
+        rows,
+    )
+
+    # Only the first month toggle leaves the week-wide superset
+    expected = [next(combination for combination in itertools.product(DATE_FILTERS, WORK_TYPES, EXP_LEVELS)
+                     if combination[0] == "month")]
+    if paid != expected:
+        print(f"\nFAIL: with the default configuration these toggles spent SerpApi credits: {paid}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
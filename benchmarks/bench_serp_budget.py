@@ -0,0 +1,113 @@
+"""SerpApi credits spent by a simulated day of job searches, fixed three-page fetch vs. budgeted adaptive depth.
+
+A mock SerpApi serves the Google Jobs fixtures: three full pages for
+common queries, one partial page for niche ones. "before" is the original
+fetch, all three pages requested concurrently on every cache miss. The
+other rows run the same workload through index.py's ``_live_search`` with
+api/serp_budget.py: page 1 is fetched alone and a short page 1 ends the
+search. With the default fresh target of 30 (three full pages), pages 2 and
+3 are then requested together. With a lower target they are fetched one at
+a time, and only while the previous page was full and too few jobs fell
+inside the date filter's window. Once a daily budget runs low,
+searches stop after one page or are answered from the local job index
+instead of SerpApi.
+"""
+import asyncio
+import os
+import random
+import tempfile
+
+import httpx
+
+from common import load_fixture, print_table
+
+SEARCHES = 600
+USERS = 60
+COMMON_QUERIES = ["software engineer", "nurse", "data analyst", "warehouse", "cashier", "accountant", "electrician",
+                  "teacher", "project manager", "customer service", "truck driver", "marketing", "sales", "welder",
+                  "pharmacist", "mechanic", "receptionist"]
+NICHE_QUERIES = ["glassblower", "luthier", "farrier", "taxidermist", "cartographer", "horologist", "bookbinder", "cooper"]
+DATE_FILTERS = ["today", "3days", "week", "month"]
+WORK_TYPES = ["any", "remote"]
+
+PAGES = [load_fixture(f"serpapi_google_jobs_page{page}.json")["jobs_results"] for page in (1, 2, 3)]
+calls = []
+
+
+def serpapi(request: httpx.Request) -> httpx.Response:
+    calls.append(request.url.params.get("q"))
+    page = int(request.url.params.get("start", 0)) // 10
+    if any(request.url.params["q"].startswith(niche) for niche in NICHE_QUERIES):
+        jobs = PAGES[0][:6] if page == 0 else []
+    else:
+        jobs = PAGES[page] if page < len(PAGES) else []
+    return httpx.Response(200, json={"jobs_results": jobs})
+
+
+def workload(seed: int = 11):
+    rng = random.Random(seed)
+    queries = COMMON_QUERIES + NICHE_QUERIES
+    # A few popular queries dominate, as on the real search page
+    weights = [1 / (rank + 1) for rank in range(len(queries))]
+    return [
+        (f"user-{rng.randrange(USERS)}", rng.choices(queries, weights)[0], rng.choice(DATE_FILTERS), rng.choice(WORK_TYPES))
+        for _ in range(SEARCHES)
+    ]
+
+
+async def run(index, upstream, serp_budget, daily_budget, user_budget, fresh_target, adaptive: bool):
+    index.search_cache.clear()
+    index.job_index.prune(float("inf"))
+    serp_budget.set_budget(serp_budget.CreditBudget(
+        daily_budget=daily_budget, user_daily_budget=user_budget, fresh_target=fresh_target))
+    upstream._client = httpx.AsyncClient(transport=httpx.MockTransport(serpapi))
+    upstream._client_loop = asyncio.get_running_loop()
+    calls.clear()
+
+    served = empty = degraded = 0
+    fetched = {}
+    for user, q, date_filter, work_type in workload():
+        serp_budget.current_user.set(user)
+        base_params, cache_key = index._build_search_params(q, "Minnesota", date_filter, work_type, "50", "any", "key")
+        if adaptive:
+            result = await index._live_search(cache_key, base_params, q, "Minnesota")
+        else:
+            if cache_key not in fetched:
+                fetched[cache_key] = [job async for page in upstream.iter_job_pages(base_params) for job in page]
+            result = {"data": fetched[cache_key]}
+        await asyncio.sleep(0)  # let background index writes run
+        served += bool(result.get("data"))
+        empty += not result.get("data")
+        degraded += result.get("degraded") == "budget"
+    return len(calls), served, degraded, empty
+
+
+async def main():
+    scratch = tempfile.mkdtemp(prefix="bench-serp-budget-")
+    os.environ["JOB_INDEX_PATH"] = os.path.join(scratch, "jobs.db")
+    os.environ["APP_STORE"] = "memory"
+    import index
+    import serp_budget
+    import upstream
+
+    rows = []
+    scenarios = [
+        ("before: 3 pages per miss", 0, 0, 30, False),
+        ("adaptive, unlimited", 0, 0, 30, True),
+        ("adaptive, fresh target 10", 0, 0, 10, True),
+        ("adaptive, 300/day", 300, 0, 30, True),
+        ("adaptive, 150/day", 150, 0, 30, True),
+        ("adaptive, 150/day, 10/user", 150, 10, 30, True),
+    ]
+    for name, daily_budget, user_budget, fresh_target, adaptive in scenarios:
+        credits, served, degraded, empty = await run(
+            index, upstream, serp_budget, daily_budget, user_budget, fresh_target, adaptive)
+        rows.append([name, credits, served, degraded, empty])
+
+    print(f"{SEARCHES} searches by {USERS} users, {len(COMMON_QUERIES)} common + {len(NICHE_QUERIES)} niche queries, "
+          f"{len(DATE_FILTERS)} date x {len(WORK_TYPES)} work-type filters\n")
+    print_table(["strategy", "SerpApi credits", "searches with jobs", "served from index", "empty"], rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
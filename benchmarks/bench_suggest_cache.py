@@ -0,0 +1,92 @@
+"""Type-ahead latency and LLM calls for /api/v1/suggest-jobs, uncached vs. SuggestionCache.
+
+Simulated users type job titles one keystroke at a time (from the third
+character) against a fake provider with a fixed model latency. "before" is a
+fresh provider call per keystroke, as the endpoint originally did; "after"
+goes through api/suggest_cache.py.
+"""
+import asyncio
+import json
+import random
+import statistics
+import time
+
+from common import print_table
+
+import llm
+from suggest_cache import SuggestionCache
+
+LATENCY = 0.3
+TITLES = [
+    "software engineer", "data analyst", "registered nurse", "project manager", "sales representative",
+    "customer service", "warehouse associate", "accountant", "electrician", "teacher",
+]
+MESSAGES = lambda q: [{"role": "user", "content": f"Suggest job titles for someone searching for: {q}"}]
+
+
+def responder(messages) -> str:
+    return json.dumps({"suggestions": [messages[-1]["content"].rsplit(": ", 1)[-1].title()], "related": []})
+
+
+def sessions(users: int, seed: int = 7):
+    rng = random.Random(seed)
+    # A few popular titles get most of the traffic, as in real search logs
+    weights = [1 / (rank + 1) for rank in range(len(TITLES))]
+    return [rng.choices(TITLES, weights)[0] for _ in range(users)]
+
+
+async def type_query(title: str, suggest) -> list:
+    latencies = []
+    for end in range(3, len(title) + 1):
+        start = time.perf_counter()
+        await suggest(title[:end])
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.02)  # time between keystrokes
+    return latencies
+
+
+async def run(users: int, cached: bool):
+    provider = llm.FakeProvider(responder, latency=LATENCY)
+    cache = SuggestionCache()
+
+    async def suggest(q: str):
+        fetch = lambda: llm.complete_json(provider, MESSAGES(q), deadline=5)
+        if cached:
+            return await cache.get(q, fetch)
+        return await fetch()
+
+    latencies = []
+    # Users arrive in waves so later ones find earlier answers cached
+    for wave in range(0, users, 25):
+        results = await asyncio.gather(*[type_query(title, suggest) for title in sessions(users)[wave:wave + 25]])
+        for result in results:
+            latencies.extend(result)
+    await asyncio.sleep(LATENCY * 2)  # let background refreshes finish before counting calls
+    return latencies, provider.calls
+
+
+def percentile(values, pct: float) -> float:
+    return sorted(values)[min(len(values) - 1, int(len(values) * pct))]
+
+
+async def main():
+    rows = []
+    for users in (25, 50, 100):
+        before, before_calls = await run(users, cached=False)
+        after, after_calls = await run(users, cached=True)
+        rows.append([
+            users, len(before),
+            f"{statistics.median(before) * 1e3:.1f}", f"{percentile(before, 0.95) * 1e3:.1f}", before_calls,
+            f"{statistics.median(after) * 1e3:.3f}", f"{percentile(after, 0.95) * 1e3:.1f}", after_calls,
+        ])
+
+    print(f"Simulated model latency: {LATENCY * 1e3:.0f} ms\n")
+    print_table(
+        ["users", "keystrokes", "before p50 ms", "before p95 ms", "before calls",
+         "after p50 ms", "after p95 ms", "after calls"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+"""Fallback job-title suggestion latency as the taxonomy grows, linear scan vs. TitleIndex.
+
+"before" is the original non-LLM branch of suggest_jobs: a substring scan
+over every keyword and title of the map per request. "after" is
+api/title_index.py, built once. Taxonomies beyond the built-in
+JOB_CAREER_MAP are generated from occupation-like word combinations.
+"""
+import itertools
+import random
+import time
+
+from common import best_of, print_table
+
+from title_index import TitleIndex
+
+SENIORITY = ["", "Junior", "Senior", "Lead", "Principal", "Assistant", "Associate", "Chief", "Staff", "Head"]
+FIELDS = [
+    "Software", "Data", "Clinical", "Financial", "Marketing", "Sales", "Retail", "Warehouse", "Logistics", "Medical",
+    "Construction", "Electrical", "Mechanical", "Legal", "Research", "Operations", "Customer", "Security", "Network",
+    "Cloud", "Payroll", "Quality", "Product", "Training", "Facilities", "Pharmacy", "Dental", "Veterinary", "Culinary",
+    "Environmental", "Civil", "Manufacturing", "Supply Chain", "Insurance", "Banking", "Tax", "Audit", "Education",
+]
+ROLES = [
+    "Engineer", "Analyst", "Manager", "Technician", "Specialist", "Coordinator", "Assistant", "Director", "Consultant",
+    "Administrator", "Developer", "Designer", "Nurse", "Representative", "Supervisor", "Officer", "Clerk", "Advisor",
+    "Scientist", "Architect", "Operator", "Inspector", "Planner", "Trainer", "Recruiter", "Auditor", "Associate",
+]
+QUERIES = ["nurse", "sof", "data an", "senior software engineer", "ware", "xyzzy", "clinical", "lead ope"]
+
+
+def make_taxonomy(size: int, seed: int = 3):
+    """``size`` distinct titles grouped by field keyword, like JOB_CAREER_MAP."""
+    combos = [
+        " ".join(part for part in (level, field, role) if part)
+        for level, field, role in itertools.product(SENIORITY, FIELDS, ROLES)
+    ]
+    rng = random.Random(seed)
+    rng.shuffle(combos)
+    while len(combos) < size:
+        # Past the combinatorial vocabulary, add numbered specializations
+        combos.append(f"{rng.choice(FIELDS)} {rng.choice(ROLES)} {len(combos)}")
+    groups = {}
+    for title in combos[:size]:
+        field = next(f for f in FIELDS if f in title)
+        groups.setdefault(field.lower(), []).append(title)
+    return groups
+
+
+def linear_suggest(groups, q: str):
+    q_lower = q.lower()
+    suggestions = []
+    related = []
+    for keyword, titles in groups.items():
+        if keyword in q_lower or q_lower in keyword:
+            suggestions.extend(titles)
+        elif any(q_lower in t.lower() for t in titles):
+            suggestions.extend([t for t in titles if q_lower in t.lower()])
+            related.extend([t for t in titles if q_lower not in t.lower()][:3])
+    seen = set()
+    unique = [s for s in suggestions if not (s.lower() in seen or seen.add(s.lower()))]
+    return unique[:8], list(set(related))[:5]
+
+
+def main():
+    rows = []
+    for size in (1_000, 10_000, 50_000):
+        groups = make_taxonomy(size)
+        start = time.perf_counter()
+        index = TitleIndex(groups)
+        build_s = time.perf_counter() - start
+
+        before = best_of(lambda: [linear_suggest(groups, q) for q in QUERIES], repeat=3) / len(QUERIES)
+        after = best_of(lambda: [index.search(q) for q in QUERIES], repeat=5, number=20) / len(QUERIES)
+        rows.append([
+            f"{len(index):,}", f"{build_s * 1e3:.0f}",
+            f"{before * 1e6:,.0f}", f"{after * 1e6:.1f}", f"{before / after:,.0f}x",
+        ])
+
+    print(f"Mean over queries: {', '.join(repr(q) for q in QUERIES)}\n")
+    print_table(["titles", "index build ms", "before us/query", "after us/query", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    main()
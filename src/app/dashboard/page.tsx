@@ -16,6 +16,10 @@ function DashboardContent() {
 
   const [statusData, setStatusData] = useState<any>(null);
   const [loading, setLoading] = useState(true);
+  // Status embeds only the newest work-log entries; older ones are paged in from /api/v1/work-log
+  const [workLog, setWorkLog] = useState<any[]>([]);
+  const [workLogCursor, setWorkLogCursor] = useState<string | null>(null);
+  const [loadingOlder, setLoadingOlder] = useState(false);
 
   useEffect(() => {
     // 1. Check for new application toast
@@ -29,6 +33,8 @@ function DashboardContent() {
         const res = await fetch('/api/v1/status');
         const data = await res.json();
         setStatusData(data);
+        setWorkLog(data.workLog || []);
+        setWorkLogCursor(data.workLogCursor || null);
       } catch (error) {
         console.error('Failed to fetch status:', error);
       } finally {
@@ -39,6 +45,22 @@ function DashboardContent() {
     fetchData();
   }, [searchParams]);
 
+  const loadOlderWorkLog = async () => {
+    if (!workLogCursor) return;
+    setLoadingOlder(true);
+    try {
+      const params = new URLSearchParams({ userId: statusData.id, cursor: workLogCursor, limit: '20' });
+      const res = await fetch(`/api/v1/work-log?${params}`);
+      const page = await res.json();
+      setWorkLog(entries => [...entries, ...(page.data || [])]);
+      setWorkLogCursor(page.cursor || null);
+    } catch (error) {
+      console.error('Failed to load older work log entries:', error);
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
+
   if (loading) {
      return <LinearProgress />;
   }
@@ -145,12 +167,14 @@ function DashboardContent() {
           </Box>
           
           <Box sx={{ mt: 4 }}>
-            <Typography variant="h6" gutterBottom fontWeight="bold">Recent Job Applications</Typography>
+            <Typography variant="h6" gutterBottom fontWeight="bold">
+              Recent Job Applications{statusData.workLogTotal > workLog.length ? ` (${workLog.length} of ${statusData.workLogTotal})` : ''}
+            </Typography>
               <Card variant="outlined">
-                {statusData.workLog && statusData.workLog.length > 0 ? (
+                {workLog.length > 0 ? (
                   <List>
-                     {statusData.workLog.map((log: any, i: number) => (
-                        <ListItem key={log.id} divider={i !== statusData.workLog.length - 1}>
+                     {workLog.map((log: any, i: number) => (
+                        <ListItem key={log.id} divider={i !== workLog.length - 1 || !!workLogCursor}>
                            <ListItemIcon><WorkIcon color="primary" /></ListItemIcon>
                            <ListItemText 
                              primary={<Typography fontWeight="600">{log.jobTitle}</Typography>} 
@@ -159,6 +183,13 @@ function DashboardContent() {
                            <Chip label="Applied" size="small" />
                         </ListItem>
                      ))}
+                     {workLogCursor && (
+                        <ListItem sx={{ justifyContent: 'center' }}>
+                           <Button variant="text" onClick={loadOlderWorkLog} disabled={loadingOlder}>
+                             {loadingOlder ? 'Loading...' : 'Show older applications'}
+                           </Button>
+                        </ListItem>
+                     )}
                   </List>
                 ) : (
                   <Box sx={{ p: 4, textAlign: 'center' }}>
@@ -0,0 +1,9 @@
+"""Backend tests. Run from the repository root with ``python -m pytest tests``."""
+import os
+import sys
+
+API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api")
+
+# Tests import the API modules the same way api/index.py does
+if API_DIR not in sys.path:
+    sys.path.insert(0, API_DIR)
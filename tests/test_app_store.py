@@ -0,0 +1,128 @@
+import sys
+import threading
+
+import pytest
+
+import app_store
+from app_store import SEED_APPLICATIONS, InMemoryStore, SQLiteStore, UpdateConflict
+
+THREADS = 8
+WRITES_PER_THREAD = 50
+APP_ID = "MN-2024-0000"
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        store = InMemoryStore()
+    else:
+        store = SQLiteStore(str(tmp_path / "applications.db"), seed=False)
+    app = dict(SEED_APPLICATIONS[0], id=APP_ID, notifications=[], workLog=[])
+    if isinstance(store, SQLiteStore):
+        store.insert(app)
+    else:
+        store.applications[APP_ID] = app
+    return store
+
+
+@pytest.fixture
+def preemptive():
+    # Switch threads as often as possible so unsafe interleavings actually happen
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def notify(app):
+    notifications = list(app.get("notifications", []))
+    notifications.append({"id": len(notifications), "message": "Your application is being reviewed.", "type": "info"})
+    return {"notifications": notifications}
+
+
+def all_work_log(store, app_id):
+    entries, cursor = [], None
+    while True:
+        page = store.work_log(app_id, cursor=cursor, limit=200)
+        entries.extend(page["data"])
+        cursor = page["cursor"]
+        if cursor is None:
+            return entries
+
+
+def test_concurrent_modify_loses_nothing(store, preemptive):
+    def worker(slot):
+        for n in range(WRITES_PER_THREAD):
+            store.modify(APP_ID, notify)
+            store.append_work_log(APP_ID, {"jobTitle": "Cashier", "company": f"Store {slot}-{n}", "status": "Applied"})
+
+    pool = [threading.Thread(target=worker, args=(slot,)) for slot in range(THREADS)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+    total = THREADS * WRITES_PER_THREAD
+    app = store.get(APP_ID)
+    # Each transition saw the previous one's list, so the ids count up with no gaps or repeats
+    assert [notification["id"] for notification in app["notifications"]] == list(range(total))
+
+    entries = all_work_log(store, APP_ID)
+    assert len(entries) == total
+    assert len({entry["id"] for entry in entries}) == total
+    assert {entry["company"] for entry in entries} == {
+        f"Store {slot}-{n}" for slot in range(THREADS) for n in range(WRITES_PER_THREAD)
+    }
+    assert app["workLogTotal"] == total
+    assert app["workLog"] == entries[:app_store.RECENT_WORK_LOG]
+
+
+@pytest.fixture
+def sqlite_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(app_store, "CAS_BACKOFF_MAX", 0)
+    store = SQLiteStore(str(tmp_path / "applications.db"), seed=False)
+    store.insert(dict(SEED_APPLICATIONS[0], id=APP_ID, notifications=[], workLog=[]))
+    return store
+
+
+def interfering(store, conflicts):
+    """A transition that lets another writer change the row underneath it the first ``conflicts`` times it runs."""
+    calls = []
+
+    def transition(app):
+        calls.append(app["step"])
+        if len(calls) <= conflicts:
+            # Connections are per thread, so this write is another writer as far as SQLite is concerned
+            writer = threading.Thread(target=store.update, args=(APP_ID, {"step": app["step"] + 1}))
+            writer.start()
+            writer.join()
+        return {"status": "Approved"}
+
+    return transition, calls
+
+
+def test_modify_reruns_the_transition_on_the_fresh_row(sqlite_store):
+    transition, calls = interfering(sqlite_store, conflicts=3)
+
+    app = sqlite_store.modify(APP_ID, transition)
+
+    step = SEED_APPLICATIONS[0]["step"]
+    assert calls == [step, step + 1, step + 2, step + 3]
+    assert app["status"] == "Approved"
+    assert app["step"] == step + 3
+    assert sqlite_store.get(APP_ID)["status"] == "Approved"
+    assert sqlite_store.conflicts == 3
+
+
+def test_modify_gives_up_after_max_cas_attempts(sqlite_store):
+    transition, calls = interfering(sqlite_store, conflicts=app_store.MAX_CAS_ATTEMPTS)
+
+    with pytest.raises(UpdateConflict):
+        sqlite_store.modify(APP_ID, transition)
+
+    assert len(calls) == app_store.MAX_CAS_ATTEMPTS
+    assert sqlite_store.conflicts == app_store.MAX_CAS_ATTEMPTS
+    # Only the other writer's changes landed
+    app = sqlite_store.get(APP_ID)
+    assert app["status"] == SEED_APPLICATIONS[0]["status"]
+    assert app["step"] == SEED_APPLICATIONS[0]["step"] + app_store.MAX_CAS_ATTEMPTS
@@ -0,0 +1,138 @@
+import datetime
+import time
+
+import pytest
+
+import write_behind
+from write_behind import FakeFirestore, WriteBehindQueue
+
+
+class RecordingFirestore(FakeFirestore):
+    """FakeFirestore that remembers the document IDs of every commit and whether it went through."""
+
+    def __init__(self):
+        super().__init__()
+        self.attempts = []
+
+    def _commit(self, writes):
+        ids = [ref.id for ref, _ in writes]
+        try:
+            super()._commit(writes)
+        except Exception:
+            self.attempts.append((ids, False))
+            raise
+        self.attempts.append((ids, True))
+
+
+def submission(n):
+    return {"userId": f"user-{n}", "jobId": "general", "answers": {"q1": "yes"}, "status": "received"}
+
+
+def due_times(queue):
+    return dict(queue._conn().execute("SELECT doc_id, next_attempt_at FROM outbox"))
+
+
+@pytest.fixture
+def firestore():
+    return RecordingFirestore()
+
+
+@pytest.fixture
+def make_queue(tmp_path, firestore):
+    def make(**options):
+        options.setdefault("batch_size", 8)
+        options.setdefault("flush_interval", 1.0)
+        options.setdefault("max_backoff", 3.0)
+        return WriteBehindQueue(firestore, path=str(tmp_path / "outbox.db"), **options)
+    return make
+
+
+def test_flush_delivers_every_enqueued_document(firestore, make_queue):
+    queue = make_queue(timestamp_field="submittedAt")
+    ids = [queue.enqueue("applications", submission(n)) for n in range(20)]
+    assert queue.pending() == 20
+
+    while queue.flush_once():
+        pass
+
+    assert set(firestore.documents) == {f"applications/{doc_id}" for doc_id in ids}
+    for n, doc_id in enumerate(ids):
+        document = firestore.documents[f"applications/{doc_id}"]
+        assert document["userId"] == f"user-{n}"
+        assert isinstance(document["submittedAt"], datetime.datetime)
+    # 20 documents in batches of 8
+    assert [len(doc_ids) for doc_ids, _ in firestore.attempts] == [8, 8, 4]
+    assert queue.stats()["pending"] == 0
+    assert queue.stats()["written"] == 20
+    assert queue._count() == 0
+
+
+def test_failing_batch_is_bisected_down_to_the_bad_document(firestore, make_queue):
+    queue = make_queue()
+    ids = [queue.enqueue("applications", submission(n)) for n in range(8)]
+    bad = ids[5]
+    firestore.invalid_ids.add(bad)
+
+    assert queue.flush_once() == 7
+
+    failed = [doc_ids for doc_ids, ok in firestore.attempts if not ok]
+    # The whole batch, then the halves, quarters and finally the document on its own
+    assert failed == [ids, ids[4:], ids[4:6], [bad]]
+    assert set(firestore.documents) == {f"applications/{doc_id}" for doc_id in ids if doc_id != bad}
+    assert list(due_times(queue)) == [bad]
+    assert queue.pending() == 1
+
+
+def test_poison_document_is_parked_while_its_siblings_commit(firestore, make_queue):
+    queue = make_queue(max_failures=2)
+    ids = [queue.enqueue("applications", submission(n)) for n in range(6)]
+    bad = ids[0]
+    firestore.invalid_ids.add(bad)
+
+    assert queue.flush_once() == 5
+    assert queue.stats()["parked"] == 0
+
+    # Its retry is the only due row; it fails alone again after the siblings' commit, which parks it
+    assert queue.flush_once(now=time.time() + 60) == 0
+    stats = queue.stats()
+    assert stats["parked"] == 1
+    assert stats["pending"] == 0
+    assert queue._count() == 0
+    assert len(firestore.documents) == 5
+    assert f"applications/{bad}" not in firestore.documents
+
+    firestore.invalid_ids.clear()
+    assert queue.requeue_parked() == 1
+    assert queue.flush_once() == 1
+    assert f"applications/{bad}" in firestore.documents
+    assert queue.stats()["parked"] == 0
+
+
+def test_transient_failure_backs_off_and_retries(monkeypatch, firestore, make_queue):
+    # Always wait the longest backoff, so the retry times are exact
+    monkeypatch.setattr(write_behind.random, "uniform", lambda low, high: high)
+    queue = make_queue(max_failures=1)
+    ids = [queue.enqueue("applications", submission(n)) for n in range(4)]
+    firestore.fail_commits = 100
+
+    now = time.time()
+    assert queue.flush_once(now=now) == 0
+    # flush_interval * 2 after the first failed attempt
+    assert due_times(queue) == {doc_id: pytest.approx(now + 2.0) for doc_id in ids}
+    assert queue.stats()["lastError"] == "ConnectionError: fake Firestore is unavailable"
+
+    # Nothing is due before the backoff expires
+    commits = firestore.commits
+    assert queue.flush_once(now=now + 1.0) == 0
+    assert firestore.commits == commits
+
+    assert queue.flush_once(now=now + 2.0) == 0
+    # Doubled, then capped at max_backoff
+    assert due_times(queue) == {doc_id: pytest.approx(now + 5.0) for doc_id in ids}
+    # Nothing succeeded between the attempts, so an outage never parks
+    assert queue.stats()["parked"] == 0
+
+    firestore.fail_commits = 0
+    assert queue.flush_once(now=now + 5.0) == 4
+    assert set(firestore.documents) == {f"applications/{doc_id}" for doc_id in ids}
+    assert queue.stats()["pending"] == 0